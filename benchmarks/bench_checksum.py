@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Benchmark checksum functions on representative object shapes.
+
+Usage:
+    python benchmarks/bench_checksum.py --scale 1.0 --repeat 5 --fns any blake2b
+"""
+
+import array
+import random
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from pythonwrench.checksum import (
+    ChecksumCache,
+    checksum_any,
+    checksum_blake2b,
+    checksum_parallel,
+    register_checksum_fn,
+)
+
+
+@dataclass(frozen=True)
+class Sample:
+    idx: int
+    name: str
+    score: float
+    tags: Tuple[str, ...]
+
+
+class Tensor:
+    """Minimal numpy-like array, stored as a flat buffer with a shape."""
+
+    def __init__(self, data: array.array, shape: Tuple[int, ...]) -> None:
+        self.data = data
+        self.shape = shape
+
+
+@register_checksum_fn(Tensor)
+def checksum_tensor(x: Tensor, **kwargs) -> int:
+    """Return a checksum for tensor."""
+    return checksum_any((x.shape, memoryview(x.data)), **kwargs)
+
+
+def make_cases(scale: float, seed: int = 0) -> Dict[str, Tuple[Any, int]]:
+    """Returns benchmark cases as dict of name to (object, number of elements)."""
+    rng = random.Random(seed)
+
+    def n(size: int) -> int:
+        return max(int(size * scale), 1)
+
+    wide_ints = [rng.randint(-(2**31), 2**31) for _ in range(n(1_000_000))]
+    wide_floats = [rng.random() for _ in range(n(1_000_000))]
+    wide_strs = [f"token_{rng.randint(0, 10**6)}" for _ in range(n(500_000))]
+    wide_mixed = [[i, float(i), str(i), None, (i, i + 1)] for i in range(n(100_000))]
+
+    deep_dict: Dict[str, Any] = {}
+    node = deep_dict
+    for i in range(n(1_000)):
+        node["value"] = i
+        node["child"] = {}
+        node = node["child"]
+
+    wide_dict = {f"key_{i}": {"a": i, "b": [i, i]} for i in range(n(100_000))}
+    samples = [
+        Sample(i, f"sample_{i}", rng.random(), ("a", "b")) for i in range(n(50_000))
+    ]
+    nbytes = n(64 * 1024**2)
+    blob = rng.getrandbits(8 * nbytes).to_bytes(nbytes, "little")
+    tensors = [
+        Tensor(array.array("f", [rng.random() for _ in range(1024)]), (32, 32))
+        for _ in range(n(1_000))
+    ]
+
+    cases = {
+        "wide_list_int": (wide_ints, len(wide_ints)),
+        "wide_list_float": (wide_floats, len(wide_floats)),
+        "wide_list_str": (wide_strs, len(wide_strs)),
+        "wide_list_mixed": (wide_mixed, len(wide_mixed) * 6),
+        "deep_dict": (deep_dict, n(1_000) * 2),
+        "wide_dict": (wide_dict, len(wide_dict) * 4),
+        "dataclasses": (samples, len(samples) * 5),
+        "bytes": (blob, len(blob)),
+        "registered_tensors": (tensors, len(tensors) * 1024),
+    }
+    return cases
+
+
+def get_checksum_fns() -> Dict[str, Callable[[Any], int]]:
+    """Returns checksum functions to benchmark."""
+
+    def checksum_cached(x: Any) -> int:
+        return checksum_any(x, checksum_cache=cache)
+
+    cache = ChecksumCache(max_entries=None)
+    return {
+        "any": checksum_any,
+        "cached": checksum_cached,
+        "blake2b": checksum_blake2b,
+        "parallel": checksum_parallel,
+    }
+
+
+def bench(fn: Callable[[Any], int], x: Any, repeat: int) -> float:
+    """Returns the best duration in seconds of fn(x) over several runs."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(x)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main_bench_checksum() -> None:
+    """Run benchmarks and print best durations and throughputs."""
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Size factor applied to all cases. defaults to 1.0.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of runs for each case, best duration is kept. defaults to 5.",
+    )
+    parser.add_argument(
+        "--fns",
+        type=str,
+        nargs="*",
+        default=["any", "blake2b"],
+        help="Checksum functions to benchmark. defaults to ['any', 'blake2b'].",
+    )
+    parser.add_argument(
+        "--cases",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Case names to run. defaults to all cases.",
+    )
+    args = parser.parse_args()
+
+    cases = make_cases(args.scale)
+    fns = get_checksum_fns()
+    if args.cases is not None:
+        cases = {name: cases[name] for name in args.cases}
+
+    rows: List[Tuple[str, ...]] = [("case", "fn", "elements", "best", "throughput")]
+    for case_name, (x, num_elements) in cases.items():
+        for fn_name in args.fns:
+            duration = bench(fns[fn_name], x, args.repeat)
+            throughput = num_elements / max(duration, 1e-9)
+            row = (
+                case_name,
+                fn_name,
+                str(num_elements),
+                f"{duration * 1000:.2f}ms",
+                f"{throughput / 1e6:.2f}M/s",
+            )
+            rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        line = "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        print(line.rstrip())
+
+
+if __name__ == "__main__":
+    main_bench_checksum()
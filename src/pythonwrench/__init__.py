@@ -77,7 +77,17 @@ if TYPE_CHECKING or lazy is None:
         str_to_type,
     )
     from .cast import as_builtin, register_as_builtin_fn
-    from .checksum import checksum_any, checksum_object, register_checksum_fn
+    from .checksum import (
+        ChecksumCache,
+        Checksummer,
+        checksum_any,
+        checksum_blake2b,
+        checksum_object,
+        checksum_parallel,
+        encode_canonical,
+        register_checksum_fn,
+        write_canonical,
+    )
     from .collections import (
         SizedGenerator,
         all_eq,
@@ -117,7 +127,7 @@ if TYPE_CHECKING or lazy is None:
     from .dataclasses import add_dict_methods, dataclassdict, get_defaults_values
     from .datetime import get_now, get_now_iso8601
     from .difflib import find_closest_in_list, sequence_matcher_ratio
-    from .disk_cache import disk_cache_call, disk_cache_decorator
+    from .disk_cache import disk_cache_call, disk_cache_decorator, disk_cache_map
     from .enum import StrEnum
     from .functools import (
         Compose,
@@ -171,6 +181,9 @@ if TYPE_CHECKING or lazy is None:
     )
     from .semver import Version
     from .serialization import (
+        JsonlSequence,
+        JsonlWriter,
+        build_jsonl_index,
         dump_csv,
         dump_json,
         dump_jsonl,
@@ -179,9 +192,12 @@ if TYPE_CHECKING or lazy is None:
         dumps_json,
         dumps_jsonl,
         dumps_pickle,
+        iter_jsonl,
+        iter_jsonl_parallel,
         load_csv,
         load_json,
         load_jsonl,
+        load_jsonl_parallel,
         load_pickle,
         loads_csv,
         loads_json,
@@ -226,6 +242,7 @@ if TYPE_CHECKING or lazy is None:
         T_BuiltinNumber,
         T_BuiltinScalar,
         check_args_types,
+        is_buffer,
         is_builtin_collection,
         is_builtin_number,
         is_builtin_obj,
@@ -308,7 +325,17 @@ else:
             ],
             "abc": ["Singleton"],
             "cast": ["as_builtin", "register_as_builtin_fn"],
-            "checksum": ["checksum_any", "checksum_object", "register_checksum_fn"],
+            "checksum": [
+                "ChecksumCache",
+                "Checksummer",
+                "checksum_any",
+                "checksum_blake2b",
+                "checksum_parallel",
+                "checksum_object",
+                "encode_canonical",
+                "register_checksum_fn",
+                "write_canonical",
+            ],
             "collections": [
                 "SizedGenerator",
                 "all_eq",
@@ -346,6 +373,9 @@ else:
                 "unzip",
             ],
             "serialization": [
+                "JsonlSequence",
+                "JsonlWriter",
+                "build_jsonl_index",
                 "dump_csv",
                 "dump_json",
                 "dump_jsonl",
@@ -354,9 +384,12 @@ else:
                 "dumps_json",
                 "dumps_jsonl",
                 "dumps_pickle",
+                "iter_jsonl",
+                "iter_jsonl_parallel",
                 "load_csv",
                 "load_json",
                 "load_jsonl",
+                "load_jsonl_parallel",
                 "load_pickle",
                 "loads_csv",
                 "loads_json",
@@ -374,7 +407,7 @@ else:
             "dataclasses": ["add_dict_methods", "dataclassdict", "get_defaults_values"],
             "datetime": ["get_now", "get_now_iso8601"],
             "difflib": ["find_closest_in_list", "sequence_matcher_ratio"],
-            "disk_cache": ["disk_cache_call", "disk_cache_decorator"],
+            "disk_cache": ["disk_cache_call", "disk_cache_decorator", "disk_cache_map"],
             "enum": ["StrEnum"],
             "functools": [
                 "Compose",
@@ -457,6 +490,7 @@ else:
                 "T_BuiltinNumber",
                 "T_BuiltinScalar",
                 "check_args_types",
+                "is_buffer",
                 "is_builtin_collection",
                 "is_builtin_number",
                 "is_builtin_obj",
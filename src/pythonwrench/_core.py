@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import typing
 from functools import wraps
 from typing import (
     Any,
@@ -27,6 +28,8 @@ T_Function = TypeVar("T_Function", bound=Callable[..., Any])
 
 UnkMode = Literal["identity", "error"]
 ClassOrTuple = Union[type, Tuple[type, ...]]
+# (function, custom predicate, class or tuple checked for each value)
+_Candidate = Tuple[Callable[..., Any], Optional["Predicate"], Optional[ClassOrTuple]]
 
 
 @runtime_checkable
@@ -80,9 +83,11 @@ class _FunctionRegistry(Generic[T_Output]):
             Callable[..., T_Output],
             Tuple[Optional[ClassOrTuple], Optional[Predicate], int],
         ] = {}
+        dispatch_cache: Dict[type, Tuple[_Candidate, ...]] = {}
 
         super().__init__()
         self.fns = fns
+        self._dispatch_cache = dispatch_cache
 
     def register(
         self,
@@ -121,6 +126,7 @@ class _FunctionRegistry(Generic[T_Output]):
                 priority,
                 priority_key=2,
             )
+            self._dispatch_cache = {}
             return new_fn
 
         return _impl
@@ -133,24 +139,37 @@ class _FunctionRegistry(Generic[T_Output]):
         unk_mode: UnkMode = "error",
         **kwargs,
     ) -> T_Output:
-        """Perform the apply operation."""
-        for fn, (class_or_tuple, custom_predicate, _) in self.fns.items():
-            if custom_predicate is not None:
-                predicate = custom_predicate
+        """Perform the apply operation.
 
-            elif class_or_tuple is not None:
+        With builtin isinstance, registered functions candidates are cached per concrete type of x, so only custom predicates and classes with custom instance checks are evaluated again for each value.
+        """
+        x_type = type(x)
+        # Objects that override __class__ can match classes not found in their concrete type MRO
+        if isinstance_fn is isinstance and x.__class__ is x_type:
+            candidates = self._dispatch_cache.get(x_type)
+            if candidates is None:
+                candidates = self._get_candidates(x_type)
 
-                def target_isinstance_fn_wrap(x: Any) -> bool:
-                    """Perform the target isinstance fn wrap operation."""
-                    return isinstance_fn(x, class_or_tuple)  # type: ignore
+            for fn, predicate, class_or_tuple in candidates:
+                if predicate is not None:
+                    if not predicate(x):
+                        continue
+                elif class_or_tuple is not None and not isinstance(x, class_or_tuple):
+                    continue
+                return fn(x, **kwargs)
 
-                predicate = target_isinstance_fn_wrap
-            else:
-                msg = f"Invalid function registered. (found {class_or_tuple=} and {custom_predicate=})"
-                raise TypeError(msg)
+        else:
+            for fn, (class_or_tuple, custom_predicate, _) in self.fns.items():
+                if custom_predicate is not None:
+                    matched = custom_predicate(x)
+                elif class_or_tuple is not None:
+                    matched = isinstance_fn(x, class_or_tuple)
+                else:
+                    msg = f"Invalid function registered. (found {class_or_tuple=} and {custom_predicate=})"
+                    raise TypeError(msg)
 
-            if predicate(x):
-                return fn(x, **kwargs)
+                if matched:
+                    return fn(x, **kwargs)
 
         if unk_mode == "identity":
             return x
@@ -166,6 +185,84 @@ class _FunctionRegistry(Generic[T_Output]):
             msg = f"Invalid argument {unk_mode=}. (expected one of {get_args(UnkMode)})"
             raise ValueError(msg)
 
+    def get_candidates(self, x_type: type) -> Tuple[_Candidate, ...]:
+        """Returns (function, custom predicate, class or tuple) candidates for values of a concrete type with builtin isinstance, in priority order.
+
+        A candidate with both custom predicate and class or tuple set to None always matches values of this type.
+        """
+        candidates = self._dispatch_cache.get(x_type)
+        if candidates is None:
+            candidates = self._get_candidates(x_type)
+        return candidates
+
+    def _get_candidates(self, x_type: type) -> Tuple[_Candidate, ...]:
+        """Returns registered functions that can match values of a concrete type, in priority order, and store them in dispatch cache.
+
+        Classes checks that only depend on the type are resolved once, and the list stops at the first one matching. Custom predicates and classes with custom instance checks (protocols, ABCs, typing aliases) are kept to be checked for each value.
+        """
+        # Get cache before functions, so a concurrent registration cannot store outdated candidates in new cache
+        dispatch_cache = self._dispatch_cache
+        candidates = []
+        for fn, (class_or_tuple, custom_predicate, _) in self.fns.items():
+            if custom_predicate is not None:
+                candidates.append((fn, custom_predicate, None))
+
+            elif class_or_tuple is not None:
+                if not _is_type_determined(class_or_tuple):
+                    if not _never_instance_of(x_type, class_or_tuple):
+                        candidates.append((fn, None, class_or_tuple))
+                elif issubclass(x_type, class_or_tuple):
+                    candidates.append((fn, None, None))
+                    break
+            else:
+                msg = f"Invalid function registered. (found {class_or_tuple=} and {custom_predicate=})"
+                raise TypeError(msg)
+
+        candidates = tuple(candidates)
+        dispatch_cache[x_type] = candidates
+        return candidates
+
+
+def _is_type_determined(class_or_tuple: ClassOrTuple) -> bool:
+    """Returns True if isinstance result with this class or tuple only depends on the concrete type of the value."""
+    if isinstance(class_or_tuple, tuple):
+        return all(_is_type_determined(cls) for cls in class_or_tuple)
+    return (
+        isinstance(class_or_tuple, type)
+        and type(class_or_tuple).__instancecheck__ is type.__instancecheck__
+        and type(class_or_tuple).__subclasscheck__ is type.__subclasscheck__
+    )
+
+
+def _never_instance_of(x_type: type, class_or_tuple: ClassOrTuple) -> bool:
+    """Returns True if values of a concrete type can never be instances of runtime protocols.
+
+    Only types which instances cannot have attributes that are not defined in their class are considered, e.g. int, str or list.
+    """
+    if isinstance(class_or_tuple, tuple):
+        return all(_never_instance_of(x_type, cls) for cls in class_or_tuple)
+
+    if not getattr(class_or_tuple, "_is_runtime_protocol", False):
+        return False
+    if x_type.__dictoffset__ != 0 or hasattr(x_type, "__getattr__"):
+        return False
+    # Builtin classes only use generic attribute lookup
+    if any(
+        "__getattribute__" in vars(cls) and cls.__module__ != "builtins"
+        for cls in x_type.__mro__
+    ):
+        return False
+
+    protocol_attrs = getattr(class_or_tuple, "__protocol_attrs__", None)
+    if protocol_attrs is None:
+        # Python < 3.12
+        get_protocol_attrs = getattr(typing, "_get_protocol_attrs", None)
+        if get_protocol_attrs is None:
+            return False
+        protocol_attrs = get_protocol_attrs(class_or_tuple)
+
+    return not all(hasattr(x_type, attr) for attr in protocol_attrs)
+
 
 def _insert_in_dict(
     dic: Dict,
@@ -1,24 +1,41 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import array
 import functools
+import hashlib
+import math
+import mmap
+import os
 import re
+import sqlite3
 import struct
+import sys
+import threading
+import time
 import zlib
-from dataclasses import asdict
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, fields
 from datetime import date, datetime
 from enum import Enum
 from functools import lru_cache
-from pathlib import Path
-from types import FunctionType, MethodType
+from pathlib import Path, PurePath
+from types import BuiltinFunctionType, FunctionType, MethodType
 from typing import (
     Any,
     Callable,
     Dict,
     Generator,
     Iterable,
+    Iterator,
+    List,
+    Literal,
     Mapping,
+    NamedTuple,
     Optional,
+    Sequence,
+    Tuple,
     TypeVar,
     Union,
     get_args,
@@ -28,12 +45,14 @@ from typing import (
 
 from pythonwrench._core import ClassOrTuple, Predicate, _FunctionRegistry
 from pythonwrench.functools import function_alias
+from pythonwrench.hashlib import hash_file
 from pythonwrench.inspect import get_fullname
 from pythonwrench.typing import (
     DataclassInstance,
     EllipsisType,
     NamedTupleInstance,
     NoneType,
+    is_buffer,
     is_collection_alias,
     is_parameterized,
     is_special_form,
@@ -41,6 +60,14 @@ from pythonwrench.typing import (
 
 T = TypeVar("T")
 
+PathChecksumMode = Literal["path", "content"]
+
+CANONICAL_ENCODING_VERSION = 1
+
+_DEFAULT_PATH_INDEX_FPATH = Path.home().joinpath(
+    ".cache", "pythonwrench", "path_checksums.db"
+)
+
 
 _CHECKSUM_REGISTRY = _FunctionRegistry[int]()
 _CHECKSUM_PROTOCOLS = False
@@ -101,7 +128,11 @@ def checksum_any(
 
     Supports most builtin types. Checksum can be used to compare objects.
     Not meant for security/cryptography.
+    A ``ChecksumCache`` can be given with ``checksum_cache`` keyword argument to reuse checksums of immutable objects checksummed several times.
     """
+    cache = _get_checksum_cache(kwargs)
+    if cache is not None and isinstance_fn is isinstance and cache.is_cacheable(x):
+        return cache.get_or_compute(x, kwargs, _CHECKSUM_REGISTRY.apply)
     return _CHECKSUM_REGISTRY.apply(x, isinstance_fn=isinstance_fn, **kwargs)
 
 
@@ -111,6 +142,278 @@ def checksum_object(*args, **kwargs):
     ...
 
 
+def checksum_parallel(
+    x: Any,
+    *,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 4 * 1024 * 1024,
+    chunk_len: int = 4096,
+    **kwargs,
+) -> int:
+    r"""Compute the same checksum value than ``checksum_any``, using a thread pool for large buffers and large sequences.
+
+    Bytes and bytearray objects larger than chunk_size are split in chunks which CRC32 are computed in parallel (zlib releases the GIL) and combined into the CRC32 of the whole buffer.
+    Top-level lists and tuples longer than chunk_len are split in chunks of elements checksummed in parallel, and partial weighted sums are added in order.
+    Speedup is mostly expected for large buffers, since checksum of other Python objects holds the GIL.
+
+    Args:
+        x: Object to checksum.
+        max_workers: Max number of threads. None means executor default. defaults to None.
+        chunk_size: Size in bytes of buffer chunks. defaults to 4 MiB.
+        chunk_len: Number of elements of top-level sequences chunks. defaults to 4096.
+        \*\*kwargs: Keywords arguments passed to ``checksum_any``.
+    """
+    if chunk_size <= 0:
+        msg = f"Invalid argument {chunk_size=}. (expected a positive integer)"
+        raise ValueError(msg)
+    if chunk_len <= 0:
+        msg = f"Invalid argument {chunk_len=}. (expected a positive integer)"
+        raise ValueError(msg)
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        options = _ParallelOptions(executor, chunk_size, chunk_len)
+        return checksum_any(x, checksum_parallel_options=options, **kwargs)
+
+
+class ChecksumCache:
+    """Identity-based LRU cache of checksums of immutable objects, used by ``checksum_any`` with ``checksum_cache`` keyword argument.
+
+    Only hashable bytes, tuples and frozensets with at least min_size elements, paths and frozen dataclasses instances are cached. Hashable objects are assumed to never be modified.
+    Cached objects are kept alive by the cache, so their ids cannot be reused by other objects while they are stored.
+
+    Example
+    -------
+    >>> cache = ChecksumCache(max_entries=128)
+    >>> config = (("lr", 0.1), ("layers", tuple(range(1000))))
+    >>> checksum_any(config, checksum_cache=cache)  # computed
+    >>> checksum_any(config, checksum_cache=cache)  # loaded from cache
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = 1024, *, min_size: int = 16
+    ) -> None:
+        """Initialize the instance.
+
+        Args:
+            max_entries: Max number of checksums stored. None means unbounded. defaults to 1024.
+            min_size: Min length of bytes, tuples and frozensets to cache. Smaller objects are cheaper to checksum than to look up. defaults to 16.
+        """
+        if max_entries is not None and max_entries <= 0:
+            msg = f"Invalid argument {max_entries=}. (expected a positive integer or None)"
+            raise ValueError(msg)
+
+        entries: "OrderedDict[Tuple[int, int, tuple], Tuple[Any, int]]" = OrderedDict()
+
+        super().__init__()
+        self.max_entries = max_entries
+        self.min_size = min_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = entries
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of checksums stored."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all checksums and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def is_cacheable(self, x: Any) -> bool:
+        """Returns True if type and size of an object allow to cache its checksum, without checking if it is hashable."""
+        x_type = type(x)
+        if x_type is bytes or x_type is tuple or x_type is frozenset:
+            return len(x) >= self.min_size
+        elif isinstance(x, PurePath):
+            return True
+        else:
+            params = getattr(x_type, "__dataclass_params__", None)
+            return params is not None and params.frozen
+
+    def get_or_compute(
+        self,
+        x: Any,
+        kwargs: Dict[str, Any],
+        compute_fn: Callable[..., int],
+    ) -> int:
+        """Returns the cached checksum of an object, or compute it with compute_fn and store it."""
+        # Checksum depends on accumulator and other arguments given to checksum functions
+        options = tuple(
+            (name, value)
+            for name, value in kwargs.items()
+            if name != "accumulator" and name != "checksum_cache"
+        )
+        key = (id(x), kwargs.get("accumulator", 0), options)
+
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is x:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+        except TypeError:
+            # Unhashable options
+            return compute_fn(x, **kwargs)
+
+        csum = compute_fn(x, **kwargs)
+        try:
+            hash(x)
+        except TypeError:
+            # Mutable content
+            return csum
+
+        with self._lock:
+            self._entries[key] = (x, csum)
+            self._entries.move_to_end(key)
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return csum
+
+
+class Checksummer:
+    """Incremental checksum of a sequence of objects.
+
+    The digest is equal to ``checksum_any(objs)``, where objs is the list of all objects given to ``update`` and ``extend``, so streams can be checksummed chunk by chunk without storing them.
+
+    Example
+    -------
+    >>> checksummer = Checksummer()
+    >>> checksummer.update(1)
+    >>> checksummer.extend(i for i in range(2, 4))
+    >>> checksummer.digest() == checksum_any([1, 2, 3])
+    ... True
+    """
+
+    def __init__(self, **kwargs) -> None:
+        r"""Initialize the instance.
+
+        Args:
+            \*\*kwargs: Keywords arguments passed to checksum functions of objects.
+        """
+        # Type name is added twice for lists, by checksum_list_tuple and by _checksum_iterable
+        accumulator = kwargs.pop("accumulator", 0) + 2 * _cached_checksum_str(
+            get_fullname([])
+        )
+
+        super().__init__()
+        self._accumulator = accumulator
+        self._kwargs = kwargs
+        self._csum = 0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        """Number of objects added."""
+        return self._count
+
+    def update(self, x: Any) -> None:
+        """Add an object to the checksum."""
+        self.extend((x,))
+
+    def extend(self, xs: Iterable[Any]) -> None:
+        """Add all objects of an iterable to the checksum. Generators are consumed."""
+        csum, count = _checksum_elements(
+            xs,
+            self._accumulator,
+            False,
+            self._kwargs,
+            self._count,
+        )
+        self._csum += csum
+        self._count = count
+
+    def digest(self) -> int:
+        """Returns the checksum of all objects added."""
+        return self._csum + self._accumulator
+
+
+def checksum_blake2b(
+    x: Any,
+    *,
+    digest_size: int = 16,
+    sort_dicts: bool = False,
+    **kwargs,
+) -> int:
+    r"""Compute a wide checksum integer value from an arbitrary object with BLAKE2b.
+
+    The object is encoded with ``write_canonical`` and streamed into the hasher, so collisions are much less likely than with ``checksum_any``, e.g. for cache keys.
+    Set elements are sorted by their encoding, so the result does not depend on hash randomization.
+
+    Example
+    -------
+    >>> checksum_blake2b([1, "a", {"b": 2.0}])  # 128-bit integer
+    >>> checksum_blake2b([1, "a", {"b": 2.0}], digest_size=8)  # 64-bit integer
+
+    Args:
+        x: Object to checksum.
+        digest_size: Size of the digest in bytes, between 1 and 64. defaults to 16.
+        sort_dicts: If True, dict items are sorted by the encoding of their keys, so the result does not depend on insertion order. defaults to False.
+        \*\*kwargs: Keywords arguments passed to ``checksum_any`` for objects without builtin encoding.
+    """
+    if not (1 <= digest_size <= hashlib.blake2b.MAX_DIGEST_SIZE):
+        msg = f"Invalid argument {digest_size=}. (expected an integer in [1, {hashlib.blake2b.MAX_DIGEST_SIZE}])"
+        raise ValueError(msg)
+
+    hasher = hashlib.blake2b(digest_size=digest_size)
+    write_canonical(x, hasher.update, sort_dicts=sort_dicts, **kwargs)
+    return int.from_bytes(hasher.digest(), "big")
+
+
+def encode_canonical(x: Any, *, sort_dicts: bool = False, **kwargs) -> bytes:
+    r"""Returns the canonical binary encoding of an object, used by ``checksum_blake2b``.
+
+    See ``write_canonical`` for the encoding format.
+
+    Args:
+        x: Object to encode.
+        sort_dicts: If True, dict items are sorted by the encoding of their keys. defaults to False.
+        \*\*kwargs: Keywords arguments passed to ``checksum_any`` for objects without builtin encoding.
+    """
+    parts = []
+    write_canonical(x, parts.append, sort_dicts=sort_dicts, **kwargs)
+    return b"".join(parts)
+
+
+def write_canonical(
+    x: Any,
+    write: Callable[[bytes], Any],
+    *,
+    sort_dicts: bool = False,
+    **kwargs,
+) -> None:
+    r"""Write the canonical binary encoding of an object by chunks, e.g. to a hasher or a file.
+
+    The encoding does not depend on hash randomization, interpreter version or platform (except for buffers with composite struct formats), so it can be used to compute keys shared by several processes or services.
+    Its version is stored in ``CANONICAL_ENCODING_VERSION``. All lengths are unsigned big-endian integers.
+
+    - None, True, False and Ellipsis: ``N``, ``T``, ``F`` and ``.``.
+    - int: ``i`` + length (4 bytes) + signed big-endian bytes.
+    - float: ``f`` + big-endian IEEE 754 double. All NaNs are encoded as the same value, -0.0 and 0.0 are distinct.
+    - complex: ``c`` + real float + imaginary float.
+    - str: ``s`` + length (8 bytes) + UTF-8 bytes (surrogates are allowed).
+    - bytes and bytearray: ``b`` or ``a`` + length (8 bytes) + bytes.
+    - memoryview, array.array and mmap.mmap: ``m`` + type name str + layout str ('format:shape') + length (8 bytes) + C-ordered content. Items of single-type formats (e.g. 'i' or 'd') are written in little-endian order, items of composite struct formats are written as is.
+    - list, tuple and dict: ``[``, ``(`` or ``{`` + elements + ``]``. Dict elements are keys and values alternatively, in insertion order or sorted by key encoding with ``sort_dicts``.
+    - set and frozenset: ``<`` or ``|`` + elements sorted by their encoding + ``]``.
+    - Objects with a known state (enums, dataclasses, namedtuples, dates, builtin subclasses, ranges, slices, paths, patterns, partials and methods): ``o`` + type name str + state encoding.
+    - Functions, types and typing objects: ``n`` + name str.
+    - Other objects: ``x`` + type name str + ``checksum_any`` value encoded as int.
+
+    Args:
+        x: Object to encode.
+        write: Function called with each chunk of the encoding.
+        sort_dicts: If True, dict items are sorted by the encoding of their keys. defaults to False.
+        \*\*kwargs: Keywords arguments passed to ``checksum_any`` for objects without builtin encoding.
+    """
+    _encode(x, write, kwargs, sort_dicts)
+
+
 # Terminate functions
 @register_checksum_fn(bool)
 def checksum_bool(x: bool, **kwargs) -> int:
@@ -159,6 +462,13 @@ def checksum_bytes(x: bytes, **kwargs) -> int:
     return _checksum_bytes_bytearray(x, **kwargs)
 
 
+@register_checksum_fn((memoryview, array.array, mmap.mmap))
+def checksum_buffer(x: Union[memoryview, array.array, mmap.mmap], **kwargs) -> int:
+    """Return a checksum for memoryview, array or mmap, computed on the underlying memory without copy."""
+    kwargs = _add_type_checksum_to_accumulator(x, kwargs)
+    return _checksum_buffer(x, **kwargs)
+
+
 @register_checksum_fn(complex)
 def checksum_complex(x: complex, **kwargs) -> int:
     """Return a checksum for complex."""
@@ -262,8 +572,8 @@ def checksum_set(x: Union[set, frozenset], **kwargs) -> int:
     """Return a checksum for set."""
     kwargs = _add_type_checksum_to_accumulator(x, kwargs)
     # Simply use sum here, order does not matter
-    csum = sum(checksum_any(xi, **kwargs) for xi in x)
-    return csum
+    accumulator = kwargs.pop("accumulator")
+    return _checksum_nested(x, accumulator, True, kwargs)
 
 
 @register_checksum_fn(range)
@@ -313,8 +623,31 @@ def checksum_pattern(x: re.Pattern, **kwargs) -> int:
 
 
 @register_checksum_fn(Path)
-def checksum_path(x: Path, *, resolve_path: bool = False, **kwargs) -> int:
-    """Return a checksum for path."""
+def checksum_path(
+    x: Path,
+    *,
+    resolve_path: bool = False,
+    path_mode: PathChecksumMode = "path",
+    path_index_fpath: Union[str, Path, None] = _DEFAULT_PATH_INDEX_FPATH,
+    **kwargs,
+) -> int:
+    r"""Return a checksum for path.
+
+    Args:
+        x: Path to checksum.
+        resolve_path: If True, resolve path before computing its checksum in 'path' mode. defaults to False.
+        path_mode: If 'path', checksum depends on the path string. If 'content', checksum depends only on the file content. defaults to 'path'.
+        path_index_fpath: SQLite file used in 'content' mode to store file digests, keyed by (device, inode, size, mtime_ns), so unchanged files are not read again. None means digests are only stored in memory. defaults to '~/.cache/pythonwrench/path_checksums.db'.
+        \*\*kwargs: Other keywords arguments passed to checksum functions.
+    """
+    if path_mode == "content":
+        kwargs = _add_type_checksum_to_accumulator(x, kwargs)
+        digest = _get_path_index(path_index_fpath).get_digest(x)
+        return _terminate_checksum(int.from_bytes(digest, "big"), "content", **kwargs)
+    elif path_mode != "path":
+        msg = f"Invalid argument {path_mode=}. (expected one of {get_args(PathChecksumMode)})"
+        raise ValueError(msg)
+
     kwargs["resolve_path"] = resolve_path
     kwargs = _add_type_checksum_to_accumulator(x, kwargs)
     if isinstance(resolve_path, bool) and resolve_path:
@@ -359,6 +692,13 @@ def checksum_special_form(x: Any, **kwargs) -> int:
     return checksum_str(name, **kwargs)
 
 
+@register_checksum_fn(custom_predicate=is_buffer, priority=-50)
+def checksum_buffer_like(x: Any, **kwargs) -> int:
+    """Return a checksum for other objects supporting the buffer protocol."""
+    kwargs = _add_type_checksum_to_accumulator(x, kwargs)
+    return _checksum_buffer(x, **kwargs)
+
+
 if _CHECKSUM_PROTOCOLS:
 
     @register_checksum_fn(Mapping, priority=-100)
@@ -375,7 +715,28 @@ if _CHECKSUM_PROTOCOLS:
 # Private functions
 def _checksum_bytes_bytearray(x: Union[bytes, bytearray], **kwargs) -> int:
     """Perform the checksum bytes bytearray operation."""
-    xint = zlib.crc32(x) % (1 << 32)
+    return _terminate_checksum(
+        _crc32(x, kwargs),
+        get_fullname(x),
+        **kwargs,
+    )
+
+
+def _checksum_buffer(x: Any, **kwargs) -> int:
+    """Returns checksum of the memory layout and content of a buffer-protocol object.
+
+    Content of C-contiguous buffers is read in place, other buffers are copied to bytes first.
+    """
+    with memoryview(x) as view:
+        kwargs["accumulator"] = kwargs.get("accumulator", 0) + _cached_checksum_str(
+            _get_buffer_layout(view)
+        )
+        if view.c_contiguous:
+            with view.cast("B") as flat:
+                xint = _crc32(flat, kwargs)
+        else:
+            xint = _crc32(view.tobytes(), kwargs)
+
     return _terminate_checksum(
         xint,
         get_fullname(x),
@@ -383,14 +744,669 @@ def _checksum_bytes_bytearray(x: Union[bytes, bytearray], **kwargs) -> int:
     )
 
 
+def _crc32(x: Union[bytes, bytearray, memoryview], kwargs: Dict[str, Any]) -> int:
+    """Returns the CRC32 of a byte buffer, computed in parallel when parallel options are given and the buffer is large."""
+    options: Optional[_ParallelOptions] = kwargs.get("checksum_parallel_options")
+    if options is not None and len(x) >= 2 * options.chunk_size:
+        return _parallel_crc32(x, options)
+    else:
+        return zlib.crc32(x) % (1 << 32)
+
+
+def _get_buffer_layout(view: memoryview) -> str:
+    """Returns a string describing item format and shape of a buffer."""
+    return f"{view.format}:{view.shape}"
+
+
 def _checksum_iterable(x: Iterable, **kwargs) -> int:
     """Perform the checksum iterable operation."""
     accumulator = kwargs.pop("accumulator", 0) + _cached_checksum_str(get_fullname(x))
-    csum = sum(
-        checksum_any(xi, accumulator=accumulator + (i + 1), **kwargs) * (i + 1)
-        for i, xi in enumerate(x)
-    )
-    return csum + accumulator
+    return _checksum_nested(x, accumulator, False, kwargs)
+
+
+def _checksum_nested(
+    x: Iterable,
+    accumulator: int,
+    unordered: bool,
+    kwargs: Dict[str, Any],
+) -> int:
+    """Compute checksum of an iterable with an explicit stack instead of recursive calls.
+
+    Gives the same result than calling checksum_any on each element, but nested lists, tuples, dicts and sets are traversed in the same loop, so deep structures do not reach the recursion limit.
+    Ordered elements are weighted by their position, unordered elements are summed.
+    """
+    csum, _ = _checksum_elements(x, accumulator, unordered, kwargs)
+    if not unordered:
+        csum += accumulator
+    return csum
+
+
+def _checksum_elements(
+    x: Iterable,
+    accumulator: int,
+    unordered: bool,
+    kwargs: Dict[str, Any],
+    start: int = 0,
+) -> Tuple[int, int]:
+    """Returns the sum of weighted checksums of elements, without the final accumulator, and the index of the last element.
+
+    Elements positions start after start index, which allows to continue the checksum of a sequence given by chunks.
+    """
+    if not unordered and isinstance(x, (list, tuple)):
+        options: Optional[_ParallelOptions] = kwargs.get("checksum_parallel_options")
+        if options is not None and len(x) >= 2 * options.chunk_len:
+            return _parallel_checksum_elements(x, accumulator, kwargs, start, options)
+
+        csum = _checksum_homogeneous(x, accumulator, kwargs, start)
+        if csum is not None:
+            return csum, start + len(x)
+
+    cache = _get_checksum_cache(kwargs)
+    # Functions resolved for each element type, None means generic dispatch
+    fns: Dict[type, Optional[Callable]] = {}
+    # Parent frames: (iterator, accumulator, unordered, index, partial checksum, weight in parent)
+    stack: List[Tuple[Iterator, int, bool, int, int, int]] = []
+    it = iter(x)
+    index = start
+    csum = 0
+
+    while True:
+        for xi in it:
+            index += 1
+            if unordered:
+                weight = 1
+                xi_accumulator = accumulator
+            else:
+                weight = index
+                xi_accumulator = accumulator + index
+
+            if cache is not None and cache.is_cacheable(xi):
+                xi_csum = checksum_any(xi, accumulator=xi_accumulator, **kwargs)
+                csum += xi_csum * weight
+                continue
+
+            xi_type = type(xi)
+            if xi_type in fns:
+                fn = fns[xi_type]
+            else:
+                fn = _resolve_checksum_fn(xi_type, kwargs)
+                fns[xi_type] = fn
+
+            if fn is checksum_list_tuple:
+                # Type name is added by checksum_list_tuple and by _checksum_iterable
+                xi_accumulator += 2 * _checksum_type_name(xi)
+                xi_csum = _checksum_homogeneous(xi, xi_accumulator, kwargs)
+                if xi_csum is not None:
+                    csum += (xi_csum + xi_accumulator) * weight
+                    continue
+                xi_it = iter(xi)
+                xi_unordered = False
+
+            elif fn is checksum_dict:
+                items = xi.items()
+                xi_accumulator += _checksum_type_name(xi) + _checksum_type_name(items)
+                xi_it = iter(items)
+                xi_unordered = False
+
+            elif fn is checksum_set:
+                xi_accumulator += _checksum_type_name(xi)
+                xi_it = iter(xi)
+                xi_unordered = True
+
+            else:
+                if fn is None:
+                    xi_csum = checksum_any(xi, accumulator=xi_accumulator, **kwargs)
+                else:
+                    xi_csum = fn(xi, accumulator=xi_accumulator, **kwargs)
+                csum += xi_csum * weight
+                continue
+
+            stack.append((it, accumulator, unordered, index, csum, weight))
+            it = xi_it
+            accumulator = xi_accumulator
+            unordered = xi_unordered
+            index = 0
+            csum = 0
+            break
+
+        else:
+            # Current iterator is exhausted
+            if len(stack) == 0:
+                return csum, index
+
+            child_csum = csum if unordered else csum + accumulator
+            it, accumulator, unordered, index, csum, weight = stack.pop()
+            csum += child_csum * weight
+
+
+def _parallel_checksum_elements(
+    x: Union[list, tuple],
+    accumulator: int,
+    kwargs: Dict[str, Any],
+    start: int,
+    options: "_ParallelOptions",
+) -> Tuple[int, int]:
+    """Returns the same result than _checksum_elements for an ordered sequence, by computing chunks of elements in parallel."""
+    # Workers must not wait for other tasks of the same executor
+    chunk_kwargs = {
+        name: value
+        for name, value in kwargs.items()
+        if name != "checksum_parallel_options"
+    }
+    futures = [
+        options.executor.submit(
+            _checksum_elements,
+            x[i : i + options.chunk_len],
+            accumulator,
+            False,
+            chunk_kwargs,
+            start + i,
+        )
+        for i in range(0, len(x), options.chunk_len)
+    ]
+    csum = sum(future.result()[0] for future in futures)
+    return csum, start + len(x)
+
+
+def _parallel_crc32(
+    x: Union[bytes, bytearray, memoryview], options: "_ParallelOptions"
+) -> int:
+    """Returns the CRC32 of a buffer, computed by chunks in parallel and combined."""
+    view = memoryview(x)
+    chunk_size = options.chunk_size
+    chunks = [view[i : i + chunk_size] for i in range(0, len(view), chunk_size)]
+    crcs = list(options.executor.map(zlib.crc32, chunks))
+
+    crc = crcs[0]
+    shift = _get_crc32_shift_operator(chunk_size)
+    for chunk, chunk_crc in zip(chunks[1:], crcs[1:]):
+        if len(chunk) != chunk_size:
+            shift = _get_crc32_shift_operator(len(chunk))
+        crc = _gf2_matrix_times(shift, crc) ^ chunk_crc
+    return crc % (1 << 32)
+
+
+@lru_cache(maxsize=16)
+def _get_crc32_shift_operator(nbytes: int) -> Tuple[int, ...]:
+    """Returns the GF(2) operator that gives CRC32(A + B) from CRC32(A) when xored with CRC32(B), for B of nbytes bytes.
+
+    Computed by squaring the operator for one zero bit, like crc32_combine in zlib.
+    """
+    # Operator for one zero bit, with reversed CRC32 polynomial
+    operator = [0xEDB88320] + [1 << n for n in range(31)]
+    result = [1 << n for n in range(32)]
+    nbits = nbytes * 8
+    while nbits > 0:
+        if nbits & 1:
+            result = [_gf2_matrix_times(operator, row) for row in result]
+        operator = [_gf2_matrix_times(operator, row) for row in operator]
+        nbits >>= 1
+    return tuple(result)
+
+
+def _gf2_matrix_times(matrix: Sequence[int], vector: int) -> int:
+    """Multiply a 32x32 GF(2) matrix stored as columns by a 32-bit vector."""
+    result = 0
+    i = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[i]
+        vector >>= 1
+        i += 1
+    return result
+
+
+def _checksum_homogeneous(
+    x: Union[list, tuple],
+    accumulator: int,
+    kwargs: Dict[str, Any],
+    start: int = 0,
+) -> Optional[int]:
+    """Returns weighted sum of element checksums of a non-empty list or tuple containing only ints, floats or only strings, or None if it is not the case."""
+    if len(x) == 0:
+        return None
+    x_type = type(x[0])
+    if x_type not in (int, float, str) or not all(type(xi) is x_type for xi in x):
+        return None
+
+    fn = _resolve_checksum_fn(x_type, kwargs)
+    if fn is checksum_int:
+        # checksum_int(xi, accumulator=accumulator + i) * i
+        base = accumulator + _cached_checksum_str(get_fullname(x[0]))
+        return sum((xi + base + i) * i for i, xi in enumerate(x, start + 1))
+    elif fn is checksum_float:
+        base = accumulator + _cached_checksum_str(get_fullname(x[0]))
+        return sum(
+            (__interpret_float_as_int(xi) + base + i) * i
+            for i, xi in enumerate(x, start + 1)
+        )
+    elif fn is checksum_str:
+        # checksum_str adds type name before calling checksum_bytes
+        base = (
+            accumulator
+            + _cached_checksum_str(get_fullname(x[0]))
+            + _cached_checksum_str(get_fullname(b""))
+        )
+        return sum(
+            (zlib.crc32(xi.encode()) % (1 << 32) + base + i) * i
+            for i, xi in enumerate(x, start + 1)
+        )
+    else:
+        return None
+
+
+def _encode(
+    x: Any,
+    write: Callable[[bytes], Any],
+    kwargs: Dict[str, Any],
+    sort_dicts: bool = False,
+) -> None:
+    """Write tagged binary encoding of an object by chunks, using an explicit stack for nested containers.
+
+    Scalars are written as tag + fixed size or length-prefixed payload, containers as start tag + elements + end tag, and other objects as object tag + type name + encoding of their state.
+    Elements of sets and sorted dicts are encoded in separate buffers, then sorted by their encoding when the container ends.
+    """
+    parts: List[bytes] = []
+    # Output buffers of elements encoded separately, the first one is written by chunks
+    buffers: List[List[bytes]] = [parts]
+    # Encodings of elements of each set or sorted dict being encoded
+    collected: List[List[bytes]] = []
+    stack: List[Tuple[Iterator, int]] = [(iter((x,)), _FRAME_ROOT)]
+
+    while len(stack) > 0:
+        it, kind = stack[-1]
+        out = buffers[-1]
+        for xi in it:
+            if kind == _FRAME_SET or kind == _FRAME_SORTED_DICT:
+                buffers.append([])
+                stack.append((iter((xi,)), _FRAME_ELEMENT))
+                break
+
+            xi_type = type(xi)
+            encoder = _SCALAR_ENCODERS.get(xi_type)
+            if encoder is not None:
+                out.append(encoder(xi))
+
+            elif xi_type is list or xi_type is tuple:
+                out.append(_LIST_TAG if xi_type is list else _TUPLE_TAG)
+                stack.append((iter(xi), _FRAME_CONTAINER))
+                break
+
+            elif xi_type is dict:
+                out.append(_DICT_TAG)
+                if sort_dicts:
+                    collected.append([])
+                    stack.append((_iter_items(xi), _FRAME_SORTED_DICT))
+                else:
+                    stack.append((_iter_items(xi), _FRAME_CONTAINER))
+                break
+
+            elif xi_type in _BUFFER_TYPES:
+                view = memoryview(xi)
+                flat = view.cast("B") if view.c_contiguous else view.tobytes()
+                flat = _to_little_endian(view, flat)
+                header = (
+                    _BUFFER_TAG
+                    + _encode_str(get_fullname(xi_type))
+                    + _encode_str(_get_buffer_layout(view))
+                    + len(flat).to_bytes(8, "big")
+                )
+                if len(buffers) > 1:
+                    out.append(header)
+                    out.append(bytes(flat))
+                else:
+                    # Write buffer content directly, without copying it into parts
+                    if len(parts) > 0:
+                        write(b"".join(parts))
+                        parts.clear()
+                    write(header)
+                    write(flat)
+
+            elif xi_type is set or xi_type is frozenset:
+                # Elements are sorted by their encoding, set iteration order depends on hash seed
+                out.append(_SET_TAG if xi_type is set else _FROZENSET_TAG)
+                collected.append([])
+                stack.append((iter(xi), _FRAME_SET))
+                break
+
+            else:
+                tag, name, state = _get_object_state(xi, kwargs)
+                out.append(tag + _encode_str(name))
+                if state is not _NO_STATE:
+                    stack.append((iter((state,)), _FRAME_CONTAINER))
+                    break
+
+            if len(buffers) == 1 and len(parts) >= _ENCODE_FLUSH_SIZE:
+                write(b"".join(parts))
+                parts.clear()
+
+        else:
+            stack.pop()
+            if kind == _FRAME_CONTAINER:
+                out.append(_END_TAG)
+
+            elif kind == _FRAME_ELEMENT:
+                buffers.pop()
+                collected[-1].append(b"".join(out))
+
+            elif kind == _FRAME_SET:
+                out.extend(sorted(collected.pop()))
+                out.append(_END_TAG)
+
+            elif kind == _FRAME_SORTED_DICT:
+                encoded = collected.pop()
+                # Sort items by key encoding, values are not compared since distinct keys can have the same encoding
+                items = sorted(
+                    zip(encoded[::2], encoded[1::2]), key=lambda item: item[0]
+                )
+                for encoded_key, encoded_value in items:
+                    out.append(encoded_key)
+                    out.append(encoded_value)
+                out.append(_END_TAG)
+
+    if len(parts) > 0:
+        write(b"".join(parts))
+
+
+def _to_little_endian(view: memoryview, flat: Any) -> Any:
+    """Returns buffer content with items of a single multi-byte format in little-endian order, or unchanged content for other formats."""
+    fmt = view.format
+    if fmt[:1] in ("@", "=", "<", ">", "!"):
+        order, code = fmt[0], fmt[1:]
+    else:
+        order, code = "@", fmt
+
+    itemsize = view.itemsize
+    if itemsize <= 1 or len(code) != 1:
+        return flat
+    if order == "<" or (order in ("@", "=") and sys.byteorder == "little"):
+        return flat
+
+    swapped = bytearray(len(flat))
+    for i in range(itemsize):
+        swapped[i::itemsize] = flat[itemsize - 1 - i :: itemsize]
+    return swapped
+
+
+def _iter_items(x: Mapping) -> Iterator:
+    """Iterate over keys and values of a mapping, alternatively."""
+    for key, value in x.items():
+        yield key
+        yield value
+
+
+def _get_object_state(x: Any, kwargs: Dict[str, Any]) -> Tuple[bytes, str, Any]:
+    """Returns (tag, name, state) used to encode a non-builtin object."""
+    if isinstance(x, Enum):
+        return _OBJECT_TAG, get_fullname(type(x)), (x.name, x.value)
+    elif isinstance(x, DataclassInstance) and not isinstance(x, type):
+        state = {field.name: getattr(x, field.name) for field in fields(x)}
+        return _OBJECT_TAG, get_fullname(type(x)), state
+    elif isinstance(x, NamedTupleInstance) and isinstance(x, tuple):
+        return _OBJECT_TAG, get_fullname(type(x)), dict(x._asdict())
+    elif isinstance(x, (datetime, date)):
+        return _OBJECT_TAG, get_fullname(type(x)), x.isoformat()
+    elif isinstance(x, tuple(_BUILTIN_BASES.keys())):
+        # Subclasses of builtin types
+        return _OBJECT_TAG, get_fullname(type(x)), _BUILTIN_BASES[_get_base(x)](x)
+    elif isinstance(x, range):
+        return _OBJECT_TAG, "builtins.range", (x.start, x.stop, x.step)
+    elif isinstance(x, slice):
+        return _OBJECT_TAG, "builtins.slice", (x.start, x.stop, x.step)
+    elif isinstance(x, Path) and kwargs.get("path_mode") == "content":
+        index = _get_path_index(
+            kwargs.get("path_index_fpath", _DEFAULT_PATH_INDEX_FPATH)
+        )
+        return _OBJECT_TAG, "pathlib.Path:content", index.get_digest(x)
+    elif isinstance(x, PurePath):
+        return _OBJECT_TAG, "pathlib.PurePath", x.as_posix()
+    elif isinstance(x, re.Pattern):
+        return _OBJECT_TAG, "re.Pattern", (x.pattern, x.flags)
+    elif isinstance(x, functools.partial):
+        return _OBJECT_TAG, "functools.partial", (x.func, x.args, x.keywords)
+    elif isinstance(x, MethodType):
+        return _OBJECT_TAG, get_fullname(x), x.__self__
+    elif isinstance(x, (FunctionType, BuiltinFunctionType, type)):
+        return _NAME_TAG, get_fullname(x), _NO_STATE
+    elif is_special_form(x) or is_collection_alias(x) or is_parameterized(x):
+        return _NAME_TAG, repr(x), _NO_STATE
+    else:
+        # Types only supported by a registered checksum function
+        return _CHECKSUM_TAG, get_fullname(type(x)), checksum_any(x, **kwargs)
+
+
+def _get_base(x: Any) -> type:
+    """Returns the builtin base class of an object."""
+    for base in _BUILTIN_BASES.keys():
+        if isinstance(x, base):
+            return base
+    msg = f"Invalid argument {type(x)=}. (expected a subclass of one of {tuple(_BUILTIN_BASES.keys())})"
+    raise TypeError(msg)
+
+
+def _encode_int(x: int) -> bytes:
+    """Returns tagged encoding of an integer, as length-prefixed signed big-endian bytes."""
+    nbytes = x.bit_length() // 8 + 1
+    return _INT_TAG + nbytes.to_bytes(4, "big") + x.to_bytes(nbytes, "big", signed=True)
+
+
+def _encode_float(x: float) -> bytes:
+    """Returns tagged encoding of a float, as big-endian IEEE 754 double with a single NaN value."""
+    if x != x:
+        return _FLOAT_TAG + _NAN_BYTES
+    return _FLOAT_TAG + struct.pack(">d", x)
+
+
+def _encode_complex(x: complex) -> bytes:
+    """Returns tagged encoding of a complex number, as its real and imaginary parts."""
+    return _COMPLEX_TAG + _encode_float(x.real) + _encode_float(x.imag)
+
+
+def _encode_str(x: str) -> bytes:
+    """Returns tagged encoding of a string, as length-prefixed UTF-8 bytes."""
+    data = x.encode("utf-8", "surrogatepass")
+    return _STR_TAG + len(data).to_bytes(8, "big") + data
+
+
+def _encode_bytes(x: Union[bytes, bytearray]) -> bytes:
+    """Returns tagged encoding of a bytes or bytearray object, as length-prefixed bytes."""
+    tag = _BYTES_TAG if type(x) is bytes else _BYTEARRAY_TAG
+    return tag + len(x).to_bytes(8, "big") + bytes(x)
+
+
+class _PathContentIndex:
+    """Digests of file contents, stored in memory and optionally in a SQLite file, keyed by absolute path and validated by (device, inode, size, mtime_ns)."""
+
+    def __init__(self, fpath: Optional[Path]) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.fpath = fpath
+        self._memo: Dict[str, Tuple[str, bytes]] = {}
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def get_digest(self, path: Path) -> bytes:
+        """Returns the BLAKE2b digest of a file content, read only if file changed since its last digest."""
+        key = os.fspath(path.expanduser().absolute())
+        stat = os.stat(key)
+        stat_key = f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is None and self.fpath is not None:
+                entry = self._load(key)
+        if entry is not None and entry[0] == stat_key:
+            return entry[1]
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hash_file(key, hasher, _PATH_CONTENT_CHUNK_SIZE)
+        digest = hasher.digest()
+
+        # Files modified in the same mtime tick than the end of hashing could keep their stat key, so their digest is not stored
+        if time.time_ns() - stat.st_mtime_ns >= _PATH_CONTENT_MIN_AGE_NS:
+            with self._lock:
+                self._memo[key] = (stat_key, digest)
+                if self.fpath is not None:
+                    self._dump(key, stat_key, digest)
+        return digest
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns the connection to the index file, created on first use."""
+        if self._connection is None:
+            self.fpath.parent.mkdir(parents=True, exist_ok=True)  # type: ignore
+            connection = sqlite3.connect(str(self.fpath), check_same_thread=False)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS digests (path TEXT PRIMARY KEY, stat_key TEXT, digest BLOB)"
+                )
+            self._connection = connection
+        return self._connection
+
+    def _load(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Load (stat key, digest) of a file from index file."""
+        row = (
+            self._connect()
+            .execute("SELECT stat_key, digest FROM digests WHERE path = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return row[0], bytes(row[1])
+
+    def _dump(self, key: str, stat_key: str, digest: bytes) -> None:
+        """Store (stat key, digest) of a file in index file."""
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO digests (path, stat_key, digest) VALUES (?, ?, ?)",
+                (key, stat_key, digest),
+            )
+
+
+def _get_path_index(fpath: Union[str, Path, None]) -> _PathContentIndex:
+    """Returns the content index stored in fpath, shared by all calls in the current process."""
+    if fpath is not None:
+        fpath = Path(fpath).expanduser()
+    key = str(fpath)
+
+    with _PATH_INDEXES_LOCK:
+        index = _PATH_INDEXES.get(key)
+        if index is None:
+            index = _PathContentIndex(fpath)
+            _PATH_INDEXES[key] = index
+    return index
+
+
+def _get_checksum_cache(kwargs: Dict[str, Any]) -> Optional[ChecksumCache]:
+    """Returns the checksum cache given in kwargs, or None if checksums can depend on mutable files."""
+    if kwargs.get("path_mode") == "content":
+        return None
+    return kwargs.get("checksum_cache")
+
+
+class _ParallelOptions(NamedTuple):
+    executor: Executor
+    chunk_size: int
+    chunk_len: int
+
+
+_NONE_TAG = b"N"
+_TRUE_TAG = b"T"
+_FALSE_TAG = b"F"
+_ELLIPSIS_TAG = b"."
+_INT_TAG = b"i"
+_FLOAT_TAG = b"f"
+_COMPLEX_TAG = b"c"
+_STR_TAG = b"s"
+_BYTES_TAG = b"b"
+_BYTEARRAY_TAG = b"a"
+_BUFFER_TAG = b"m"
+_LIST_TAG = b"["
+_TUPLE_TAG = b"("
+_DICT_TAG = b"{"
+_SET_TAG = b"<"
+_FROZENSET_TAG = b"|"
+_END_TAG = b"]"
+_OBJECT_TAG = b"o"
+_NAME_TAG = b"n"
+_CHECKSUM_TAG = b"x"
+_NAN_BYTES = struct.pack(">d", math.nan)
+_NO_STATE = object()
+_ENCODE_FLUSH_SIZE = 4096
+# Kinds of stack frames used by canonical encoding
+_FRAME_ROOT = 0
+_FRAME_CONTAINER = 1
+_FRAME_ELEMENT = 2
+_FRAME_SET = 3
+_FRAME_SORTED_DICT = 4
+_PATH_CONTENT_CHUNK_SIZE = 1024**2
+_PATH_CONTENT_MIN_AGE_NS = 2 * 10**9
+_PATH_INDEXES: Dict[str, _PathContentIndex] = {}
+_PATH_INDEXES_LOCK = threading.Lock()
+
+_SCALAR_ENCODERS: Dict[type, Callable[[Any], bytes]] = {
+    NoneType: lambda x: _NONE_TAG,
+    EllipsisType: lambda x: _ELLIPSIS_TAG,
+    bool: lambda x: _TRUE_TAG if x else _FALSE_TAG,
+    int: _encode_int,
+    float: _encode_float,
+    complex: _encode_complex,
+    str: _encode_str,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+}
+_BUFFER_TYPES = (memoryview, array.array, mmap.mmap)
+_BUILTIN_BASES: Dict[type, Callable[[Any], Any]] = {
+    dict: dict,
+    list: list,
+    tuple: tuple,
+    set: set,
+    frozenset: frozenset,
+    int: int,
+    float: float,
+    complex: complex,
+    str: str,
+    bytes: bytes,
+    bytearray: bytearray,
+}
+
+
+def _checksum_type_name(x: Any) -> int:
+    """Returns checksum of the fullname of an object, cached for builtin types instances."""
+    x_type = type(x)
+    csum = _BUILTIN_NAME_CHECKSUMS.get(x_type)
+    if csum is None:
+        csum = _cached_checksum_str(get_fullname(x))
+        if x_type in _BUILTIN_TYPES or x_type in _BUILTIN_VIEW_TYPES:
+            _BUILTIN_NAME_CHECKSUMS[x_type] = csum
+    return csum
+
+
+def _resolve_checksum_fn(
+    x_type: type,
+    kwargs: Dict[str, Any],
+) -> Optional[Callable]:
+    """Returns the registered function that checksum_any would call for all values of a builtin type, or None if it depends on values."""
+    if "isinstance_fn" in kwargs or x_type not in _BUILTIN_TYPES:
+        return None
+
+    for fn, custom_predicate, class_or_tuple in _CHECKSUM_REGISTRY.get_candidates(
+        x_type
+    ):
+        if custom_predicate is not None:
+            # Builtin predicates only match typing objects
+            if custom_predicate not in _TYPING_PREDICATES:
+                return None
+        elif class_or_tuple is not None:
+            # Builtin types do not override __class__, so instance checks only depend on their type
+            try:
+                if issubclass(x_type, class_or_tuple):  # type: ignore
+                    return fn
+            except TypeError:
+                return None
+        else:
+            return fn
+    return None
 
 
 def _checksum_mapping(x: Mapping, **kwargs) -> int:
@@ -414,6 +1430,26 @@ def _add_type_checksum_to_accumulator(x: Any, kwargs: Dict[str, Any]) -> Dict[st
     return kwargs
 
 
+_BUILTIN_TYPES = (
+    bool,
+    bytearray,
+    bytes,
+    complex,
+    dict,
+    float,
+    frozenset,
+    int,
+    list,
+    NoneType,
+    set,
+    str,
+    tuple,
+)
+_BUILTIN_VIEW_TYPES = (type({}.items()),)
+_BUILTIN_NAME_CHECKSUMS: Dict[type, int] = {}
+_TYPING_PREDICATES = (is_collection_alias, is_parameterized, is_special_form)
+
+
 @lru_cache(maxsize=None)
 def _cached_checksum_str(x: str) -> int:
     """Perform the cached checksum str operation."""
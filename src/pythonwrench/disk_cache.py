@@ -1,20 +1,41 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import atexit
+import bz2
+import gzip
+import inspect
+import json
 import logging
+import lzma
 import os
 import shutil
+import sqlite3
+import tempfile
+import threading
 import time
+import uuid
 import warnings
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from functools import wraps
 from pathlib import Path
+from stat import S_ISREG
 from typing import (
     Any,
     Callable,
+    ContextManager,
     Dict,
     Iterable,
+    List,
     Literal,
+    Mapping,
+    NamedTuple,
     Optional,
+    Protocol,
     Tuple,
     TypedDict,
     TypeVar,
@@ -25,6 +46,16 @@ from typing import (
 
 from typing_extensions import ParamSpec
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt  # type: ignore
+except ImportError:
+    msvcrt = None
+
 from pythonwrench.checksum import checksum_any
 from pythonwrench.datetime import get_now
 from pythonwrench.inspect import get_argnames, get_fullname
@@ -37,10 +68,34 @@ U = TypeVar("U")
 ChecksumFn = Callable[[Tuple[Callable[P, T], Tuple, Dict[str, Any]]], int]
 SavingBackend = Literal["csv", "json", "pickle"]
 StoreMode = Literal["outputs_only", "outputs_metadata", "outputs_metadata_inputs"]
+EvictionPolicy = Literal["lru", "lfu"]
+StorageBackend = Literal["files", "sqlite"]
+ArgKeyMode = Literal["size", "sample"]
+MapExecutor = Literal["thread", "process"]
 
 _DEFAULT_CACHE_STORE_MODE: StoreMode = "outputs_only"
 
 
+class _CacheEntryInfo(TypedDict):
+    fpath: Path
+    nbytes: int
+    mtime: float
+    hits: int
+    last_access: float
+    storage: "_CacheStorage"
+
+
+class CacheInfo(TypedDict):
+    fn_name: str
+    cache_fn_dpath: Path
+    num_entries: int
+    nbytes: int
+    hits: int
+    oldest_mtime: Optional[float]
+    newest_mtime: Optional[float]
+    last_access: Optional[float]
+
+
 class _CacheMeta(TypedDict):
     datetime: str
     duration: float
@@ -51,6 +106,23 @@ class _CacheMeta(TypedDict):
 
 
 _DEFAULT_CACHE_DPATH = Path.home().joinpath(".cache", "disk_cache")
+_MEMORY_CACHES: Dict[str, "_MemoryCache"] = {}
+_ACCESS_LOGS: Dict[str, "_AccessLog"] = {}
+_CACHE_STATS: Dict[str, "DiskCacheStats"] = {}
+_ACCESS_FNAME = ".disk_cache_access.json"
+_SQLITE_FNAME = ".disk_cache.sqlite"
+# Max number of parameters in a single SQLite query, supported by all SQLite versions
+_SQLITE_MAX_VARIABLES = 999
+_DEFAULT_MAP_BATCH_SIZE = 256
+# Max number of elements used by 'sample' argument key mode
+_NUM_KEY_SAMPLES = 16
+# Fraction of budget freed by automatic pruning when budget is exceeded
+_AUTO_PRUNE_SLACK = 0.1
+# Number of lock files shared by cache entries of a SQLite storage
+_SQLITE_LOCK_STRIPES = 64
+# Min and max delays in seconds between two attempts to acquire a lock file with msvcrt or in coroutines
+_LOCK_MIN_DELAY = 0.001
+_LOCK_MAX_DELAY = 0.1
 
 
 logger = logging.getLogger(__name__)
@@ -73,6 +145,20 @@ def disk_cache_decorator(
     cache_load_fn: Callable[[Path], Any],
     cache_enable: bool = True,
     cache_store_mode: StoreMode,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """Perform the disk cache decorator operation."""
     ...
@@ -95,6 +181,20 @@ def disk_cache_decorator(
     cache_load_fn: None = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """Perform the disk cache decorator operation."""
     ...
@@ -117,6 +217,20 @@ def disk_cache_decorator(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """Perform the disk cache decorator operation."""
     ...
@@ -139,6 +253,20 @@ def disk_cache_decorator(
     cache_load_fn: Callable[[Path], Any],
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[P, T]:
     """Perform the disk cache decorator operation."""
     ...
@@ -161,6 +289,20 @@ def disk_cache_decorator(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[P, T]:
     """Perform the disk cache decorator operation."""
     ...
@@ -182,11 +324,27 @@ def disk_cache_decorator(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable:
     """Decorator to store function output in a cache file.
 
     Cache file is identified by the checksum of the function arguments, and stored by default in `"~/.cache/disk_cache/<Function_name>/"` directory.
 
+    Coroutine functions are supported: their results are awaited before being stored, cache files are loaded and dumped in the default executor, and concurrent calls with the same arguments in one event loop share a single computation.
+
     Example
     -------
     >>> import pythonwrench as pw
@@ -202,13 +360,26 @@ def disk_cache_decorator(
         cache_dpath: Cache directory path. defaults to `"~/.cache/disk_cache"`.
         cache_force: Force function call and overwrite cache. defaults to False.
         cache_verbose: Set verbose logging level. Higher means more verbose. defaults to 0.
-        cache_checksum_fn: Checksum function to identify input arguments. defaults to ``pythonwrench.checksum_any``.
+        cache_checksum_fn: Checksum function to identify input arguments. ``pythonwrench.checksum_blake2b`` can be used to get wider keys with less collisions. defaults to ``pythonwrench.checksum_any``.
         cache_saving_backend: Optional saving backend. Can be one of ('csv', 'json', 'pickle', 'custom', 'auto'). defaults to 'auto'.
         cache_fname_fmt: Cache filename format. defaults to "{fn_name}_{checksum_hex}{suffix}".
+        cache_fname_fmt_args: Names of fields used by cache_fname_fmt. When none of ('checksum', 'checksum_hex', 'csum') is given, checksum of arguments is not computed at all. None means all fields are available. defaults to None.
         cache_dump_fn: Dump/save function to store outputs and overwrite saving backend. defaults to None.
         cache_load_fn: Load function to store outputs and overwrite saving backend. defaults to None.
         cache_enable: Enable disk cache. If False, the function has no effect. defaults to True.
         cache_store_mode: Disk cache storage mode. By default, it store function output and saved date into the cache file. defaults to 'outputs_metadata'.
+        cache_memory_max_entries: Max number of outputs kept in an in-memory LRU cache in front of the disk cache. 0 disables memory cache, None means unbounded. Outputs returned from memory are not copied. defaults to 0.
+        cache_memory_max_bytes: Approximate max size in bytes of the in-memory cache, estimated from cache file sizes. None means unbounded. defaults to None.
+        cache_lock: If True, acquire a lock file per cache entry, so only one process computes a missing output while others wait and then load it. With 'sqlite' storage, entries share a fixed set of lock files. defaults to False.
+        cache_max_bytes: Max total size in bytes of the function cache directory. Oldest entries are evicted according to cache_eviction_policy when exceeded. None means unbounded. defaults to None.
+        cache_max_entries: Max number of entries in the function cache directory. Budgets are enforced after each cache write. None means unbounded. defaults to None.
+        cache_max_age: Max age in seconds of cache entries. Expired entries are recomputed when accessed and evicted when cache is pruned. None means no expiration. defaults to None.
+        cache_eviction_policy: Order used to evict entries when cache_max_bytes or cache_max_entries is exceeded. Can be one of ('lru', 'lfu'). defaults to 'lru'.
+        cache_storage: Storage used for cache entries. Can be one of ('files', 'sqlite'). 'files' stores one file per entry in the function cache directory, 'sqlite' stores all entries of a function in a single indexed SQLite database file. defaults to 'files'.
+        cache_compression: Compression codec applied to cache entries. Can be one of ('zlib', 'gzip', 'bz2', 'lzma') or a name registered with register_cache_codec. The codec suffix is appended to cache filenames. None disables compression. defaults to None.
+        cache_compression_level: Compression level passed to codec. None means codec default level. defaults to None.
+        cache_ignore_args: Names of arguments ignored when computing the cache checksum. None means no argument is ignored. defaults to None.
+        cache_key_fns: Functions applied to arguments by name before computing the cache checksum, to avoid hashing large inputs. Values can also be 'size' to use only type and length of an argument, or 'sample' to use type, length and a few evenly spaced elements. Both modes are much faster for large sequences but can collide when contents change with the same length. None means all arguments are fully checksummed. defaults to None.
     """
     impl_fn = _disk_cache_impl(
         cache_dpath=cache_dpath,
@@ -222,6 +393,18 @@ def disk_cache_decorator(
         cache_load_fn=cache_load_fn,
         cache_enable=cache_enable,
         cache_store_mode=cache_store_mode,
+        cache_memory_max_entries=cache_memory_max_entries,
+        cache_memory_max_bytes=cache_memory_max_bytes,
+        cache_lock=cache_lock,
+        cache_max_bytes=cache_max_bytes,
+        cache_max_entries=cache_max_entries,
+        cache_max_age=cache_max_age,
+        cache_eviction_policy=cache_eviction_policy,
+        cache_storage=cache_storage,
+        cache_compression=cache_compression,
+        cache_compression_level=cache_compression_level,
+        cache_ignore_args=cache_ignore_args,
+        cache_key_fns=cache_key_fns,
     )
     if fn is not None:
         return impl_fn(fn)
@@ -246,6 +429,20 @@ def disk_cache_call(
     cache_load_fn: Callable[[Path], Any],
     cache_enable: bool = True,
     cache_store_mode: StoreMode,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
     **kwargs,
 ) -> T:
     """Perform the disk cache call operation."""
@@ -269,6 +466,20 @@ def disk_cache_call(
     cache_load_fn: None = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
     **kwargs,
 ) -> T:
     """Perform the disk cache call operation."""
@@ -292,6 +503,20 @@ def disk_cache_call(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
     **kwargs,
 ) -> T:
     """Perform the disk cache call operation."""
@@ -314,6 +539,20 @@ def disk_cache_call(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
     **kwargs,
 ) -> T:
     r"""Call function and store output in a cache file.
@@ -334,13 +573,26 @@ def disk_cache_call(
         cache_dpath: Cache directory path. defaults to '~/.cache/disk_cache'.
         cache_force: Force function call and overwrite cache. defaults to False.
         cache_verbose: Set verbose logging level. Higher means more verbose. defaults to 0.
-        cache_checksum_fn: Checksum function to identify input arguments. defaults to ``pythonwrench.checksum_any``.
+        cache_checksum_fn: Checksum function to identify input arguments. ``pythonwrench.checksum_blake2b`` can be used to get wider keys with less collisions. defaults to ``pythonwrench.checksum_any``.
         cache_saving_backend: Optional saving backend. Can be one of ('csv', 'json', 'pickle', 'custom', 'auto'). defaults to 'auto'.
         cache_fname_fmt: Cache filename format. defaults to '{fn_name}_{checksum_hex}{suffix}'.
+        cache_fname_fmt_args: Names of fields used by cache_fname_fmt. When none of ('checksum', 'checksum_hex', 'csum') is given, checksum of arguments is not computed at all. None means all fields are available. defaults to None.
         cache_dump_fn: Dump/save function to store outputs and overwrite saving backend. defaults to None.
         cache_load_fn: Load function to store outputs and overwrite saving backend. defaults to None.
         cache_enable: Enable disk cache. If False, the function has no effect. defaults to True.
         cache_store_mode: Disk cache storage mode. By default, it store function output and saved date into the cache file. defaults to 'outputs_metadata'.
+        cache_memory_max_entries: Max number of outputs kept in an in-memory LRU cache in front of the disk cache. 0 disables memory cache, None means unbounded. Outputs returned from memory are not copied. defaults to 0.
+        cache_memory_max_bytes: Approximate max size in bytes of the in-memory cache, estimated from cache file sizes. None means unbounded. defaults to None.
+        cache_lock: If True, acquire a lock file per cache entry, so only one process computes a missing output while others wait and then load it. With 'sqlite' storage, entries share a fixed set of lock files. defaults to False.
+        cache_max_bytes: Max total size in bytes of the function cache directory. Oldest entries are evicted according to cache_eviction_policy when exceeded. None means unbounded. defaults to None.
+        cache_max_entries: Max number of entries in the function cache directory. Budgets are enforced after each cache write. None means unbounded. defaults to None.
+        cache_max_age: Max age in seconds of cache entries. Expired entries are recomputed when accessed and evicted when cache is pruned. None means no expiration. defaults to None.
+        cache_eviction_policy: Order used to evict entries when cache_max_bytes or cache_max_entries is exceeded. Can be one of ('lru', 'lfu'). defaults to 'lru'.
+        cache_storage: Storage used for cache entries. Can be one of ('files', 'sqlite'). 'files' stores one file per entry in the function cache directory, 'sqlite' stores all entries of a function in a single indexed SQLite database file. defaults to 'files'.
+        cache_compression: Compression codec applied to cache entries. Can be one of ('zlib', 'gzip', 'bz2', 'lzma') or a name registered with register_cache_codec. The codec suffix is appended to cache filenames. None disables compression. defaults to None.
+        cache_compression_level: Compression level passed to codec. None means codec default level. defaults to None.
+        cache_ignore_args: Names of arguments ignored when computing the cache checksum. None means no argument is ignored. defaults to None.
+        cache_key_fns: Functions applied to arguments by name before computing the cache checksum, to avoid hashing large inputs. Values can also be 'size' to use only type and length of an argument, or 'sample' to use type, length and a few evenly spaced elements. Both modes are much faster for large sequences but can collide when contents change with the same length. None means all arguments are fully checksummed. defaults to None.
         \*args: Positional arguments passed to the function.
         \*\*kwargs: Keywords arguments passed to the function.
     """
@@ -356,10 +608,61 @@ def disk_cache_call(
         cache_load_fn=cache_load_fn,
         cache_enable=cache_enable,
         cache_store_mode=cache_store_mode,
+        cache_memory_max_entries=cache_memory_max_entries,
+        cache_memory_max_bytes=cache_memory_max_bytes,
+        cache_lock=cache_lock,
+        cache_max_bytes=cache_max_bytes,
+        cache_max_entries=cache_max_entries,
+        cache_max_age=cache_max_age,
+        cache_eviction_policy=cache_eviction_policy,
+        cache_storage=cache_storage,
+        cache_compression=cache_compression,
+        cache_compression_level=cache_compression_level,
+        cache_ignore_args=cache_ignore_args,
+        cache_key_fns=cache_key_fns,
     )
     return wrapped_fn(fn)(*args, **kwargs)
 
 
+def disk_cache_map(
+    fn: Callable[[Any], T],
+    iterable: Iterable[Any],
+    *,
+    executor: Optional[MapExecutor] = None,
+    max_workers: Optional[int] = None,
+    batch_size: int = _DEFAULT_MAP_BATCH_SIZE,
+    **cache_kwds,
+) -> List[T]:
+    r"""Call function on each element of an iterable and store outputs in cache, computing only missing outputs.
+
+    Cache entries are the same than the ones of ``disk_cache_call(fn, item)``. All cache keys are computed first and cache storage is queried once for all of them, then missing outputs are computed (optionally in a thread or process pool) and stored by batches.
+    Duplicated elements are computed only once. cache_lock is not used by this function, but cache files are still written atomically.
+
+    Example
+    -------
+    >>> import pythonwrench as pw
+    >>> def heavy_processing(x):
+    >>>     # Lot of stuff here
+    >>>     ...
+    >>> outputs = pw.disk_cache_map(heavy_processing, range(1000), executor="process")
+
+    Args:
+        fn: Function with a single positional argument to store its outputs.
+        iterable: Elements passed to the function.
+        executor: Executor used to compute missing outputs. Can be one of ('thread', 'process') or None for sequential calls. With 'process', function and elements must be pickable. defaults to None.
+        max_workers: Max number of workers of the executor. None means executor default. defaults to None.
+        batch_size: Number of missing outputs computed before storing them in cache. defaults to 256.
+        \*\*cache_kwds: Cache keyword arguments, same as in ``disk_cache_call``.
+    """
+    wrapped_fn = _disk_cache_impl(**cache_kwds)(fn)
+    return wrapped_fn.cache_map(  # type: ignore
+        iterable,
+        executor=executor,
+        max_workers=max_workers,
+        batch_size=batch_size,
+    )
+
+
 def _disk_cache_impl(
     *,
     cache_dpath: Union[str, Path, None] = None,
@@ -375,6 +678,20 @@ def _disk_cache_impl(
     cache_load_fn: Optional[Callable[[Path], Any]] = None,
     cache_enable: bool = True,
     cache_store_mode: StoreMode = _DEFAULT_CACHE_STORE_MODE,
+    cache_memory_max_entries: Optional[int] = 0,
+    cache_memory_max_bytes: Optional[int] = None,
+    cache_lock: bool = False,
+    cache_max_bytes: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_max_age: Optional[float] = None,
+    cache_eviction_policy: EvictionPolicy = "lru",
+    cache_storage: StorageBackend = "files",
+    cache_compression: Optional[str] = None,
+    cache_compression_level: Optional[int] = None,
+    cache_ignore_args: Optional[Iterable[str]] = None,
+    cache_key_fns: Optional[
+        Mapping[str, Union[Callable[[Any], Any], ArgKeyMode]]
+    ] = None,
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     # for backward compatibility
     """Perform the disk cache impl operation."""
@@ -397,11 +714,18 @@ def _disk_cache_impl(
             cache_saving_backend = "pickle"
 
     if cache_saving_backend == "pickle":
-        from pythonwrench.serialization.pickle import dump_pickle, load_pickle
+        from pythonwrench.serialization.pickle import (
+            dump_pickle,
+            dumps_pickle,
+            load_pickle,
+            loads_pickle,
+        )
 
         suffix = ".pickle"
         cache_dump_fn = dump_pickle
         cache_load_fn = load_pickle
+        cache_dumps_fn = dumps_pickle
+        cache_loads_fn = loads_pickle
 
     elif cache_saving_backend == "json":
         from pythonwrench.serialization.json import dump_json, load_json
@@ -409,6 +733,8 @@ def _disk_cache_impl(
         suffix = ".json"
         cache_dump_fn = dump_json
         cache_load_fn = load_json
+        cache_dumps_fn = _dumps_json_bytes
+        cache_loads_fn = _loads_json_bytes
 
     elif cache_saving_backend == "csv":
         from pythonwrench.serialization.csv import dump_csv, load_csv
@@ -420,6 +746,8 @@ def _disk_cache_impl(
         suffix = ".csv"
         cache_dump_fn = dump_csv
         cache_load_fn = load_csv
+        cache_dumps_fn = _dumps_csv_bytes
+        cache_loads_fn = _loads_csv_bytes
 
     elif cache_saving_backend == "custom":
         if cache_dump_fn is None or cache_load_fn is None:
@@ -427,6 +755,8 @@ def _disk_cache_impl(
             raise ValueError(msg)
 
         suffix = ""
+        cache_dumps_fn = None
+        cache_loads_fn = None
     else:
         msg = f"Invalid argument {cache_saving_backend=}. (expected one of {get_args(SavingBackend)})"
         raise ValueError(msg)
@@ -434,6 +764,47 @@ def _disk_cache_impl(
     if isinstance(cache_fname_fmt, str):
         cache_fname_fmt = cache_fname_fmt.format
 
+    if cache_memory_max_entries is not None and cache_memory_max_entries < 0:
+        msg = f"Invalid argument {cache_memory_max_entries=}. (expected a positive integer, 0 or None)"
+        raise ValueError(msg)
+
+    if cache_eviction_policy not in get_args(EvictionPolicy):
+        msg = f"Invalid argument {cache_eviction_policy=}. (expected one of {get_args(EvictionPolicy)})"
+        raise ValueError(msg)
+
+    if cache_compression is None:
+        codec = None
+    else:
+        codec = _get_codec(cache_compression)
+
+    serializer = _Serializer(
+        cache_dump_fn,  # type: ignore
+        cache_load_fn,  # type: ignore
+        cache_dumps_fn,
+        cache_loads_fn,
+        codec=codec,
+        compression_level=cache_compression_level,
+    )
+
+    if cache_ignore_args is None:
+        cache_ignore_args = ()
+    else:
+        cache_ignore_args = tuple(cache_ignore_args)
+
+    if cache_key_fns is None:
+        cache_key_fns = {}
+    else:
+        cache_key_fns = {
+            argname: _get_arg_key_fn(key_fn)
+            for argname, key_fn in cache_key_fns.items()
+        }
+
+    if cache_storage not in get_args(StorageBackend):
+        msg = f"Invalid argument {cache_storage=}. (expected one of {get_args(StorageBackend)})"
+        raise ValueError(msg)
+
+    auto_prune = cache_max_bytes is not None or cache_max_entries is not None
+
     def _disk_cache_impl_fn(fn: Callable[P, T]) -> Callable[P, T]:
         """Perform the disk cache impl fn operation."""
         fn_fullname, fn_name = _get_fn_fullname_and_name(fn)
@@ -450,13 +821,37 @@ def _disk_cache_impl(
         )
         load_start_msg = f"[{fn_name}] Loading cache..."
         load_end_msg = f"[{fn_name}] Cache loaded."
+        memory_hit_msg = f"[{fn_name}] Outputs found in memory cache."
+        checksum_msg = f"[{fn_name}] Cache checksum computed in {{duration:.3f}}s."
         argnames = get_argnames(fn)
+        if len(cache_ignore_args) > 0 or len(cache_key_fns) > 0:
+            signature = inspect.signature(fn)
+            _check_key_argnames(signature, cache_ignore_args, cache_key_fns)
 
-        @wraps(fn)
-        def _disk_cache_wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            """Perform the disk cache wrapper operation."""
-            checksum_args = fn, args, kwargs
+        if cache_memory_max_entries == 0:
+            memory_cache = None
+        else:
+            memory_cache = _get_memory_cache(
+                cache_fn_dpath,
+                max_entries=cache_memory_max_entries,
+                max_bytes=cache_memory_max_bytes,
+            )
 
+        access_log = _get_access_log(cache_fn_dpath)
+        stats = _get_stats(cache_fn_dpath, fn_fullname)
+        # Pending computations of coroutine functions, identified by event loop and cache filename
+        inflights: Dict[Tuple[int, str], _InflightCall] = {}
+
+        storage = _new_storage(cache_storage, cache_fn_dpath, serializer)
+        # Number of entries and size in bytes of storage, or None if they must be scanned
+        usage: List[Optional[Tuple[int, int]]] = [None]
+        usage_lock = threading.Lock()
+
+        def _get_cache_fname(
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Tuple[str, Optional[int]]:
+            """Returns cache filename and checksum of arguments, if needed by filename format."""
             kwds = {}
 
             if cache_fname_fmt_args is None or "fn_name" in cache_fname_fmt_args:
@@ -471,7 +866,18 @@ def _disk_cache_impl(
             if cache_fname_fmt_args is None or any(
                 k in cache_fname_fmt_args for k in ("csum", "checksum", "checksum_hex")
             ):
+                start = time.perf_counter()
+                if len(cache_ignore_args) > 0 or len(cache_key_fns) > 0:
+                    checksum_args = fn, *_get_key_args(args, kwargs)
+                else:
+                    checksum_args = fn, args, kwargs
                 csum = cache_checksum_fn(checksum_args)
+                duration = time.perf_counter() - start
+                stats.add(checksum_time=duration)
+
+                if cache_verbose > 1:
+                    logger.debug(checksum_msg.format(duration=duration))
+
                 kwds["checksum"] = csum
                 kwds["checksum_hex"] = hex(csum)[2:]
             else:
@@ -485,93 +891,456 @@ def _disk_cache_impl(
             kwds.update(inputs_kwds)
             kwds.update(kwargs)
 
-            cache_fname = cache_fname_fmt(**kwds)
-            cache_fpath = cache_fn_dpath.joinpath(cache_fname)
+            cache_fname = cache_fname_fmt(**kwds)  # type: ignore
+            if codec is not None:
+                cache_fname += codec.suffix
+            return cache_fname, csum
+
+        def _get_key_args(
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Tuple[tuple, Dict[str, Any]]:
+            """Apply key functions and remove ignored arguments before computing checksum.
+
+            Arguments are bound to the function signature, so positional and keyword calls give the same checksum.
+            """
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            named_args = {}
+            extra_args = ()
+            for argname, argval in bound.arguments.items():
+                kind = signature.parameters[argname].kind
+                if kind == inspect.Parameter.VAR_POSITIONAL:
+                    extra_args = argval
+                elif kind == inspect.Parameter.VAR_KEYWORD:
+                    named_args.update(argval)
+                else:
+                    named_args[argname] = argval
+
+            key_kwargs = {
+                argname: cache_key_fns[argname](argval)
+                if argname in cache_key_fns
+                else argval
+                for argname, argval in sorted(named_args.items())
+                if argname not in cache_ignore_args
+            }
+            return extra_args, key_kwargs
+
+        def _get_lock(cache_fname: str) -> ContextManager:
+            """Returns inter-process lock of a cache entry, or a no-op context if disabled."""
+            if cache_lock and cache_storage == "sqlite":
+                # Entries share a single database file, so keys are spread over a fixed set of lock files
+                stripe = zlib.crc32(cache_fname.encode()) % _SQLITE_LOCK_STRIPES
+                db_fpath = cache_fn_dpath.joinpath(f"{_SQLITE_FNAME}.{stripe}")
+                return _FileLock(_get_lock_fpath(db_fpath))
+            elif cache_lock:
+                cache_fpath = cache_fn_dpath.joinpath(cache_fname)
+                return _FileLock(_get_lock_fpath(cache_fpath))
+            else:
+                return nullcontext()
 
+        @wraps(fn)
+        def _disk_cache_wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            """Perform the disk cache wrapper operation."""
             if not cache_enable:
                 output = fn(*args, **kwargs)
+                return output
+
+            cache_fname, csum = _get_cache_fname(args, kwargs)
+            lock = _get_lock(cache_fname)
+
+            if cache_force:
+                with lock:
+                    output = _compute_and_dump(cache_fname, csum, args, kwargs)
+                return output
+
+            found, output = _load(cache_fname, args, kwargs)
+            if not found:
+                with lock:
+                    # Another process may have computed outputs while waiting for lock
+                    if cache_lock:
+                        found, output = _load(cache_fname, args, kwargs)
+                    if not found:
+                        output = _compute_and_dump(cache_fname, csum, args, kwargs)
+
+            return output
+
+        @wraps(fn)
+        async def _disk_cache_async_wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            """Perform the disk cache async wrapper operation."""
+            if not cache_enable:
+                output = await fn(*args, **kwargs)  # type: ignore
+                return output
+
+            cache_fname, csum = _get_cache_fname(args, kwargs)
+            loop = asyncio.get_running_loop()
+
+            if not cache_force:
+                found, output = _load_from_memory(cache_fname, args, kwargs)
+                if found:
+                    return output
+
+                found, output = await loop.run_in_executor(
+                    None, _load, cache_fname, args, kwargs
+                )
+                if found:
+                    return output
+
+            # Deduplicate concurrent calls with the same arguments in this event loop
+            inflight_key = (id(loop), cache_fname)
+            inflight = inflights.get(inflight_key)
+            if inflight is None:
+                coro = _async_compute_and_dump(cache_fname, csum, args, kwargs)
+                inflight = _InflightCall(loop.create_task(coro))
+                inflights[inflight_key] = inflight
+                inflight.task.add_done_callback(
+                    lambda task: _remove_inflight(inflight_key, task)
+                )
+
+            # Computation runs in its own task, so a cancelled caller does not cancel other waiters
+            inflight.waiters += 1
+            try:
+                return await asyncio.shield(inflight.task)
+            except asyncio.CancelledError:
+                if inflight.waiters == 1:
+                    inflight.task.cancel()
+                raise
+            finally:
+                inflight.waiters -= 1
+
+        def _remove_inflight(inflight_key: Tuple[int, str], task: asyncio.Task) -> None:
+            """Remove a finished computation from pending ones."""
+            inflight = inflights.get(inflight_key)
+            if inflight is not None and inflight.task is task:
+                inflights.pop(inflight_key)
+            if not task.cancelled():
+                task.exception()  # mark exception as retrieved
+
+        async def _async_compute_and_dump(
+            cache_fname: str,
+            csum: Optional[int],
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Any:
+            """Await function and store outputs into cache, using executor for blocking operations."""
+            loop = asyncio.get_running_loop()
+            lock = _get_lock(cache_fname)
+
+            await _async_acquire(lock)
+            try:
+                if cache_lock and not cache_force:
+                    found, output = await loop.run_in_executor(
+                        None, _load, cache_fname, args, kwargs
+                    )
+                    if found:
+                        return output
 
-            elif cache_force or not cache_fpath.exists():
                 if cache_verbose > 0:
                     logger.info(compute_start_msg.format(now=get_now()))
 
                 start = time.perf_counter()
-                output = fn(*args, **kwargs)
+                output = await fn(*args, **kwargs)  # type: ignore
                 duration = time.perf_counter() - start
+                stats.add_compute(duration, forced=cache_force)
 
                 if cache_verbose > 0:
-                    logger.info(
-                        compute_end_msg.format(now=get_now(), duration=duration)
-                    )
+                    msg = compute_end_msg.format(now=get_now(), duration=duration)
+                    logger.info(msg)
 
-                if cache_store_mode == "outputs_only":
-                    cache_content = output
+                cache_content = _get_cache_content(output, duration, csum, args, kwargs)
+                await loop.run_in_executor(None, _dump, cache_fname, cache_content)
+            finally:
+                lock.__exit__(None, None, None)
 
-                elif (
-                    cache_store_mode == "outputs_metadata"
-                    or cache_store_mode == "outputs_metadata_inputs"
-                ):
-                    input = (
-                        (args, kwargs)
-                        if cache_store_mode == "outputs_metadata_inputs"
-                        else None
-                    )
-                    cache_content = {
-                        "datetime": get_now(),
-                        "duration": duration,
-                        "checksum": csum,
-                        "fn_fullname": fn_fullname,
-                        "output": output,
-                        "input": input,
-                    }
-                else:
-                    msg = f"Invalid argument {cache_store_mode=}. (expected one of {get_args(StoreMode)})"
-                    raise ValueError(msg)
+            return output
 
-                cache_fn_dpath.mkdir(parents=True, exist_ok=True)
-                cache_dump_fn(cache_content, cache_fpath)  # type: ignore
+        def _compute_and_dump(
+            cache_fname: str,
+            csum: Optional[int],
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Any:
+            """Call function and store outputs into cache."""
+            if cache_verbose > 0:
+                logger.info(compute_start_msg.format(now=get_now()))
+
+            start = time.perf_counter()
+            output = fn(*args, **kwargs)
+            duration = time.perf_counter() - start
+            stats.add_compute(duration, forced=cache_force)
+
+            if cache_verbose > 0:
+                logger.info(compute_end_msg.format(now=get_now(), duration=duration))
+
+            cache_content = _get_cache_content(output, duration, csum, args, kwargs)
+            _dump(cache_fname, cache_content)
+            return output
 
-            elif cache_fpath.is_file():
-                if cache_verbose > 0:
-                    logger.info(load_start_msg)
+        def _get_cache_content(
+            output: Any,
+            duration: float,
+            csum: Optional[int],
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Any:
+            """Build cache content from function outputs according to store mode."""
+            if cache_store_mode == "outputs_only":
+                cache_content = output
+
+            elif (
+                cache_store_mode == "outputs_metadata"
+                or cache_store_mode == "outputs_metadata_inputs"
+            ):
+                input = (
+                    (args, kwargs)
+                    if cache_store_mode == "outputs_metadata_inputs"
+                    else None
+                )
+                cache_content = {
+                    "datetime": get_now(),
+                    "duration": duration,
+                    "checksum": csum,
+                    "fn_fullname": fn_fullname,
+                    "output": output,
+                    "input": input,
+                }
+            else:
+                msg = f"Invalid argument {cache_store_mode=}. (expected one of {get_args(StoreMode)})"
+                raise ValueError(msg)
+
+            return cache_content
+
+        def _dump(cache_fname: str, cache_content: Any) -> None:
+            """Store cache content in storage and memory, then prune cache if needed."""
+            _dump_many([(cache_fname, cache_content)])
+
+        def _dump_many(items: List[Tuple[str, Any]]) -> None:
+            """Store several cache contents in storage and memory, then prune cache if needed."""
+            start = time.perf_counter()
+            nbytes_lst = storage.dump_many(items)
+            duration = time.perf_counter() - start
+            stats.add(dump_time=duration, bytes_written=sum(nbytes_lst))
+
+            cache_fpaths = []
+            for (cache_fname, cache_content), nbytes in zip(items, nbytes_lst):
+                cache_fpath = cache_fn_dpath.joinpath(cache_fname)
+                cache_fpaths.append(cache_fpath)
+
+                if memory_cache is not None:
+                    memory_cache.put(cache_fpath, cache_content, nbytes)
+
+                access_log.record(cache_fname, hit=False)
+
+            if auto_prune and _is_over_budget(len(items), sum(nbytes_lst)):
+                # Evict a fraction of budget more than needed, so pruning is not repeated on each dump
+                _prune_entries(
+                    [cache_fn_dpath],
+                    max_bytes=_get_low_watermark(cache_max_bytes),
+                    max_entries=_get_low_watermark(cache_max_entries),
+                    max_age=cache_max_age,
+                    policy=cache_eviction_policy,
+                    keep=cache_fpaths,
+                )
+
+        def _is_over_budget(num_entries: int, nbytes: int) -> bool:
+            """Track number of entries and size of cache after a dump, and returns True if budget is exceeded.
+
+            Storage is scanned only once, then after each pruning, so dumps do not scan the whole cache directory.
+            """
+            with usage_lock:
+                if usage[0] is None:
+                    entries = storage.scan()
+                    usage[0] = (len(entries), sum(entry[1] for entry in entries))
+                else:
+                    # Overwritten entries are counted twice, which only triggers an earlier pruning
+                    usage[0] = (usage[0][0] + num_entries, usage[0][1] + nbytes)
+
+                total_entries, total_nbytes = usage[0]
+                over_budget = (
+                    cache_max_entries is not None and total_entries > cache_max_entries
+                ) or (cache_max_bytes is not None and total_nbytes > cache_max_bytes)
+                if over_budget:
+                    usage[0] = None
+                return over_budget
+
+        def _disk_cache_map(
+            iterable: Iterable[Any],
+            *,
+            executor: Optional[MapExecutor] = None,
+            max_workers: Optional[int] = None,
+            batch_size: int = _DEFAULT_MAP_BATCH_SIZE,
+        ) -> List[Any]:
+            """Call function on each element of an iterable, computing only elements missing from cache."""
+            if inspect.iscoroutinefunction(fn):
+                msg = (
+                    f"Cannot use disk cache map with coroutine function {fn_fullname}."
+                )
+                raise TypeError(msg)
+            if batch_size <= 0:
+                msg = f"Invalid argument {batch_size=}. (expected a positive integer)"
+                raise ValueError(msg)
+
+            items = list(iterable)
+            if not cache_enable:
+                results = _map_with_duration(fn, items, executor, max_workers)
+                return [output for output, _ in results]
 
-                cache_content: Any = cache_load_fn(cache_fpath)
+            cache_fnames_and_csums = [_get_cache_fname((item,), {}) for item in items]
+            cache_fnames = [cache_fname for cache_fname, _ in cache_fnames_and_csums]
 
-                if cache_store_mode == "outputs_only":
-                    output = cache_content
+            if cache_force:
+                entries_stats = {}
+            else:
+                entries_stats = storage.stat_many(set(cache_fnames))
 
-                elif cache_store_mode == "outputs_metadata":
-                    output = cache_content["output"]
+            outputs: List[Any] = [None] * len(items)
+            # Indices of items to compute, grouped by cache filename to compute duplicates once
+            missing: Dict[str, List[int]] = {}
 
-                elif cache_store_mode == "outputs_metadata_inputs":
-                    output = cache_content["output"]
-                    input_ = cache_content["input"]
-                    if input_ is not None and input_ != (args, kwargs):
-                        os.remove(cache_fpath)
-                        return _disk_cache_wrapper(*args, **kwargs)
+            for i, (item, cache_fname) in enumerate(zip(items, cache_fnames)):
+                if cache_fname in missing:
+                    missing[cache_fname].append(i)
+                    continue
+
+                if cache_force:
+                    found = False
+                else:
+                    args = (item,)
+                    found, output = _load_from_memory(cache_fname, args, {})
+                    if not found:
+                        stat = entries_stats.get(cache_fname)
+                        found, output = _load_from_storage(cache_fname, stat, args, {})
+
+                if found:
+                    outputs[i] = output  # type: ignore
                 else:
-                    msg = f"Invalid argument {cache_store_mode=}. (expected one of {get_args(StoreMode)})"
-                    raise ValueError(msg)
+                    missing[cache_fname] = [i]
 
-                if cache_verbose > 0:
-                    logger.info(load_end_msg)
+            if cache_verbose > 0:
+                msg = f"[{fn_name}] Found {len(items) - sum(map(len, missing.values()))}/{len(items)} outputs in cache, computing {len(missing)} missing outputs..."
+                logger.info(msg)
 
-                if cache_store_mode != "outputs_only" and cache_verbose > 1:
-                    metadata = {k: v for k, v in cache_content.items() if k != "output"}
-                    msgs = f"Found cache metadata:\n{metadata}".split("\n")
-                    for msg in msgs:
-                        logger.debug(msg)
+            missing_lst = list(missing.items())
+            for start in range(0, len(missing_lst), batch_size):
+                batch = missing_lst[start : start + batch_size]
+                batch_items = [items[indices[0]] for _, indices in batch]
+                results = _map_with_duration(fn, batch_items, executor, max_workers)
 
-            else:
-                msg = f"Path {str(cache_fpath)} exists but it is not a file."
-                raise RuntimeError(msg)
+                to_dump = []
+                for (cache_fname, indices), item, (output, duration) in zip(
+                    batch, batch_items, results
+                ):
+                    stats.add_compute(duration, forced=cache_force)
+                    csum = cache_fnames_and_csums[indices[0]][1]
+                    cache_content = _get_cache_content(
+                        output, duration, csum, (item,), {}
+                    )
+                    to_dump.append((cache_fname, cache_content))
+                    for idx in indices:
+                        outputs[idx] = output
 
-            return output
+                _dump_many(to_dump)
+
+            return outputs
 
-        _disk_cache_wrapper.fn = fn  # type: ignore
-        _disk_cache_wrapper.cache_fn_dpath = cache_fn_dpath  # type: ignore
+        def _load_from_memory(
+            cache_fname: str,
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Tuple[bool, Any]:
+            """Load outputs from memory cache. Returns (False, None) if outputs are not in memory."""
+            if memory_cache is None:
+                return False, None
 
-        return _disk_cache_wrapper
+            cache_fpath = cache_fn_dpath.joinpath(cache_fname)
+            found, cache_content = memory_cache.get(cache_fpath, cache_max_age)
+            if not found or not _is_matching_inputs(
+                cache_content, cache_store_mode, args, kwargs
+            ):
+                return False, None
+
+            if cache_verbose > 1:
+                logger.debug(memory_hit_msg)
+            access_log.record(cache_fname, hit=True)
+            stats.add(hits=1, memory_hits=1)
+            return True, _get_output(cache_content, cache_store_mode)
+
+        def _load(
+            cache_fname: str,
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Tuple[bool, Any]:
+            """Load outputs from memory or storage. Returns (False, None) if entry is missing, expired or if stored inputs do not match."""
+            found, output = _load_from_memory(cache_fname, args, kwargs)
+            if found:
+                return True, output
+
+            stat = storage.stat(cache_fname)
+            return _load_from_storage(cache_fname, stat, args, kwargs)
+
+        def _load_from_storage(
+            cache_fname: str,
+            stat: Optional[Tuple[int, float]],
+            args: tuple,
+            kwargs: Dict[str, Any],
+        ) -> Tuple[bool, Any]:
+            """Load outputs from storage, using entry stat previously returned by storage."""
+            if stat is None:
+                return False, None
+
+            nbytes, mtime = stat
+            if cache_max_age is not None and time.time() - mtime > cache_max_age:
+                return False, None
+
+            if cache_verbose > 0:
+                logger.info(load_start_msg)
+
+            start = time.perf_counter()
+            try:
+                cache_content: Any = storage.load(cache_fname)
+            except FileNotFoundError:
+                # Entry has been removed by another process
+                return False, None
+            stats.add(load_time=time.perf_counter() - start, bytes_read=nbytes)
+
+            if not _is_matching_inputs(cache_content, cache_store_mode, args, kwargs):
+                storage.remove(cache_fname)
+                return False, None
+
+            output = _get_output(cache_content, cache_store_mode)
+
+            if memory_cache is not None:
+                cache_fpath = cache_fn_dpath.joinpath(cache_fname)
+                memory_cache.put(cache_fpath, cache_content, nbytes, mtime)
+
+            access_log.record(cache_fname, hit=True)
+            stats.add(hits=1)
+
+            if cache_verbose > 0:
+                logger.info(load_end_msg)
+
+            if cache_store_mode != "outputs_only" and cache_verbose > 1:
+                metadata = {k: v for k, v in cache_content.items() if k != "output"}
+                msgs = f"Found cache metadata:\n{metadata}".split("\n")
+                for msg in msgs:
+                    logger.debug(msg)
+
+            return True, output
+
+        if inspect.iscoroutinefunction(fn):
+            wrapper = _disk_cache_async_wrapper
+        else:
+            wrapper = _disk_cache_wrapper
+
+        wrapper.fn = fn  # type: ignore
+        wrapper.cache_fn_dpath = cache_fn_dpath  # type: ignore
+        wrapper.cache_memory = memory_cache  # type: ignore
+        wrapper.cache_storage = storage  # type: ignore
+        wrapper.cache_stats = stats  # type: ignore
+        wrapper.cache_map = _disk_cache_map  # type: ignore
+
+        return wrapper  # type: ignore
 
     return _disk_cache_impl_fn
 
@@ -585,6 +1354,148 @@ def get_cache_dpath(cache_dpath: Union[str, Path, None] = None) -> Path:
     return cache_dpath
 
 
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns statistics of all cached functions called in the current process, indexed by function cache directory."""
+    return {
+        cache_fn_dpath: stats.to_dict()
+        for cache_fn_dpath, stats in list(_CACHE_STATS.items())
+    }
+
+
+def dump_cache_stats(
+    file: Union[str, Path, None] = None,
+    /,
+    **json_dumps_kwds,
+) -> str:
+    r"""Dump statistics of all cached functions called in the current process to JSON format into a string and/or file.
+
+    Args:
+        file: Optional filepath to save dumped data. Not used if None. defaults to None.
+        \*\*json_dumps_kwds: Other args passed to `pythonwrench.dump_json`.
+
+    Returns:
+        Dumped content as string.
+    """
+    from pythonwrench.serialization.json import dump_json
+
+    return dump_json(get_cache_stats(), file, **json_dumps_kwds)
+
+
+class DiskCacheStats:
+    """Counters and timings of a cached function, shared by all its wrappers in the current process.
+
+    Attributes:
+        hits: Number of outputs loaded from memory or storage.
+        memory_hits: Number of outputs loaded from memory.
+        misses: Number of outputs computed because they were not in cache.
+        forced: Number of outputs computed because of cache_force option.
+        bytes_read: Number of bytes loaded from storage.
+        bytes_written: Number of bytes dumped to storage.
+        checksum_time: Time spent to compute arguments checksums in seconds.
+        load_time: Time spent to load outputs from storage in seconds.
+        compute_time: Time spent in function calls in seconds.
+        dump_time: Time spent to dump outputs to storage in seconds.
+    """
+
+    def __init__(self, fn_fullname: str) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.fn_fullname = fn_fullname
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Ratio of calls loaded from cache among calls using cache, or None if function has not been called."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else None
+
+    def add(self, **values: Union[int, float]) -> None:
+        """Increment counters by name."""
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def add_compute(self, duration: float, forced: bool) -> None:
+        """Record a function call."""
+        if forced:
+            self.add(forced=1, compute_time=duration)
+        else:
+            self.add(misses=1, compute_time=duration)
+
+    def reset(self) -> None:
+        """Set all counters to zero."""
+        with self._lock:
+            self.hits = 0
+            self.memory_hits = 0
+            self.misses = 0
+            self.forced = 0
+            self.bytes_read = 0
+            self.bytes_written = 0
+            self.checksum_time = 0.0
+            self.load_time = 0.0
+            self.compute_time = 0.0
+            self.dump_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns counters as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "fn_fullname": self.fn_fullname,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "forced": self.forced,
+                "hit_ratio": self.hit_ratio,
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "checksum_time": self.checksum_time,
+                "load_time": self.load_time,
+                "compute_time": self.compute_time,
+                "dump_time": self.dump_time,
+            }
+
+    def __repr__(self) -> str:
+        kwds = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"{self.__class__.__name__}({kwds})"
+
+
+def register_cache_codec(
+    name: str,
+    compress_fn: Callable[[bytes, Optional[int]], bytes],
+    decompress_fn: Callable[[bytes], bytes],
+    *,
+    suffix: str,
+    overwrite: bool = False,
+) -> None:
+    """Register a compression codec usable with `cache_compression` argument of disk cache functions.
+
+    Example
+    -------
+    >>> import zstandard
+    >>> register_cache_codec(
+    >>>     "zstd",
+    >>>     lambda data, level: zstandard.compress(data, 3 if level is None else level),
+    >>>     zstandard.decompress,
+    >>>     suffix=".zst",
+    >>> )
+    >>> @pw.disk_cache_decorator(cache_compression="zstd")
+    >>> def heavy_processing():
+    >>>     ...
+
+    Args:
+        name: Codec name.
+        compress_fn: Function to compress bytes, which receives data and an optional compression level.
+        decompress_fn: Function to decompress bytes.
+        suffix: Suffix appended to cache filenames.
+        overwrite: If True, overwrite an existing codec with the same name. defaults to False.
+    """
+    if not overwrite and name in _CACHE_CODECS:
+        msg = f"Codec {name=} is already registered."
+        raise ValueError(msg)
+    _CACHE_CODECS[name] = _Codec(suffix, compress_fn, decompress_fn)
+
+
 def remove_fn_cache(
     fn: Callable,
     *,
@@ -592,10 +1503,190 @@ def remove_fn_cache(
 ) -> None:
     """Removes all caches for a specific function."""
     cache_fn_dpath = _get_fn_cache_dpath(fn, cache_dpath=cache_dpath)
+
+    memory_cache = _MEMORY_CACHES.get(str(cache_fn_dpath))
+    if memory_cache is not None:
+        memory_cache.clear()
+
+    access_log = _ACCESS_LOGS.get(str(cache_fn_dpath))
+    if access_log is not None:
+        access_log.clear()
+
+    _SQLiteStorage.close_connections(cache_fn_dpath.joinpath(_SQLITE_FNAME))
+
     if cache_fn_dpath.is_dir():
         shutil.rmtree(cache_fn_dpath)
 
 
+def prune_fn_cache(
+    fn: Callable,
+    *,
+    cache_dpath: Union[str, Path, None] = None,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    max_age: Optional[float] = None,
+    policy: EvictionPolicy = "lru",
+) -> List[Path]:
+    """Remove cache entries of a specific function to fit into a budget.
+
+    Args:
+        fn: Cached function.
+        cache_dpath: Cache directory path. defaults to `"~/.cache/disk_cache"`.
+        max_bytes: Max total size in bytes of the remaining entries. None means unbounded. defaults to None.
+        max_entries: Max number of remaining entries. None means unbounded. defaults to None.
+        max_age: Max age in seconds of the remaining entries. None means no expiration. defaults to None.
+        policy: Eviction order when max_bytes or max_entries is exceeded. Can be one of ('lru', 'lfu'). defaults to 'lru'.
+
+    Returns:
+        List of removed cache file paths.
+    """
+    cache_fn_dpath = _get_fn_cache_dpath(fn, cache_dpath=cache_dpath)
+    return _prune_entries(
+        [cache_fn_dpath],
+        max_bytes=max_bytes,
+        max_entries=max_entries,
+        max_age=max_age,
+        policy=policy,
+    )
+
+
+def prune_cache(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    max_age: Optional[float] = None,
+    policy: EvictionPolicy = "lru",
+    fn_names: Optional[Iterable[str]] = None,
+) -> List[Path]:
+    """Remove cache entries of all functions stored in a cache directory to fit into a budget.
+
+    Entries of all functions are ranked together, so a budget applies to the whole cache directory.
+
+    Args:
+        cache_dpath: Cache directory path. defaults to `"~/.cache/disk_cache"`.
+        max_bytes: Max total size in bytes of the remaining entries. None means unbounded. defaults to None.
+        max_entries: Max number of remaining entries. None means unbounded. defaults to None.
+        max_age: Max age in seconds of the remaining entries. None means no expiration. defaults to None.
+        policy: Eviction order when max_bytes or max_entries is exceeded. Can be one of ('lru', 'lfu'). defaults to 'lru'.
+        fn_names: Names of function cache directories to prune. None means all functions. defaults to None.
+
+    Returns:
+        List of removed cache file paths.
+    """
+    cache_fn_dpaths = _get_cache_fn_dpaths(cache_dpath, fn_names)
+    return _prune_entries(
+        cache_fn_dpaths,
+        max_bytes=max_bytes,
+        max_entries=max_entries,
+        max_age=max_age,
+        policy=policy,
+    )
+
+
+def get_cache_infos(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    fn_names: Optional[Iterable[str]] = None,
+) -> List[CacheInfo]:
+    """Returns number of entries, size, ages and hits of each function stored in a cache directory.
+
+    Args:
+        cache_dpath: Cache directory path. defaults to `"~/.cache/disk_cache"`.
+        fn_names: Names of function cache directories to inspect. None means all functions. defaults to None.
+
+    Returns:
+        List of cache information, one per function cache directory.
+    """
+    infos = []
+    for cache_fn_dpath in _get_cache_fn_dpaths(cache_dpath, fn_names):
+        entries = _scan_cache_entries(cache_fn_dpath)
+        mtimes = [entry["mtime"] for entry in entries]
+        last_accesses = [entry["last_access"] for entry in entries]
+
+        info = CacheInfo(
+            fn_name=cache_fn_dpath.name,
+            cache_fn_dpath=cache_fn_dpath,
+            num_entries=len(entries),
+            nbytes=sum(entry["nbytes"] for entry in entries),
+            hits=sum(entry["hits"] for entry in entries),
+            oldest_mtime=min(mtimes) if len(mtimes) > 0 else None,
+            newest_mtime=max(mtimes) if len(mtimes) > 0 else None,
+            last_access=max(last_accesses) if len(last_accesses) > 0 else None,
+        )
+        infos.append(info)
+    return infos
+
+
+def verify_cache(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    fn_names: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+    remove_invalid: bool = False,
+) -> Dict[Path, str]:
+    """Check integrity of cache entries by loading them in parallel.
+
+    Saving backend and compression codec are inferred from cache filename suffixes. Entries stored with custom saving backend cannot be checked and are ignored.
+
+    Args:
+        cache_dpath: Cache directory path. defaults to `"~/.cache/disk_cache"`.
+        fn_names: Names of function cache directories to check. None means all functions. defaults to None.
+        max_workers: Max number of threads used to load entries. None means executor default. defaults to None.
+        remove_invalid: If True, remove entries that cannot be loaded. defaults to False.
+
+    Returns:
+        Dictionary mapping invalid cache file paths to their error message.
+    """
+    entries = [
+        entry
+        for cache_fn_dpath in _get_cache_fn_dpaths(cache_dpath, fn_names)
+        for entry in _scan_cache_entries(cache_fn_dpath)
+    ]
+    with ThreadPoolExecutor(max_workers) as pool:
+        errors = list(pool.map(_verify_entry, entries))
+
+    invalids = {}
+    for entry, error in zip(entries, errors):
+        if error is None:
+            continue
+        invalids[entry["fpath"]] = error
+        if remove_invalid:
+            entry["storage"].remove(entry["fpath"].name)
+    return invalids
+
+
+def _get_cache_fn_dpaths(
+    cache_dpath: Union[str, Path, None] = None,
+    fn_names: Optional[Iterable[str]] = None,
+) -> List[Path]:
+    """Returns function cache directories stored in a cache directory, optionally filtered by function names."""
+    cache_dpath = get_cache_dpath(cache_dpath)
+    if not cache_dpath.is_dir():
+        return []
+
+    cache_fn_dpaths = sorted(path for path in cache_dpath.iterdir() if path.is_dir())
+    if fn_names is not None:
+        fn_names = set(fn_names)
+        cache_fn_dpaths = [path for path in cache_fn_dpaths if path.name in fn_names]
+    return cache_fn_dpaths
+
+
+def _verify_entry(entry: _CacheEntryInfo) -> Optional[str]:
+    """Try to load a cache entry and returns an error message if it fails, or None if it is valid or cannot be checked."""
+    key = entry["fpath"].name
+    serializer = _get_serializer_from_fname(key)
+    if serializer is None:
+        return None
+
+    storage = type(entry["storage"])(entry["fpath"].parent, serializer)
+    try:
+        storage.load(key)
+    except Exception as err:
+        return f"{type(err).__name__}: {err}"
+    return None
+
+
 def _get_fn_cache_dpath(
     fn: Callable,
     *,
@@ -613,3 +1704,1094 @@ def _get_fn_fullname_and_name(fn: Callable) -> Tuple[str, str]:
     fn_fullname = get_fullname(fn, inst_suffix="").replace("<locals>", "_locals_")
     fn_name = fn_fullname.split(".")[-1]
     return fn_fullname, fn_name
+
+
+def _get_output(cache_content: Any, cache_store_mode: StoreMode) -> Any:
+    """Extract function output from cache content."""
+    if cache_store_mode == "outputs_only":
+        return cache_content
+    elif (
+        cache_store_mode == "outputs_metadata"
+        or cache_store_mode == "outputs_metadata_inputs"
+    ):
+        return cache_content["output"]
+    else:
+        msg = f"Invalid argument {cache_store_mode=}. (expected one of {get_args(StoreMode)})"
+        raise ValueError(msg)
+
+
+def _is_matching_inputs(
+    cache_content: Any,
+    cache_store_mode: StoreMode,
+    args: tuple,
+    kwargs: Dict[str, Any],
+) -> bool:
+    """Returns False if cache content stores inputs different from the current ones."""
+    if cache_store_mode != "outputs_metadata_inputs":
+        return True
+    input_ = cache_content["input"]
+    return input_ is None or input_ == (args, kwargs)
+
+
+def _get_memory_cache(
+    cache_fn_dpath: Path,
+    *,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> "_MemoryCache":
+    """Returns the memory cache shared by all wrappers of a function cache directory.
+
+    When wrappers request different limits, the tightest ones are kept for the shared cache.
+    """
+    key = str(cache_fn_dpath)
+    memory_cache = _MEMORY_CACHES.get(key)
+    if memory_cache is None:
+        memory_cache = _MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+        memory_cache = _MEMORY_CACHES.setdefault(key, memory_cache)
+        return memory_cache
+
+    prev_limits = (memory_cache.max_entries, memory_cache.max_bytes)
+    if prev_limits != (max_entries, max_bytes):
+        memory_cache.max_entries = _min_limit(memory_cache.max_entries, max_entries)
+        memory_cache.max_bytes = _min_limit(memory_cache.max_bytes, max_bytes)
+        msg = (
+            f"Memory cache of {key} is shared with different limits {prev_limits} and {(max_entries, max_bytes)}. "
+            f"Using the tightest limits {(memory_cache.max_entries, memory_cache.max_bytes)}."
+        )
+        warnings.warn(msg)
+    return memory_cache
+
+
+def _get_low_watermark(limit: Optional[int]) -> Optional[int]:
+    """Returns the size targeted by automatic pruning when a budget limit is exceeded."""
+    if limit is None:
+        return None
+    return limit - int(limit * _AUTO_PRUNE_SLACK)
+
+
+def _min_limit(limit1: Optional[int], limit2: Optional[int]) -> Optional[int]:
+    """Returns the tightest of two limits, where None means unbounded."""
+    if limit1 is None:
+        return limit2
+    elif limit2 is None:
+        return limit1
+    else:
+        return min(limit1, limit2)
+
+
+def _prune_entries(
+    cache_fn_dpaths: Iterable[Path],
+    *,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    max_age: Optional[float] = None,
+    policy: EvictionPolicy = "lru",
+    keep: Iterable[Path] = (),
+) -> List[Path]:
+    """Remove expired entries, then evict entries in policy order until budget is satisfied."""
+    if policy == "lru":
+        sort_key = lambda entry: entry["last_access"]  # noqa: E731
+    elif policy == "lfu":
+        sort_key = lambda entry: (entry["hits"], entry["last_access"])  # noqa: E731
+    else:
+        msg = (
+            f"Invalid argument {policy=}. (expected one of {get_args(EvictionPolicy)})"
+        )
+        raise ValueError(msg)
+
+    cache_fn_dpaths = [path for path in cache_fn_dpaths if path.is_dir()]
+    entries = [
+        entry
+        for cache_fn_dpath in cache_fn_dpaths
+        for entry in _scan_cache_entries(cache_fn_dpath)
+    ]
+    keep = set(keep)
+    now = time.time()
+
+    victims = []
+    remaining = []
+    for entry in entries:
+        if max_age is not None and now - entry["mtime"] > max_age:
+            victims.append(entry)
+        else:
+            remaining.append(entry)
+    remaining = sorted(remaining, key=sort_key)
+
+    num_entries = len(remaining)
+    total_nbytes = sum(entry["nbytes"] for entry in remaining)
+    for entry in remaining:
+        if (max_entries is None or num_entries <= max_entries) and (
+            max_bytes is None or total_nbytes <= max_bytes
+        ):
+            break
+        if entry["fpath"] in keep:
+            continue
+        victims.append(entry)
+        num_entries -= 1
+        total_nbytes -= entry["nbytes"]
+
+    removed = []
+    for entry in victims:
+        fpath = entry["fpath"]
+        if fpath in keep or not entry["storage"].remove(fpath.name):
+            continue
+        removed.append(fpath)
+
+        memory_cache = _MEMORY_CACHES.get(str(fpath.parent))
+        if memory_cache is not None:
+            memory_cache.pop(fpath)
+
+    removed_set = set(removed)
+    for cache_fn_dpath in cache_fn_dpaths:
+        fnames = [
+            entry["fpath"].name
+            for entry in entries
+            if entry["fpath"].parent == cache_fn_dpath
+            and entry["fpath"] not in removed_set
+        ]
+        _get_access_log(cache_fn_dpath).flush(fnames)
+        _remove_orphan_lock_files(cache_fn_dpath)
+
+    return removed
+
+
+def _scan_cache_entries(cache_fn_dpath: Path) -> List[_CacheEntryInfo]:
+    """Returns cache entries stored in a function cache directory, in all storages."""
+    access = _get_access_log(cache_fn_dpath).flush()
+    storages: List[_CacheStorage] = [_FileStorage(cache_fn_dpath)]
+    if cache_fn_dpath.joinpath(_SQLITE_FNAME).is_file():
+        storages.append(_SQLiteStorage(cache_fn_dpath))
+
+    entries = []
+    for storage in storages:
+        for key, nbytes, mtime in storage.scan():
+            hits, last_access = access.get(key, (0, mtime))
+            entry = _CacheEntryInfo(
+                fpath=cache_fn_dpath.joinpath(key),
+                nbytes=nbytes,
+                mtime=mtime,
+                hits=hits,
+                last_access=last_access,
+                storage=storage,
+            )
+            entries.append(entry)
+    return entries
+
+
+def _map_with_duration(
+    fn: Callable[[Any], T],
+    items: List[Any],
+    executor: Optional[MapExecutor] = None,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[T, float]]:
+    """Call function on each item, sequentially or in a pool, and returns outputs with call durations."""
+    if executor is None or len(items) <= 1:
+        return [_call_with_duration(fn, item) for item in items]
+
+    if executor == "thread":
+        pool_cls = ThreadPoolExecutor
+    elif executor == "process":
+        pool_cls = ProcessPoolExecutor
+    else:
+        msg = f"Invalid argument {executor=}. (expected one of {get_args(MapExecutor)} or None)"
+        raise ValueError(msg)
+
+    with pool_cls(max_workers) as pool:
+        return list(pool.map(_call_with_duration, [fn] * len(items), items))
+
+
+def _call_with_duration(fn: Callable[[Any], T], item: Any) -> Tuple[T, float]:
+    """Call function and returns output with call duration in seconds."""
+    start = time.perf_counter()
+    output = fn(item)
+    return output, time.perf_counter() - start
+
+
+def _get_arg_key_fn(
+    key_fn: Union[Callable[[Any], Any], ArgKeyMode],
+) -> Callable[[Any], Any]:
+    """Returns function used to replace an argument before computing checksum."""
+    if key_fn == "size":
+        return _size_key
+    elif key_fn == "sample":
+        return _sample_key
+    elif callable(key_fn):
+        return key_fn
+    else:
+        msg = f"Invalid argument {key_fn=}. (expected a callable or one of {get_args(ArgKeyMode)})"
+        raise ValueError(msg)
+
+
+def _check_key_argnames(
+    signature: inspect.Signature,
+    cache_ignore_args: Iterable[str],
+    cache_key_fns: Mapping[str, Any],
+) -> None:
+    """Check that ignored arguments and key functions refer to parameters of the decorated function."""
+    parameters = signature.parameters
+    if any(
+        param.kind == inspect.Parameter.VAR_KEYWORD for param in parameters.values()
+    ):
+        return None
+
+    valid_argnames = [
+        name
+        for name, param in parameters.items()
+        if param.kind != inspect.Parameter.VAR_POSITIONAL
+    ]
+    for name, argnames in (
+        ("cache_ignore_args", cache_ignore_args),
+        ("cache_key_fns", cache_key_fns),
+    ):
+        invalid = [argname for argname in argnames if argname not in valid_argnames]
+        if len(invalid) > 0:
+            msg = f"Invalid argument {name}={invalid}. (expected parameter names in {valid_argnames})"
+            raise ValueError(msg)
+
+
+def _size_key(x: Any) -> Tuple[str, int]:
+    """Returns type fullname and length of an object."""
+    return get_fullname(x), len(x)
+
+
+def _sample_key(x: Any) -> Tuple[str, int, list]:
+    """Returns type fullname, length and a few evenly spaced elements of a sequence."""
+    size = len(x)
+    if size <= _NUM_KEY_SAMPLES:
+        indices = range(size)
+    else:
+        step = (size - 1) / (_NUM_KEY_SAMPLES - 1)
+        indices = [round(i * step) for i in range(_NUM_KEY_SAMPLES)]
+    samples = [x[idx] for idx in indices]
+    return get_fullname(x), size, samples
+
+
+def _get_stats(cache_fn_dpath: Path, fn_fullname: str) -> DiskCacheStats:
+    """Returns the statistics shared by all wrappers of a function cache directory."""
+    key = str(cache_fn_dpath)
+    stats = _CACHE_STATS.get(key)
+    if stats is None:
+        stats = _CACHE_STATS.setdefault(key, DiskCacheStats(fn_fullname))
+    return stats
+
+
+def _get_access_log(cache_fn_dpath: Path) -> "_AccessLog":
+    """Returns the access log shared by all wrappers of a function cache directory."""
+    key = str(cache_fn_dpath)
+    access_log = _ACCESS_LOGS.get(key)
+    if access_log is None:
+        access_log = _ACCESS_LOGS.setdefault(key, _AccessLog(cache_fn_dpath))
+    return access_log
+
+
+@atexit.register
+def _flush_access_logs() -> None:
+    """Persist pending accesses of all functions."""
+    for access_log in list(_ACCESS_LOGS.values()):
+        try:
+            access_log.flush()
+        except OSError as err:
+            logger.warning(f"Cannot save disk cache accesses. ({err})")
+
+
+class _AccessLog:
+    """Hits count and last access time of cache entries.
+
+    Accesses are recorded in memory and merged into a JSON file stored in the function cache directory when flushed.
+    """
+
+    def __init__(self, cache_fn_dpath: Path) -> None:
+        """Initialize the instance."""
+        pending: Dict[str, List] = {}
+
+        super().__init__()
+        self.cache_fn_dpath = cache_fn_dpath
+        self._pending = pending
+        self._lock = threading.Lock()
+
+    @property
+    def fpath(self) -> Path:
+        """Path to the JSON file storing accesses."""
+        return self.cache_fn_dpath.joinpath(_ACCESS_FNAME)
+
+    def record(self, fname: str, hit: bool) -> None:
+        """Record an access to a cache entry."""
+        with self._lock:
+            item = self._pending.setdefault(fname, [0, 0.0])
+            item[0] += int(hit)
+            item[1] = time.time()
+
+    def clear(self) -> None:
+        """Forget pending accesses."""
+        with self._lock:
+            self._pending.clear()
+
+    def flush(
+        self,
+        fnames: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Tuple[int, float]]:
+        """Merge pending accesses into the JSON file and returns all accesses.
+
+        Args:
+            fnames: If not None, forget accesses of entries not in fnames. defaults to None.
+        """
+        if not self.cache_fn_dpath.is_dir():
+            self.clear()
+            return {}
+
+        with _FileLock(_get_lock_fpath(self.fpath)):
+            access = self.read()
+            num_stored = len(access)
+
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+
+            for fname, (hits, last_access) in pending.items():
+                prev_hits, prev_last_access = access.get(fname, (0, 0.0))
+                access[fname] = (prev_hits + hits, max(prev_last_access, last_access))
+
+            if fnames is not None:
+                fnames = set(fnames)
+                access = {
+                    fname: item for fname, item in access.items() if fname in fnames
+                }
+
+            if len(pending) > 0 or len(access) != num_stored:
+                content = json.dumps(access)
+                _atomic_dump(_write_text, content, self.fpath)
+
+        return access
+
+    def read(self) -> Dict[str, Tuple[int, float]]:
+        """Returns accesses stored in the JSON file, without pending accesses."""
+        try:
+            access = json.loads(self.fpath.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {
+            fname: (int(hits), float(last_access))
+            for fname, (hits, last_access) in access.items()
+        }
+
+
+def _write_text(content: str, fpath: Path) -> None:
+    """Write string content to file."""
+    fpath.write_text(content)
+
+
+def _new_storage(
+    cache_storage: StorageBackend,
+    cache_fn_dpath: Path,
+    serializer: "_Serializer",
+) -> "_CacheStorage":
+    """Build storage for a function cache directory."""
+    if cache_storage == "files":
+        return _FileStorage(cache_fn_dpath, serializer)
+    elif cache_storage == "sqlite":
+        return _SQLiteStorage(cache_fn_dpath, serializer)
+    else:
+        msg = f"Invalid argument {cache_storage=}. (expected one of {get_args(StorageBackend)})"
+        raise ValueError(msg)
+
+
+class _CacheStorage(Protocol):
+    """Storage of serialized cache entries of a function, identified by their cache filename."""
+
+    def stat(self, key: str) -> Optional[Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of an entry, or None if entry does not exist."""
+        ...
+
+    def load(self, key: str) -> Any:
+        """Load entry content. Raises FileNotFoundError if entry does not exist."""
+        ...
+
+    def dump(self, content: Any, key: str) -> int:
+        """Store entry content atomically and returns its size in bytes."""
+        ...
+
+    def stat_many(self, keys: Iterable[str]) -> Dict[str, Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of existing entries among keys."""
+        ...
+
+    def dump_many(self, items: Iterable[Tuple[str, Any]]) -> List[int]:
+        """Store several (key, content) entries and returns their sizes in bytes."""
+        ...
+
+    def remove(self, key: str) -> bool:
+        """Remove entry and returns True if it existed."""
+        ...
+
+    def scan(self) -> List[Tuple[str, int, float]]:
+        """Returns (key, size in bytes, modification timestamp) of all entries."""
+        ...
+
+
+class _FileStorage:
+    """Store each cache entry in a separate file of the function cache directory."""
+
+    def __init__(
+        self,
+        cache_fn_dpath: Path,
+        serializer: Optional["_Serializer"] = None,
+    ) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.cache_fn_dpath = cache_fn_dpath
+        self.serializer = serializer
+
+    def stat(self, key: str) -> Optional[Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of an entry, or None if entry does not exist."""
+        fpath = self.cache_fn_dpath.joinpath(key)
+        try:
+            stat = os.stat(fpath)
+        except FileNotFoundError:
+            return None
+
+        if not S_ISREG(stat.st_mode):
+            msg = f"Path {str(fpath)} exists but it is not a file."
+            raise RuntimeError(msg)
+        return stat.st_size, stat.st_mtime
+
+    def load(self, key: str) -> Any:
+        """Load entry content. Raises FileNotFoundError if entry does not exist."""
+        return self.serializer.load(self.cache_fn_dpath.joinpath(key))  # type: ignore
+
+    def dump(self, content: Any, key: str) -> int:
+        """Store entry content atomically and returns its size in bytes."""
+        fpath = self.cache_fn_dpath.joinpath(key)
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_dump(self.serializer.dump, content, fpath)  # type: ignore
+        return fpath.stat().st_size
+
+    def stat_many(self, keys: Iterable[str]) -> Dict[str, Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of existing entries among keys, using a single directory scan."""
+        keys = set(keys)
+        stats = {}
+        for key in keys:
+            # Keys in subdirectories cannot be found by scanning function cache directory
+            if os.sep in key or (os.altsep is not None and os.altsep in key):
+                stat = self.stat(key)
+                if stat is not None:
+                    stats[key] = stat
+        for key, nbytes, mtime in self.scan():
+            if key in keys:
+                stats[key] = (nbytes, mtime)
+        return stats
+
+    def dump_many(self, items: Iterable[Tuple[str, Any]]) -> List[int]:
+        """Store several (key, content) entries and returns their sizes in bytes."""
+        return [self.dump(content, key) for key, content in items]
+
+    def remove(self, key: str) -> bool:
+        """Remove entry and its lock file, and returns True if entry existed."""
+        fpath = self.cache_fn_dpath.joinpath(key)
+        try:
+            os.remove(fpath)
+        except FileNotFoundError:
+            return False
+        _remove_lock_file(fpath)
+        return True
+
+    def scan(self) -> List[Tuple[str, int, float]]:
+        """Returns (key, size in bytes, modification timestamp) of all entries, ignoring hidden files (temporary, lock, access and database files)."""
+        if not self.cache_fn_dpath.is_dir():
+            return []
+
+        entries = []
+        with os.scandir(self.cache_fn_dpath) as it:
+            for direntry in it:
+                if direntry.name.startswith(".") or not direntry.is_file():
+                    continue
+                stat = direntry.stat()
+                entries.append((direntry.name, stat.st_size, stat.st_mtime))
+        return entries
+
+
+class _SQLiteStorage:
+    """Store all cache entries of a function in a single SQLite database file, indexed by key."""
+
+    _connections = threading.local()
+    _generations: Dict[str, int] = {}
+    # Connections of all threads by database path, closed before removing database
+    _open_connections: Dict[str, List[sqlite3.Connection]] = {}
+    _open_connections_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_fn_dpath: Path,
+        serializer: Optional["_Serializer"] = None,
+    ) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.cache_fn_dpath = cache_fn_dpath
+        self.serializer = serializer
+
+    @property
+    def fpath(self) -> Path:
+        """Path to the database file."""
+        return self.cache_fn_dpath.joinpath(_SQLITE_FNAME)
+
+    @classmethod
+    def close_connections(cls, fpath: Path) -> None:
+        """Close connections of all threads to a database and force them to reopen it, e.g. before removing it."""
+        key = str(fpath)
+        with cls._open_connections_lock:
+            cls._generations[key] = cls._generations.get(key, 0) + 1
+            connections = cls._open_connections.pop(key, [])
+        for connection in connections:
+            connection.close()
+
+    def stat(self, key: str) -> Optional[Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of an entry, or None if entry does not exist."""
+        row = (
+            self._connect()
+            .execute("SELECT nbytes, mtime FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    def load(self, key: str) -> Any:
+        """Load entry content. Raises FileNotFoundError if entry does not exist."""
+        row = (
+            self._connect()
+            .execute("SELECT content FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            msg = f"Cannot find entry {key} in {str(self.fpath)}."
+            raise FileNotFoundError(msg)
+
+        return self.serializer.loads(bytes(row[0]), key)  # type: ignore
+
+    def dump(self, content: Any, key: str) -> int:
+        """Store entry content atomically and returns its size in bytes."""
+        data = self.serializer.dumps(content, key)  # type: ignore
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, content, nbytes, mtime) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+        return len(data)
+
+    def stat_many(self, keys: Iterable[str]) -> Dict[str, Tuple[int, float]]:
+        """Returns (size in bytes, modification timestamp) of existing entries among keys, using batched queries."""
+        keys = list(keys)
+        connection = self._connect()
+        stats = {}
+        for start in range(0, len(keys), _SQLITE_MAX_VARIABLES):
+            batch = keys[start : start + _SQLITE_MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT key, nbytes, mtime FROM entries WHERE key IN ({placeholders})",
+                batch,
+            )
+            stats.update({key: (nbytes, mtime) for key, nbytes, mtime in rows})
+        return stats
+
+    def dump_many(self, items: Iterable[Tuple[str, Any]]) -> List[int]:
+        """Store several (key, content) entries in a single transaction and returns their sizes in bytes."""
+        now = time.time()
+        rows = []
+        for key, content in items:
+            data = self.serializer.dumps(content, key)  # type: ignore
+            rows.append((key, data, len(data), now))
+
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, content, nbytes, mtime) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return [nbytes for _, _, nbytes, _ in rows]
+
+    def remove(self, key: str) -> bool:
+        """Remove entry and returns True if it existed."""
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def scan(self) -> List[Tuple[str, int, float]]:
+        """Returns (key, size in bytes, modification timestamp) of all entries."""
+        if not self.fpath.is_file():
+            return []
+        rows = self._connect().execute("SELECT key, nbytes, mtime FROM entries")
+        return [(key, nbytes, mtime) for key, nbytes, mtime in rows]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns the connection of the current thread, and create database if needed."""
+        key = str(self.fpath)
+        generation = self._generations.get(key, 0)
+
+        if not hasattr(self._connections, "items"):
+            self._connections.items = {}
+        items: Dict[str, Tuple[int, sqlite3.Connection]] = self._connections.items
+
+        if key in items:
+            prev_generation, connection = items[key]
+            if prev_generation == generation:
+                return connection
+            connection.close()
+            with self._open_connections_lock:
+                connections = self._open_connections.get(key, [])
+                if connection in connections:
+                    connections.remove(connection)
+
+        self.cache_fn_dpath.mkdir(parents=True, exist_ok=True)
+        # Connection is only used by current thread, but it can be closed by another one before removing database
+        connection = sqlite3.connect(key, timeout=60.0, check_same_thread=False)
+        with self._open_connections_lock:
+            self._open_connections.setdefault(key, []).append(connection)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, content BLOB NOT NULL, nbytes INTEGER NOT NULL, mtime REAL NOT NULL)"
+        )
+        items[key] = (generation, connection)
+        return connection
+
+
+class _Serializer:
+    """Convert cache content to files or bytes with saving backend functions, and apply optional compression."""
+
+    def __init__(
+        self,
+        dump_fn: Callable[[Any, Path], Any],
+        load_fn: Callable[[Path], Any],
+        dumps_fn: Optional[Callable[[Any], bytes]] = None,
+        loads_fn: Optional[Callable[[bytes], Any]] = None,
+        *,
+        codec: Optional["_Codec"] = None,
+        compression_level: Optional[int] = None,
+    ) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.dump_fn = dump_fn
+        self.load_fn = load_fn
+        self.dumps_fn = dumps_fn
+        self.loads_fn = loads_fn
+        self.codec = codec
+        self.compression_level = compression_level
+
+    def dump(self, content: Any, fpath: Path) -> None:
+        """Write content to file."""
+        if self.codec is None:
+            self.dump_fn(content, fpath)
+        else:
+            fpath.write_bytes(self.dumps(content, fpath.name))
+
+    def load(self, fpath: Path) -> Any:
+        """Read content from file."""
+        if self.codec is None:
+            return self.load_fn(fpath)
+        else:
+            return self.loads(fpath.read_bytes(), fpath.name)
+
+    def dumps(self, content: Any, key: str) -> bytes:
+        """Convert content to bytes."""
+        if self.dumps_fn is not None:
+            data = self.dumps_fn(content)
+        else:
+            suffix = self._get_backend_suffix(key)
+            data = _dumps_with_tmpfile(self.dump_fn, content, suffix)
+
+        if self.codec is not None:
+            data = self.codec.compress(data, self.compression_level)
+        return data
+
+    def loads(self, data: bytes, key: str) -> Any:
+        """Convert bytes to content."""
+        if self.codec is not None:
+            data = self.codec.decompress(data)
+
+        if self.loads_fn is not None:
+            return self.loads_fn(data)
+        else:
+            suffix = self._get_backend_suffix(key)
+            return _loads_with_tmpfile(self.load_fn, data, suffix)
+
+    def _get_backend_suffix(self, key: str) -> str:
+        """Returns suffix of cache filename without codec suffix."""
+        if self.codec is not None and key.endswith(self.codec.suffix):
+            key = key[: len(key) - len(self.codec.suffix)]
+        return Path(key).suffix
+
+
+class _Codec(NamedTuple):
+    suffix: str
+    compress: Callable[[bytes, Optional[int]], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _get_serializer_from_fname(fname: str) -> Optional[_Serializer]:
+    """Returns the serializer used to store a cache file, inferred from filename suffixes, or None for custom saving backends."""
+    codec = None
+    for codec_i in _CACHE_CODECS.values():
+        if fname.endswith(codec_i.suffix):
+            codec = codec_i
+            fname = fname[: len(fname) - len(codec.suffix)]
+            break
+
+    suffix = Path(fname).suffix
+    if suffix == ".pickle":
+        from pythonwrench.serialization.pickle import (
+            dump_pickle,
+            dumps_pickle,
+            load_pickle,
+            loads_pickle,
+        )
+
+        fns = (dump_pickle, load_pickle, dumps_pickle, loads_pickle)
+    elif suffix == ".json":
+        from pythonwrench.serialization.json import dump_json, load_json
+
+        fns = (dump_json, load_json, _dumps_json_bytes, _loads_json_bytes)
+    elif suffix == ".csv":
+        from pythonwrench.serialization.csv import dump_csv, load_csv
+
+        fns = (dump_csv, load_csv, _dumps_csv_bytes, _loads_csv_bytes)
+    else:
+        return None
+
+    return _Serializer(*fns, codec=codec)
+
+
+def _get_codec(name: str) -> _Codec:
+    """Returns a registered compression codec."""
+    if name not in _CACHE_CODECS:
+        msg = (
+            f"Invalid argument {name=}. (expected one of {tuple(_CACHE_CODECS.keys())})"
+        )
+        raise ValueError(msg)
+    return _CACHE_CODECS[name]
+
+
+def _zlib_compress(data: bytes, level: Optional[int]) -> bytes:
+    """Compress bytes with zlib."""
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _gzip_compress(data: bytes, level: Optional[int]) -> bytes:
+    """Compress bytes with gzip."""
+    return gzip.compress(data, 9 if level is None else level)
+
+
+def _bz2_compress(data: bytes, level: Optional[int]) -> bytes:
+    """Compress bytes with bz2."""
+    return bz2.compress(data, 9 if level is None else level)
+
+
+def _lzma_compress(data: bytes, level: Optional[int]) -> bytes:
+    """Compress bytes with lzma."""
+    return lzma.compress(data, preset=level)
+
+
+_CACHE_CODECS: Dict[str, _Codec] = {
+    "zlib": _Codec(".zlib", _zlib_compress, zlib.decompress),
+    "gzip": _Codec(".gz", _gzip_compress, gzip.decompress),
+    "bz2": _Codec(".bz2", _bz2_compress, bz2.decompress),
+    "lzma": _Codec(".xz", _lzma_compress, lzma.decompress),
+}
+
+
+def _dumps_json_bytes(content: Any) -> bytes:
+    """Dump content to JSON encoded bytes."""
+    from pythonwrench.serialization.json import dumps_json
+
+    return dumps_json(content).encode()
+
+
+def _loads_json_bytes(content: bytes) -> Any:
+    """Load content from JSON encoded bytes."""
+    from pythonwrench.serialization.json import loads_json
+
+    return loads_json(content.decode())
+
+
+def _dumps_csv_bytes(content: Any) -> bytes:
+    """Dump content to CSV encoded bytes."""
+    from pythonwrench.serialization.csv import dumps_csv
+
+    return dumps_csv(content).encode()
+
+
+def _loads_csv_bytes(content: bytes) -> Any:
+    """Load content from CSV encoded bytes."""
+    from pythonwrench.serialization.csv import loads_csv
+
+    return loads_csv(content.decode())
+
+
+def _dumps_with_tmpfile(
+    dump_fn: Callable[[Any, Path], Any],
+    content: Any,
+    suffix: str,
+) -> bytes:
+    """Dump content to bytes using a function which only writes files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = Path(tmpdir).joinpath(f"content{suffix}")
+        dump_fn(content, fpath)
+        return fpath.read_bytes()
+
+
+def _loads_with_tmpfile(
+    load_fn: Callable[[Path], Any],
+    content: bytes,
+    suffix: str,
+) -> Any:
+    """Load content from bytes using a function which only reads files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = Path(tmpdir).joinpath(f"content{suffix}")
+        fpath.write_bytes(content)
+        return load_fn(fpath)
+
+
+def _atomic_dump(
+    dump_fn: Callable[[Any, Path], Any],
+    content: Any,
+    fpath: Path,
+) -> None:
+    """Dump content into a temporary file, then move it to target path, so readers never see partial files."""
+    tmp_fpath = fpath.with_name(f".tmp_{uuid.uuid4().hex}_{fpath.name}")
+    try:
+        dump_fn(content, tmp_fpath)
+        os.replace(tmp_fpath, fpath)
+    except BaseException:
+        if tmp_fpath.exists():
+            os.remove(tmp_fpath)
+        raise
+
+
+def _get_lock_fpath(fpath: Path) -> Path:
+    """Returns lock file path associated to a cache file."""
+    return fpath.with_name(f".{fpath.name}.lock")
+
+
+class _InflightCall:
+    """Pending computation of a coroutine function shared by concurrent callers."""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.task = task
+        self.waiters = 0
+
+
+async def _async_acquire(lock: ContextManager) -> None:
+    """Acquire lock without blocking event loop or executor threads, which may be needed by the lock owner."""
+    if not isinstance(lock, _FileLock):
+        lock.__enter__()
+        return None
+
+    delay = _LOCK_MIN_DELAY
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _LOCK_MAX_DELAY)
+
+
+class _FileLock:
+    """Exclusive inter-process lock based on a lock file."""
+
+    def __init__(self, fpath: Path) -> None:
+        """Initialize the instance."""
+        super().__init__()
+        self.fpath = fpath
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Acquire lock and returns True, or returns False if blocking is False and lock is held by another owner."""
+        while True:
+            self.fpath.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.fpath, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                locked = _lock_fd(fd, blocking)
+                # Lock file may have been removed by another owner while waiting, so retry on the new file
+                if locked and not _is_same_file(fd, self.fpath):
+                    _unlock_fd(fd)
+                    os.close(fd)
+                    continue
+            except BaseException:
+                os.close(fd)
+                raise
+
+            if not locked:
+                os.close(fd)
+                return False
+            self._fd = fd
+            return True
+
+    def release(self) -> None:
+        """Release lock if acquired."""
+        fd = self._fd
+        if fd is None:
+            return
+        try:
+            _unlock_fd(fd)
+        finally:
+            os.close(fd)
+            self._fd = None
+
+    def __enter__(self) -> "_FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+
+def _lock_fd(fd: int, blocking: bool) -> bool:
+    """Lock first byte of an open file and returns True if lock has been acquired."""
+    if msvcrt is not None:
+        delay = _LOCK_MIN_DELAY
+        while True:
+            os.lseek(fd, 0, os.SEEK_SET)
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+            time.sleep(delay)
+            delay = min(delay * 2, _LOCK_MAX_DELAY)
+    else:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB  # type: ignore
+        try:
+            fcntl.flock(fd, flags)  # type: ignore
+        except BlockingIOError:
+            return False
+        return True
+
+
+def _unlock_fd(fd: int) -> None:
+    """Unlock first byte of an open file."""
+    if msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)  # type: ignore
+
+
+def _is_same_file(fd: int, fpath: Path) -> bool:
+    """Returns True if an open file descriptor still refers to the file at a path."""
+    try:
+        stat = os.stat(fpath)
+    except FileNotFoundError:
+        return False
+    fd_stat = os.fstat(fd)
+    return (stat.st_dev, stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino)
+
+
+def _remove_lock_file(fpath: Path) -> bool:
+    """Remove lock file of a cache file if it is not held, and returns True if it has been removed."""
+    lock = _FileLock(_get_lock_fpath(fpath))
+    if not lock.fpath.exists() or not lock.acquire(blocking=False):
+        return False
+    try:
+        # Removing while holding lock makes waiting owners retry on a new lock file
+        os.remove(lock.fpath)
+    except OSError:
+        return False
+    finally:
+        lock.release()
+    return True
+
+
+def _remove_orphan_lock_files(cache_fn_dpath: Path) -> List[Path]:
+    """Remove lock files of a function cache directory whose cache file does not exist, and returns their paths."""
+    removed = []
+    for lock_fpath in cache_fn_dpath.glob(".*.lock"):
+        fpath = lock_fpath.with_name(lock_fpath.name[1 : -len(".lock")])
+        if not fpath.exists() and _remove_lock_file(fpath):
+            removed.append(lock_fpath)
+    return removed
+
+
+class _MemoryCache:
+    """Thread-safe LRU cache bounded by number of entries and approximate size in bytes."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """Initialize the instance."""
+        entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = entries
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size in bytes of the stored values."""
+        return self._nbytes
+
+    def get(
+        self,
+        key: Union[str, Path],
+        max_age: Optional[float] = None,
+    ) -> Tuple[bool, Any]:
+        """Returns (True, value) if key is stored and not older than max_age seconds, otherwise (False, None)."""
+        key = str(key)
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            value, nbytes, mtime = self._entries[key]
+            if max_age is not None and time.time() - mtime > max_age:
+                del self._entries[key]
+                self._nbytes -= nbytes
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(
+        self,
+        key: Union[str, Path],
+        value: Any,
+        nbytes: int,
+        mtime: Optional[float] = None,
+    ) -> None:
+        """Store value written at mtime timestamp and evict least recently used values if limits are exceeded."""
+        key = str(key)
+        if mtime is None:
+            mtime = time.time()
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            self.pop(key)
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes, mtime)
+            self._nbytes += nbytes
+
+            while (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ) or (self.max_bytes is not None and self._nbytes > self.max_bytes):
+                _, (_, evicted_nbytes, _) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+
+    def pop(self, key: Union[str, Path]) -> None:
+        """Remove value from cache if stored."""
+        key = str(key)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        """Remove all values."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __contains__(self, key: Union[str, Path]) -> bool:
+        return str(key) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
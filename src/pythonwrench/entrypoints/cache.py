@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import importlib
+import logging
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union, get_args
+
+from pythonwrench.argparse import str_to_bool
+from pythonwrench.disk_cache import (
+    EvictionPolicy,
+    disk_cache_call,
+    get_cache_dpath,
+    get_cache_infos,
+    prune_cache,
+    verify_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def print_cache_list(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    fn_names: Optional[Iterable[str]] = None,
+) -> None:
+    """Print number of entries, size, ages and hits of each cached function."""
+    infos = get_cache_infos(cache_dpath, fn_names=fn_names)
+    print(f"Cache directory: {str(get_cache_dpath(cache_dpath))}")
+    if len(infos) == 0:
+        print("No cached function found.")
+        return
+
+    now = time.time()
+    rows = [("function", "entries", "size", "oldest", "newest", "last_access", "hits")]
+    for info in infos:
+        row = (
+            info["fn_name"],
+            str(info["num_entries"]),
+            _format_nbytes(info["nbytes"]),
+            _format_age(info["oldest_mtime"], now),
+            _format_age(info["newest_mtime"], now),
+            _format_age(info["last_access"], now),
+            str(info["hits"]),
+        )
+        rows.append(row)
+
+    total_entries = sum(info["num_entries"] for info in infos)
+    total_nbytes = sum(info["nbytes"] for info in infos)
+    total_hits = sum(info["hits"] for info in infos)
+    rows.append(
+        (
+            "total",
+            str(total_entries),
+            _format_nbytes(total_nbytes),
+            "",
+            "",
+            "",
+            str(total_hits),
+        )
+    )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        line = "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        print(line.rstrip())
+
+
+def print_cache_prune(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    fn_names: Optional[Iterable[str]] = None,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    max_age: Optional[float] = None,
+    policy: EvictionPolicy = "lru",
+    verbose: int = 0,
+) -> None:
+    """Remove cache entries to fit into a budget and print removed entries."""
+    removed = prune_cache(
+        cache_dpath,
+        max_bytes=max_bytes,
+        max_entries=max_entries,
+        max_age=max_age,
+        policy=policy,
+        fn_names=fn_names,
+    )
+    if verbose >= 1:
+        for path in removed:
+            print(f" - {path}")
+    print(f"{len(removed)} cache entries have been removed.")
+
+
+def print_cache_verify(
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    fn_names: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+    remove_invalid: bool = False,
+) -> None:
+    """Check integrity of cache entries and print invalid entries."""
+    invalids = verify_cache(
+        cache_dpath,
+        fn_names=fn_names,
+        max_workers=max_workers,
+        remove_invalid=remove_invalid,
+    )
+    for path, error in invalids.items():
+        print(f" - {path}: {error}")
+
+    if remove_invalid:
+        print(f"{len(invalids)} invalid cache entries found and removed.")
+    else:
+        print(f"{len(invalids)} invalid cache entries found.")
+
+
+def print_cache_warmup(
+    manifest: Union[str, Path, List[Dict[str, Any]]],
+    cache_dpath: Union[str, Path, None] = None,
+    *,
+    verbose: int = 0,
+) -> None:
+    """Call functions listed in a manifest to store their outputs in cache.
+
+    The manifest is a JSON list (or a JSONL file) of calls, each call is a dictionary with the following keys:
+        - 'fn': function path formatted as 'module:qualname'.
+        - 'args': optional list of positional arguments.
+        - 'kwargs': optional dictionary of keyword arguments.
+        - 'cache_kwargs': optional dictionary of cache arguments passed to ``disk_cache_call``.
+    """
+    if isinstance(manifest, (str, Path)):
+        calls = _load_manifest(manifest)
+    else:
+        calls = manifest
+
+    for i, call in enumerate(calls):
+        fn = _import_fn(call["fn"])
+        args = call.get("args", [])
+        kwargs = call.get("kwargs", {})
+        cache_kwargs = call.get("cache_kwargs", {})
+        cache_kwargs = {"cache_dpath": cache_dpath, **cache_kwargs}
+
+        start = time.perf_counter()
+        disk_cache_call(fn, *args, **cache_kwargs, **kwargs)
+        duration = time.perf_counter() - start
+
+        if verbose >= 1:
+            print(f"[{i + 1}/{len(calls)}] {call['fn']} done in {duration:.2f}s.")
+
+    print(f"{len(calls)} calls have been warmed up.")
+
+
+def _load_manifest(fpath: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Load list of calls from a JSON or JSONL manifest file."""
+    from pythonwrench.serialization.json import load_json
+    from pythonwrench.serialization.jsonl import load_jsonl
+
+    fpath = Path(fpath)
+    if fpath.suffix == ".jsonl":
+        calls = load_jsonl(fpath)
+    else:
+        calls = load_json(fpath)
+
+    if not isinstance(calls, list):
+        msg = f"Invalid manifest content type {type(calls)}. (expected list)"
+        raise ValueError(msg)
+    return calls
+
+
+def _import_fn(fn_path: str) -> Callable:
+    """Import a function from a 'module:qualname' path."""
+    if ":" not in fn_path:
+        msg = f"Invalid argument {fn_path=}. (expected 'module:qualname' format)"
+        raise ValueError(msg)
+
+    module_name, qualname = fn_path.split(":", 1)
+    obj = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj  # type: ignore
+
+
+def _format_nbytes(nbytes: int) -> str:
+    """Format a number of bytes to a human-readable string."""
+    if nbytes < 1024:
+        return f"{nbytes}B"
+
+    size = nbytes / 1024.0
+    for unit in ("KiB", "MiB", "GiB"):
+        if size < 1024.0:
+            return f"{size:.1f}{unit}"
+        size /= 1024.0
+    return f"{size:.1f}TiB"
+
+
+def _format_age(timestamp: Optional[float], now: float) -> str:
+    """Format elapsed time since a timestamp to a human-readable string."""
+    if timestamp is None:
+        return "-"
+
+    age = max(now - timestamp, 0.0)
+    for unit, seconds in (("d", 86400.0), ("h", 3600.0), ("m", 60.0)):
+        if age >= seconds:
+            return f"{age / seconds:.1f}{unit}"
+    return f"{age:.0f}s"
+
+
+def _add_common_args(parser: ArgumentParser) -> None:
+    """Add cache directory and function names arguments to a subcommand parser."""
+    parser.add_argument(
+        "--cache_dpath",
+        "--cache-dpath",
+        type=str,
+        default=None,
+        help="Cache directory path. defaults to '~/.cache/disk_cache'.",
+    )
+    parser.add_argument(
+        "--fn_names",
+        "--fn-names",
+        type=str,
+        default=None,
+        nargs="*",
+        help="Names of function cache directories. defaults to all functions.",
+    )
+
+
+def main_cache() -> None:
+    """Perform the main cache operation."""
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser(
+        "list",
+        help="List cached functions with their number of entries, size, ages and hits.",
+    )
+    _add_common_args(list_parser)
+
+    prune_parser = subparsers.add_parser(
+        "prune",
+        help="Remove cache entries to fit into an age, size or entries budget.",
+    )
+    _add_common_args(prune_parser)
+    prune_parser.add_argument(
+        "--max_bytes",
+        "--max-bytes",
+        type=int,
+        default=None,
+        help="Max total size in bytes of the remaining entries. defaults to None.",
+    )
+    prune_parser.add_argument(
+        "--max_entries",
+        "--max-entries",
+        type=int,
+        default=None,
+        help="Max number of remaining entries. defaults to None.",
+    )
+    prune_parser.add_argument(
+        "--max_age",
+        "--max-age",
+        type=float,
+        default=None,
+        help="Max age in seconds of the remaining entries. defaults to None.",
+    )
+    prune_parser.add_argument(
+        "--policy",
+        type=str,
+        default="lru",
+        choices=get_args(EvictionPolicy),
+        help="Eviction order when max_bytes or max_entries is exceeded. defaults to 'lru'.",
+    )
+    prune_parser.add_argument(
+        "--verbose",
+        type=int,
+        default=0,
+        help="Verbose level. defaults to 0.",
+    )
+
+    verify_parser = subparsers.add_parser(
+        "verify",
+        help="Check integrity of cache entries by loading them in parallel.",
+    )
+    _add_common_args(verify_parser)
+    verify_parser.add_argument(
+        "--max_workers",
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Max number of threads used to load entries. defaults to None.",
+    )
+    verify_parser.add_argument(
+        "--remove_invalid",
+        "--remove-invalid",
+        type=str_to_bool,
+        default=False,
+        help="If True, remove entries that cannot be loaded. defaults to False.",
+    )
+
+    warmup_parser = subparsers.add_parser(
+        "warmup",
+        help="Call functions listed in a JSON or JSONL manifest to store their outputs in cache.",
+    )
+    warmup_parser.add_argument(
+        "manifest",
+        type=str,
+        help="Manifest file path.",
+    )
+    warmup_parser.add_argument(
+        "--cache_dpath",
+        "--cache-dpath",
+        type=str,
+        default=None,
+        help="Cache directory path. defaults to '~/.cache/disk_cache'.",
+    )
+    warmup_parser.add_argument(
+        "--verbose",
+        type=int,
+        default=0,
+        help="Verbose level. defaults to 0.",
+    )
+
+    args = parser.parse_args()
+    _run_command(args)
+
+
+def _run_command(args: Namespace) -> None:
+    """Run the cache subcommand with parsed arguments."""
+    if args.command == "list":
+        print_cache_list(args.cache_dpath, fn_names=args.fn_names)
+    elif args.command == "prune":
+        print_cache_prune(
+            args.cache_dpath,
+            fn_names=args.fn_names,
+            max_bytes=args.max_bytes,
+            max_entries=args.max_entries,
+            max_age=args.max_age,
+            policy=args.policy,
+            verbose=args.verbose,
+        )
+    elif args.command == "verify":
+        print_cache_verify(
+            args.cache_dpath,
+            fn_names=args.fn_names,
+            max_workers=args.max_workers,
+            remove_invalid=args.remove_invalid,
+        )
+    elif args.command == "warmup":
+        print_cache_warmup(args.manifest, args.cache_dpath, verbose=args.verbose)
+    else:
+        msg = f"Invalid argument {args.command=}."
+        raise ValueError(msg)
+
+
+if __name__ == "__main__":
+    main_cache()
@@ -13,9 +13,15 @@ if TYPE_CHECKING or lazy is None:
     from .csv import dump_csv, dumps_csv, load_csv, loads_csv, read_csv, save_csv
     from .json import dump_json, dumps_json, load_json, loads_json, read_json, save_json
     from .jsonl import (
+        JsonlSequence,
+        JsonlWriter,
+        build_jsonl_index,
         dump_jsonl,
         dumps_jsonl,
+        iter_jsonl,
+        iter_jsonl_parallel,
         load_jsonl,
+        load_jsonl_parallel,
         loads_jsonl,
         read_jsonl,
         save_jsonl,
@@ -51,9 +57,15 @@ else:
                 "save_json",
             ],
             "jsonl": [
+                "JsonlSequence",
+                "JsonlWriter",
+                "build_jsonl_index",
                 "dump_jsonl",
                 "dumps_jsonl",
+                "iter_jsonl",
+                "iter_jsonl_parallel",
                 "load_jsonl",
+                "load_jsonl_parallel",
                 "loads_jsonl",
                 "read_jsonl",
                 "save_jsonl",
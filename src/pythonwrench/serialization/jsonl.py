@@ -1,74 +1,198 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from io import StringIO, TextIOBase
+import array
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+import warnings
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from io import IOBase, StringIO, TextIOBase
+from itertools import islice
 from os import PathLike
 from pathlib import Path
-from typing import Union
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    overload,
+)
 
 from pythonwrench.cast import as_builtin
 from pythonwrench.functools import function_alias
-from pythonwrench.semver import Version
 from pythonwrench.serialization._core import _setup_output_fpath
-from pythonwrench.serialization.json import (
-    _serialize_json,
-    dumps_json,
-    load_json,
-    loads_json,
-)
+from pythonwrench.serialization.json import load_json
 from pythonwrench.warnings import warn_once
 
 __all__ = [
+    "JsonlSequence",
+    "JsonlWriter",
+    "build_jsonl_index",
     "dump_jsonl",
     "dumps_jsonl",
     "save_jsonl",
+    "iter_jsonl",
+    "iter_jsonl_parallel",
     "load_jsonl",
+    "load_jsonl_parallel",
     "loads_jsonl",
     "read_jsonl",
 ]
 
+JsonlErrorPolicy = Literal["raise", "skip", "warn"]
+JsonlCompression = Literal["infer", "gzip", "bz2", "lzma"]
+JsonlExecutor = Literal["thread", "process"]
+
+_DEFAULT_PARALLEL_CHUNK_SIZE = 16 * 1024**2
+_DEFAULT_WRITER_BUFFER_SIZE = 1024**2
+_SERIALIZE_BATCH_SIZE = 1024
+_INDEX_SUFFIX = ".idx"
+_INDEX_MAGIC = int.from_bytes(b"pwjsonl1", "little")
+_INDEX_HEADER_SIZE = 3
+
 # -- Dump / Save / Serialize content to JSONL --
 
 
+@overload
 def dump_jsonl(
-    data: list,
+    data: Iterable,
     file: Union[str, Path, None, TextIOBase] = None,
     /,
     *,
     overwrite: bool = True,
     make_parents: bool = True,
     to_builtins: bool = False,
+    return_content: Literal[True] = True,
     # JSON dump kwargs
     ensure_ascii: bool = False,
     **json_dumps_kwds,
 ) -> str:
+    """Dump content to JSONL format into a string and/or file."""
+    ...
+
+
+@overload
+def dump_jsonl(
+    data: Iterable,
+    file: Union[str, Path, None, TextIOBase] = None,
+    /,
+    *,
+    overwrite: bool = True,
+    make_parents: bool = True,
+    to_builtins: bool = False,
+    return_content: Literal[False],
+    # JSON dump kwargs
+    ensure_ascii: bool = False,
+    **json_dumps_kwds,
+) -> None:
+    """Dump content to JSONL format into a file."""
+    ...
+
+
+@overload
+def dump_jsonl(
+    data: Iterable,
+    file: Union[str, Path, None, TextIOBase] = None,
+    /,
+    *,
+    overwrite: bool = True,
+    make_parents: bool = True,
+    to_builtins: bool = False,
+    return_content: bool = True,
+    # JSON dump kwargs
+    ensure_ascii: bool = False,
+    **json_dumps_kwds,
+) -> Optional[str]:
+    """Dump content to JSONL format into a string and/or file."""
+    ...
+
+
+def dump_jsonl(
+    data: Iterable,
+    file: Union[str, Path, None, TextIOBase] = None,
+    /,
+    *,
+    overwrite: bool = True,
+    make_parents: bool = True,
+    to_builtins: bool = False,
+    return_content: bool = True,
+    # JSON dump kwargs
+    ensure_ascii: bool = False,
+    **json_dumps_kwds,
+) -> Optional[str]:
     r"""Dump content to JSONL format into a string and/or file.
 
     Args:
-        data: Data to dump to JSONL.
+        data: Data to dump to JSONL. Can be any iterable of records, including a generator.
         file: Optional filepath to save dumped data. Not used if None. defaults to None.
         overwrite: If True, overwrite target filepath. defaults to True.
         make_parents: Build intermediate directories to filepath. defaults to True.
         to_builtins: If True, converts data to builtin equivalent before saving. defaults to False.
+        return_content: If True, content is built in memory and returned. If False, records are streamed into the file without building the content string, and None is returned. defaults to True.
         ensure_ascii: Ensure only ASCII characters. defaults to False.
         \*\*json_dump_kwds: Other args passed to `json.dumps`.
 
     Returns:
-        Dumped content as string.
+        Dumped content as string, or None if return_content is False.
     """
-    content = dumps_json(
-        data,
-        to_builtins=to_builtins,
-        ensure_ascii=ensure_ascii,
-        **json_dumps_kwds,
-    )
+    if return_content:
+        content = dumps_jsonl(
+            data,
+            to_builtins=to_builtins,
+            ensure_ascii=ensure_ascii,
+            **json_dumps_kwds,
+        )
+    else:
+        content = None
+
+    def _write(opened_file: TextIOBase) -> None:
+        """Write content or stream records into an opened file."""
+        if content is not None:
+            opened_file.write(content)
+        else:
+            _serialize_jsonl(
+                data,
+                opened_file,
+                to_builtins=to_builtins,
+                ensure_ascii=ensure_ascii,
+                **json_dumps_kwds,
+            )
 
     if isinstance(file, (str, Path, PathLike)):
         file = _setup_output_fpath(file, overwrite=overwrite, make_parents=make_parents)
         with open(file, "w") as opened_file:
-            opened_file.write(content)
+            _write(opened_file)  # type: ignore
     elif isinstance(file, TextIOBase):
-        file.write(content)
+        _write(file)
     elif file is None:
         pass
     else:
@@ -79,7 +203,7 @@ def dump_jsonl(
 
 
 def dumps_jsonl(
-    data: list,
+    data: Iterable,
     /,
     *,
     to_builtins: bool = False,
@@ -101,7 +225,7 @@ def dumps_jsonl(
 
 
 def save_jsonl(
-    data: list,
+    data: Iterable,
     file: Union[str, Path, PathLike, TextIOBase],
     /,
     *,
@@ -135,31 +259,585 @@ def save_jsonl(
         file.close()
 
 
+class JsonlWriter:
+    """Append records to a JSONL file with buffered writes, without keeping all records in memory.
+
+    Example
+    -------
+    >>> with JsonlWriter("data.jsonl", flush_interval=10.0) as writer:
+    ...     writer.write({"a": 1})
+    ...     writer.write_many(generate_records())
+    """
+
+    def __init__(
+        self,
+        file: Union[str, Path, PathLike],
+        /,
+        *,
+        overwrite: bool = False,
+        make_parents: bool = True,
+        buffer_size: int = _DEFAULT_WRITER_BUFFER_SIZE,
+        flush_interval: Optional[float] = None,
+        fsync: bool = False,
+        max_bytes: Optional[int] = None,
+        to_builtins: bool = False,
+        # JSON dump kwargs
+        ensure_ascii: bool = False,
+        **json_dumps_kwds,
+    ) -> None:
+        r"""Initialize the instance and open the output file.
+
+        Args:
+            file: Path to the output JSONL file.
+            overwrite: If True, truncate existing file(s). Otherwise, records are appended. defaults to False.
+            make_parents: Build intermediate directories to filepath. defaults to True.
+            buffer_size: Number of bytes buffered before writing them to the file. defaults to 1048576 (1 MiB).
+            flush_interval: Max number of seconds between two flushes, checked when writing a record. None disables periodic flushes. defaults to None.
+            fsync: If True, call os.fsync after each flush to make written records durable. defaults to False.
+            max_bytes: If not None, records are written to numbered files '{stem}.{index:05d}{suffix}', and a new file is started when the current one would exceed max_bytes. defaults to None.
+            to_builtins: If True, converts records to builtin equivalent before saving. defaults to False.
+            ensure_ascii: Ensure only ASCII characters. defaults to False.
+            \*\*json_dumps_kwds: Other args passed to `json.dumps`.
+        """
+        if buffer_size < 0:
+            msg = f"Invalid argument {buffer_size=}. (expected a non-negative integer)"
+            raise ValueError(msg)
+        if max_bytes is not None and max_bytes <= 0:
+            msg = (
+                f"Invalid argument {max_bytes=}. (expected a positive integer or None)"
+            )
+            raise ValueError(msg)
+
+        indent = json_dumps_kwds.get("indent", None)
+        if indent is not None:
+            warn_once(f"Invalid argument {indent=}. It will be replaced by indent=None")
+            json_dumps_kwds["indent"] = None
+
+        fpath = _setup_output_fpath(file, overwrite=True, make_parents=make_parents)
+        if max_bytes is not None:
+            part_indices = _get_part_indices(fpath)
+            if overwrite:
+                for part_idx in part_indices:
+                    os.remove(_get_part_fpath(fpath, part_idx))
+                part_idx = 0
+            else:
+                part_idx = max(part_indices, default=0)
+        else:
+            part_idx = None
+
+        super().__init__()
+        self.base_fpath = fpath
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.to_builtins = to_builtins
+        self.json_dumps_kwds = {"ensure_ascii": ensure_ascii, **json_dumps_kwds}
+        self.num_records = 0
+
+        self._overwrite = overwrite
+        self._part_idx = part_idx
+        self._buffer: List[str] = []
+        self._buffer_len = 0
+        self._last_flush = time.monotonic()
+        self._file: Optional[IO[str]] = None
+        self._nbytes = 0
+        self._open()
+
+    @property
+    def fpath(self) -> Path:
+        """Path to the file currently written."""
+        if self._part_idx is None:
+            return self.base_fpath
+        return _get_part_fpath(self.base_fpath, self._part_idx)
+
+    @property
+    def closed(self) -> bool:
+        """True if writer has been closed."""
+        return self._file is None
+
+    def __enter__(self) -> "JsonlWriter":
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Exit the runtime context, flush buffered records and close the file."""
+        self.close()
+
+    def write(self, record: Any) -> None:
+        """Serialize and buffer a record, and write buffered records to the file if needed."""
+        if self._file is None:
+            msg = f"Cannot write to a closed {self.__class__.__name__}."
+            raise ValueError(msg)
+
+        if self.to_builtins:
+            record = as_builtin(record)
+        line = json.dumps(record, **self.json_dumps_kwds) + "\n"
+        line_nbytes = len(line) if line.isascii() else len(line.encode())
+
+        if (
+            self.max_bytes is not None
+            and self._nbytes + self._buffer_len > 0
+            and self._nbytes + self._buffer_len + line_nbytes > self.max_bytes
+        ):
+            self._rotate()
+
+        self._buffer.append(line)
+        self._buffer_len += line_nbytes
+        self.num_records += 1
+
+        if self._buffer_len >= self.buffer_size or (
+            self.flush_interval is not None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def write_many(self, records: Iterable[Any]) -> int:
+        """Write all records of an iterable or a generator, and returns the number of records written."""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def flush(self) -> None:
+        """Write buffered records to the file, and sync the file to disk if fsync is True."""
+        if self._file is None:
+            return
+
+        if len(self._buffer) > 0:
+            self._file.write("".join(self._buffer))
+            self._nbytes += self._buffer_len
+            self._buffer.clear()
+            self._buffer_len = 0
+
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush buffered records and close the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def _open(self) -> None:
+        """Open the current output file."""
+        mode = "w" if self._overwrite else "a"
+        self._file = open(self.fpath, mode)
+        self._nbytes = self._file.tell()
+
+    def _rotate(self) -> None:
+        """Flush and close the current file, then open the next numbered file."""
+        self.flush()
+        self._file.close()  # type: ignore
+        self._part_idx += 1  # type: ignore
+        self._open()
+
+
 def _serialize_jsonl(
-    data: list,
+    data: Iterable,
     buffer: TextIOBase,
     /,
     *,
     to_builtins: bool = False,
     **json_dumps_kwds,
 ) -> None:
-    """Perform the serialize jsonl operation."""
-    if to_builtins:
-        data = as_builtin(data)
-
+    """Write records to buffer one line at a time, by batches of lines."""
     indent = json_dumps_kwds.get("indent", None)
     if indent is not None:
         warn_once(f"Invalid argument {indent=}. It will be replaced by indent=None")
         json_dumps_kwds["indent"] = None
 
+    # json.dumps + one write per batch is much faster than json.dump, which writes each token separately
+    lines = []
     for data_i in data:
-        _serialize_json(data_i, buffer, to_builtins=False, **json_dumps_kwds)
-        buffer.write("\n")
+        if to_builtins:
+            data_i = as_builtin(data_i)
+        lines.append(json.dumps(data_i, **json_dumps_kwds))
+        if len(lines) >= _SERIALIZE_BATCH_SIZE:
+            lines.append("")
+            buffer.write("\n".join(lines))
+            lines.clear()
+
+    if len(lines) > 0:
+        lines.append("")
+        buffer.write("\n".join(lines))
 
 
 # -- Load / Read / Parse JSONL content --
 
 
+def iter_jsonl(
+    file: Union[str, Path, PathLike, IOBase],
+    /,
+    *,
+    start: int = 0,
+    stop: Optional[int] = None,
+    errors: JsonlErrorPolicy = "raise",
+    compression: Optional[JsonlCompression] = "infer",
+    **json_loads_kwds,
+) -> Generator[Any, None, None]:
+    r"""Iterate over records of a JSONL file lazily, without loading the whole file in memory.
+
+    Example
+    -------
+    >>> for record in iter_jsonl("data.jsonl.gz", start=10, stop=20):
+    ...     print(record)
+
+    Args:
+        file: Path to a JSONL file or opened file. Binary files are required for compressed content.
+        start: Index of the first line to parse. defaults to 0.
+        stop: Index of the line after the last line to parse. None means until the end of the file. defaults to None.
+        errors: Behaviour on malformed lines. 'raise' raises a ValueError, 'skip' ignores the line and 'warn' ignores the line with a warning. defaults to 'raise'.
+        compression: Compression of the file content, one of ('gzip', 'bz2', 'lzma'). 'infer' uses the path suffix ('.gz', '.bz2', '.xz' or '.lzma'). None means uncompressed content. defaults to 'infer'.
+        \*\*json_loads_kwds: Other args passed to `json.loads`.
+
+    Returns:
+        Generator of parsed records. Empty lines are ignored.
+    """
+    if start < 0 or (stop is not None and stop < start):
+        msg = f"Invalid arguments {start=} and {stop=}. (expected 0 <= start <= stop)"
+        raise ValueError(msg)
+    if errors not in get_args(JsonlErrorPolicy):
+        msg = f"Invalid argument {errors=}. (expected one of {get_args(JsonlErrorPolicy)})"
+        raise ValueError(msg)
+
+    if compression == "infer":
+        if isinstance(file, (str, Path, PathLike)):
+            compression = _COMPRESSION_SUFFIXES.get(Path(file).suffix)
+        else:
+            compression = None
+
+    if compression is not None and compression not in _COMPRESSION_OPENERS:
+        msg = f"Invalid argument {compression=}. (expected one of {get_args(JsonlCompression)} or None)"
+        raise ValueError(msg)
+
+    # Arguments are checked when called, file is opened lazily by the generator
+    return _iter_jsonl_file(
+        file,
+        start=start,
+        stop=stop,
+        errors=errors,
+        compression=compression,
+        **json_loads_kwds,
+    )
+
+
+def _iter_jsonl_file(
+    file: Union[str, Path, PathLike, IOBase],
+    *,
+    start: int,
+    stop: Optional[int],
+    errors: JsonlErrorPolicy,
+    compression: Optional[JsonlCompression],
+    **json_loads_kwds,
+) -> Generator[Any, None, None]:
+    """Open file if needed and iterate over its parsed records."""
+    if compression is not None:
+        opened_file = _COMPRESSION_OPENERS[compression](file, "rt")
+        close = True
+    elif isinstance(file, (str, Path, PathLike)):
+        opened_file = open(file, "r")
+        close = True
+    else:
+        opened_file = file
+        close = False
+
+    try:
+        yield from _iter_jsonl_lines(
+            opened_file,  # type: ignore
+            start=start,
+            stop=stop,
+            errors=errors,
+            name=getattr(opened_file, "name", "<buffer>"),
+            **json_loads_kwds,
+        )
+    finally:
+        if close:
+            opened_file.close()
+
+
+def iter_jsonl_parallel(
+    file: Union[str, Path, PathLike],
+    /,
+    *,
+    ordered: bool = True,
+    executor: JsonlExecutor = "process",
+    max_workers: Optional[int] = None,
+    chunk_size: int = _DEFAULT_PARALLEL_CHUNK_SIZE,
+    errors: JsonlErrorPolicy = "raise",
+    **json_loads_kwds,
+) -> Generator[Any, None, None]:
+    r"""Iterate over records of an uncompressed JSONL file parsed in parallel.
+
+    The file is split into byte ranges aligned on line ends, which are read and parsed by workers. Only a few ranges per worker are loaded at the same time.
+
+    Args:
+        file: Path to an uncompressed JSONL file.
+        ordered: If True, records are yielded in file order. Otherwise, records of each range are yielded as soon as the range is parsed. defaults to True.
+        executor: Executor used to parse ranges, one of ('thread', 'process'). With 'process', json_loads_kwds must be pickable. defaults to 'process'.
+        max_workers: Max number of workers of the executor. None means the number of CPUs. defaults to None.
+        chunk_size: Approximate size in bytes of each range. defaults to 16 MiB.
+        errors: Behaviour on malformed lines. 'raise' raises a ValueError, 'skip' ignores the line and 'warn' ignores the line with a warning. defaults to 'raise'.
+        \*\*json_loads_kwds: Other args passed to `json.loads`.
+
+    Returns:
+        Generator of parsed records. Empty lines are ignored.
+    """
+    if chunk_size <= 0:
+        msg = f"Invalid argument {chunk_size=}. (expected a positive integer)"
+        raise ValueError(msg)
+    if errors not in get_args(JsonlErrorPolicy):
+        msg = f"Invalid argument {errors=}. (expected one of {get_args(JsonlErrorPolicy)})"
+        raise ValueError(msg)
+
+    if executor == "thread":
+        pool_cls = ThreadPoolExecutor
+    elif executor == "process":
+        pool_cls = ProcessPoolExecutor
+    else:
+        msg = (
+            f"Invalid argument {executor=}. (expected one of {get_args(JsonlExecutor)})"
+        )
+        raise ValueError(msg)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    # Arguments are checked when called, file is split and parsed lazily by the generator
+    return _iter_jsonl_ranges_parallel(
+        os.fspath(file),
+        pool_cls=pool_cls,
+        ordered=ordered,
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+        errors=errors,
+        json_loads_kwds=json_loads_kwds,
+    )
+
+
+def _iter_jsonl_ranges_parallel(
+    fpath: str,
+    *,
+    pool_cls: Type[Executor],
+    ordered: bool,
+    max_workers: int,
+    chunk_size: int,
+    errors: JsonlErrorPolicy,
+    json_loads_kwds: Dict[str, Any],
+) -> Generator[Any, None, None]:
+    """Split file into byte ranges and iterate over records of ranges parsed in a pool."""
+    ranges = _get_jsonl_ranges(fpath, chunk_size)
+    max_pending = 2 * max_workers
+    next_range = 0
+
+    with pool_cls(max_workers) as pool:
+
+        def submit_next() -> Future:
+            """Submit parsing of the next byte range to the pool."""
+            nonlocal next_range
+            begin, end = ranges[next_range]
+            next_range += 1
+            return pool.submit(
+                _parse_jsonl_range, fpath, begin, end, errors, json_loads_kwds
+            )
+
+        if ordered:
+            queue: Deque[Future] = deque()
+            while next_range < len(ranges) and len(queue) < max_pending:
+                queue.append(submit_next())
+
+            while len(queue) > 0:
+                records, error_msgs = queue.popleft().result()
+                if next_range < len(ranges):
+                    queue.append(submit_next())
+                _warn_errors(error_msgs, errors)
+                yield from records
+
+        else:
+            pending: Set[Future] = set()
+            while next_range < len(ranges) and len(pending) < max_pending:
+                pending.add(submit_next())
+
+            while len(pending) > 0:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                while next_range < len(ranges) and len(pending) < max_pending:
+                    pending.add(submit_next())
+                for future in done:
+                    records, error_msgs = future.result()
+                    _warn_errors(error_msgs, errors)
+                    yield from records
+
+
+def load_jsonl_parallel(
+    file: Union[str, Path, PathLike],
+    /,
+    *,
+    executor: JsonlExecutor = "process",
+    max_workers: Optional[int] = None,
+    chunk_size: int = _DEFAULT_PARALLEL_CHUNK_SIZE,
+    errors: JsonlErrorPolicy = "raise",
+    **json_loads_kwds,
+) -> list:
+    """Load records of an uncompressed JSONL file parsed in parallel, in file order. See ``iter_jsonl_parallel`` for arguments."""
+    return list(
+        iter_jsonl_parallel(
+            file,
+            ordered=True,
+            executor=executor,
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+            errors=errors,
+            **json_loads_kwds,
+        )
+    )
+
+
+class JsonlSequence:
+    """Read-only sequence of records of an uncompressed JSONL file, with random access to records using a line offsets index.
+
+    The index is stored in a sidecar file and rebuilt when the JSONL file size or modification time changes.
+
+    Example
+    -------
+    >>> records = JsonlSequence("data.jsonl")
+    >>> len(records)  # does not parse the file
+    >>> records[123_456]  # parses only one line
+    """
+
+    def __init__(
+        self,
+        file: Union[str, Path, PathLike],
+        /,
+        *,
+        index_fpath: Union[str, Path, PathLike, None] = None,
+        use_mmap: bool = True,
+        **json_loads_kwds,
+    ) -> None:
+        r"""Initialize the instance.
+
+        Args:
+            file: Path to an uncompressed JSONL file.
+            index_fpath: Path to the sidecar index file. None means the JSONL path with '.idx' suffix appended. defaults to None.
+            use_mmap: If True, records are read from a memory map of the file instead of seek and read calls. defaults to True.
+            \*\*json_loads_kwds: Other args passed to `json.loads`.
+        """
+        fpath = Path(file)
+        offsets = _load_jsonl_index(fpath, index_fpath)
+        if offsets is None:
+            offsets = build_jsonl_index(fpath, index_fpath)
+
+        opened_file = open(fpath, "rb")
+        if use_mmap and offsets[-1] > 0:
+            mapped = mmap.mmap(opened_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            mapped = None
+
+        super().__init__()
+        self.fpath = fpath
+        self.json_loads_kwds = json_loads_kwds
+        self._offsets = offsets
+        self._file = opened_file
+        self._mmap = mapped
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "JsonlSequence":
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Exit the runtime context and close the file."""
+        self.close()
+
+    def __getitem__(self, idx: Union[int, slice]) -> Any:
+        """Returns the parsed record at index, or a list of records for a slice."""
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        size = len(self)
+        if idx < 0:
+            idx += size
+        if not (0 <= idx < size):
+            msg = f"Invalid argument {idx=}. (expected an index in [{-size}, {size}[)"
+            raise IndexError(msg)
+
+        begin = self._offsets[idx]
+        end = self._offsets[idx + 1]
+        if self._mmap is not None:
+            line = self._mmap[begin:end]
+        else:
+            with self._lock:
+                self._file.seek(begin)
+                line = self._file.read(end - begin)
+        return json.loads(line, **self.json_loads_kwds)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over all records."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self) -> int:
+        """Returns the number of records."""
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        """Close the memory map and the file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def build_jsonl_index(
+    file: Union[str, Path, PathLike],
+    index_fpath: Union[str, Path, PathLike, None] = None,
+) -> array.array:
+    """Build and save the index of line offsets of a JSONL file.
+
+    The index file contains unsigned 64 bits little-endian integers: a header with JSONL file size and modification time, then the byte offset of each non-empty line, then the file size.
+
+    Args:
+        file: Path to an uncompressed JSONL file.
+        index_fpath: Path to the output index file. None means the JSONL path with '.idx' suffix appended. defaults to None.
+
+    Returns:
+        Line offsets followed by the file size, as an array of 'Q' values.
+    """
+    fpath = Path(file)
+    index_fpath = _get_jsonl_index_fpath(fpath, index_fpath)
+    stat = os.stat(fpath)
+
+    offsets = array.array("Q")
+    offset = 0
+    with open(fpath, "rb") as opened_file:
+        for line in opened_file:
+            if not line.isspace():
+                offsets.append(offset)
+            offset += len(line)
+    offsets.append(offset)
+
+    index = array.array("Q", [_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns])
+    index.extend(offsets)
+    if sys.byteorder == "big":
+        index.byteswap()
+
+    # Unique temporary file, since several threads or processes can build the same index
+    tmp_fpath = index_fpath.with_name(f".tmp_{uuid.uuid4().hex}_{index_fpath.name}")
+    try:
+        with open(tmp_fpath, "wb") as opened_file:
+            index.tofile(opened_file)
+        os.replace(tmp_fpath, index_fpath)
+    except BaseException:
+        if tmp_fpath.exists():
+            os.remove(tmp_fpath)
+        raise
+    return offsets
+
+
 def load_jsonl(
     file: Union[str, Path, PathLike, TextIOBase],
     /,
@@ -190,26 +868,167 @@ def read_jsonl(*args, **kwargs):
     ...
 
 
+def _get_part_fpath(fpath: Path, part_idx: int) -> Path:
+    """Returns the path of a numbered file of a rotated JSONL file."""
+    return fpath.with_name(f"{fpath.stem}.{part_idx:05d}{fpath.suffix}")
+
+
+def _get_part_indices(fpath: Path) -> List[int]:
+    """Returns indices of existing numbered files of a rotated JSONL file."""
+    stem = re.escape(fpath.stem)
+    suffix = re.escape(fpath.suffix)
+    pattern = re.compile(rf"{stem}\.(\d{{5,}}){suffix}")
+    if not fpath.parent.is_dir():
+        return []
+
+    part_indices = []
+    for part_fpath in fpath.parent.iterdir():
+        match = pattern.fullmatch(part_fpath.name)
+        if match is not None:
+            part_indices.append(int(match.group(1)))
+    return sorted(part_indices)
+
+
+def _get_jsonl_index_fpath(
+    fpath: Path,
+    index_fpath: Union[str, Path, PathLike, None],
+) -> Path:
+    """Returns the index path of a JSONL file."""
+    if index_fpath is None:
+        return fpath.with_name(fpath.name + _INDEX_SUFFIX)
+    else:
+        return Path(index_fpath)
+
+
+def _load_jsonl_index(
+    fpath: Path,
+    index_fpath: Union[str, Path, PathLike, None],
+) -> Optional[array.array]:
+    """Load line offsets of a JSONL file from its index, or returns None if index does not exist or is outdated."""
+    index_fpath = _get_jsonl_index_fpath(fpath, index_fpath)
+    if not index_fpath.is_file():
+        return None
+
+    index = array.array("Q")
+    with open(index_fpath, "rb") as opened_file:
+        content = opened_file.read()
+    if len(content) % index.itemsize != 0:
+        return None
+    index.frombytes(content)
+    if sys.byteorder == "big":
+        index.byteswap()
+
+    stat = os.stat(fpath)
+    header = [_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns]
+    if index[:_INDEX_HEADER_SIZE].tolist() != header or len(index) == len(header):
+        return None
+    return index[_INDEX_HEADER_SIZE:]
+
+
 def _parse_jsonl(buffer: TextIOBase, **json_loads_kwds) -> list:
     """Parse jsonl."""
-    data_lst = []
-    while True:
-        content = buffer.readline()
-        if content == "":
-            break
-        content = _removesuffix(content, "\n")
-        data = loads_json(content, **json_loads_kwds)
-        data_lst.append(data)
-    return data_lst
-
-
-def _removesuffix(x: str, suffix: str) -> str:
-    """Equivalent to str.removesuffix for python < 3.9.0."""
-    if Version.python() >= Version("3.9.0"):
-        return x.removesuffix(suffix)
-
-    size = len(suffix)
-    if x[size:] != suffix:
-        return x
-    else:
-        return x[:size]
+    # json.loads ignores the trailing newline, and avoids the StringIO built by loads_json for each line
+    return [json.loads(content, **json_loads_kwds) for content in buffer]
+
+
+def _iter_jsonl_lines(
+    buffer: IO[str],
+    /,
+    *,
+    start: int = 0,
+    stop: Optional[int] = None,
+    errors: JsonlErrorPolicy = "raise",
+    name: str = "<buffer>",
+    **json_loads_kwds,
+) -> Generator[Any, None, None]:
+    """Parse lines of a text buffer in [start, stop[ and yield records one by one."""
+    for i, line in islice(enumerate(buffer), start, stop):
+        if line.isspace():
+            continue
+
+        try:
+            data = json.loads(line, **json_loads_kwds)
+        except ValueError as err:
+            if errors == "raise":
+                msg = f"Invalid JSON at line {i} of {name}: {err}"
+                raise ValueError(msg) from err
+            elif errors == "warn":
+                msg = f"Skipping invalid JSON at line {i} of {name}: {err}"
+                warnings.warn(msg)
+            continue
+
+        yield data
+
+
+def _get_jsonl_ranges(fpath: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Returns byte ranges [begin, end[ of approximately chunk_size bytes that start at the beginning of a line."""
+    size = os.path.getsize(fpath)
+    bounds = [0]
+    with open(fpath, "rb") as file:
+        pos = chunk_size
+        while pos < size:
+            # Move to the end of the line that contains the byte before pos
+            file.seek(pos - 1)
+            file.readline()
+            pos = file.tell()
+            if pos >= size:
+                break
+            bounds.append(pos)
+            pos += chunk_size
+
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_jsonl_range(
+    fpath: str,
+    begin: int,
+    end: int,
+    errors: JsonlErrorPolicy,
+    json_loads_kwds: Dict[str, Any],
+) -> Tuple[List[Any], List[str]]:
+    """Parse lines in a byte range of a JSONL file, and returns records with error messages of skipped lines."""
+    with open(fpath, "rb") as file:
+        file.seek(begin)
+        content = file.read(end - begin)
+
+    records = []
+    error_msgs = []
+    offset = begin
+    for line in content.split(b"\n"):
+        line_offset = offset
+        offset += len(line) + 1
+        if line.isspace() or len(line) == 0:
+            continue
+
+        try:
+            records.append(json.loads(line, **json_loads_kwds))
+        except ValueError as err:
+            if errors == "raise":
+                msg = f"Invalid JSON at byte {line_offset} of {fpath}: {err}"
+                raise ValueError(msg) from err
+            msg = f"Skipping invalid JSON at byte {line_offset} of {fpath}: {err}"
+            error_msgs.append(msg)
+
+    return records, error_msgs
+
+
+def _warn_errors(error_msgs: List[str], errors: JsonlErrorPolicy) -> None:
+    """Emit a warning for each skipped line if errors policy is 'warn'."""
+    if errors != "warn":
+        return
+    for msg in error_msgs:
+        warnings.warn(msg)
+
+
+_COMPRESSION_OPENERS: Dict[str, Callable[..., IO[str]]] = {
+    "gzip": gzip.open,  # type: ignore
+    "bz2": bz2.open,  # type: ignore
+    "lzma": lzma.open,  # type: ignore
+}
+_COMPRESSION_SUFFIXES: Dict[str, str] = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+}
@@ -12,6 +12,7 @@ except ImportError:
 if TYPE_CHECKING or lazy is None:
     from .checks import (
         check_args_types,
+        is_buffer,
         is_builtin_collection,
         is_builtin_number,
         is_builtin_obj,
@@ -72,6 +73,7 @@ else:
         submod_attrs={
             "checks": [
                 "check_args_types",
+                "is_buffer",
                 "is_builtin_collection",
                 "is_builtin_number",
                 "is_builtin_obj",
@@ -287,6 +287,17 @@ def _isinstance_generic_typed_dict(x: Any, target_type: type) -> bool:
     return True
 
 
+def is_buffer(x: Any) -> bool:
+    """Returns True if object supports the buffer protocol, like bytes, bytearray, memoryview, array.array or mmap.mmap."""
+    if isinstance(x, type):
+        return False
+    try:
+        memoryview(x).release()
+    except TypeError:
+        return False
+    return True
+
+
 def is_builtin_collection(x: Any, *, strict: bool = False) -> TypeIs[BuiltinCollection]:
     """Returns True if x is an instance of a builtin collection type (list, tuple, dict, set, frozenset).
 
@@ -1,19 +1,55 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import array
 import math
+import mmap
+import os
 import random
+import sys
+import tempfile
+import time
 import unittest
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
 from typing import Any, Iterable, Mapping, Tuple
 from unittest import TestCase
 
 from typing_extensions import Annotated
 
-from pythonwrench.checksum import checksum_any
+from pythonwrench.checksum import (
+    ChecksumCache,
+    Checksummer,
+    checksum_any,
+    checksum_blake2b,
+    checksum_parallel,
+    encode_canonical,
+)
 from pythonwrench.collections import all_ne
 from pythonwrench.math import nextafter
 
 
+@dataclass(frozen=True)
+class _GoldenPoint:
+    x: int
+    y: float
+
+
+class _GoldenColor(Enum):
+    RED = 1
+    GREEN = "g"
+
+
+_GoldenPair = namedtuple("_GoldenPair", ["a", "b"])
+
+# Checksums depend on type names, so golden types names must not depend on how tests are imported
+for _golden_type in (_GoldenPoint, _GoldenColor, _GoldenPair):
+    _golden_type.__module__ = "golden"
+
+
 class TestChecksum(TestCase):
     def test_checksum_alldiff(self) -> None:
         x = [
@@ -94,6 +130,268 @@ class TestChecksum(TestCase):
         csums = [checksum_any(xi) for xi in x]
         assert all_ne(csums), f"{csums=}"
 
+    def test_nested_values(self) -> None:
+        # Values computed with the recursive implementation
+        expected_lst = [
+            ([1, 2, 3], 46553185548),
+            ([1.5, -2.0], -4613937791666378747),
+            (["a", "bc"], 41538558523),
+            ({"a": [1, "b"], "c": {2, 3}}, 295715761367),
+            ([[1, (2, None)], {}], 183131918875),
+        ]
+        for x, expected in expected_lst:
+            assert checksum_any(x) == expected, f"{x=}"
+
+    def test_deep_structures(self) -> None:
+        x1, x2 = [], []
+        for i in range(sys.getrecursionlimit() * 2):
+            x1 = [x1, {"i": i}]
+            x2 = [x2, {"i": i}]
+        assert checksum_any(x1) == checksum_any(x2)
+        assert checksum_any(x1) != checksum_any([x1])
+
+    def test_checksummer(self) -> None:
+        chunks = [[1, 2], ("a", None), iter([[3.0, {"b": {4}}]]), []]
+        checksummer = Checksummer()
+        for chunk in chunks:
+            checksummer.extend(chunk)
+        checksummer.update(5)
+
+        expected = checksum_any([1, 2, "a", None, [3.0, {"b": {4}}], 5])
+        assert checksummer.digest() == expected
+        assert checksummer.count == 6
+        assert Checksummer().digest() == checksum_any([])
+
+    def test_checksum_blake2b(self) -> None:
+        x = [
+            [1, 2],
+            [2, 1],
+            (1, 2),
+            {1, 2},
+            frozenset({1, 2}),
+            {1: 2},
+            {2: 1},
+            [1, "2"],
+            ["1", 2],
+            [[1], 2],
+            [1, [2]],
+            [],
+            None,
+            0,
+            False,
+            0.0,
+            -0.0,
+            "",
+            b"",
+            bytearray(),
+            math.nan,
+            Path("a"),
+            checksum_any,
+            int,
+        ]
+        csums = [checksum_blake2b(xi) for xi in x]
+        assert all_ne(csums), f"{csums=}"
+        assert all(0 <= csum < 2**128 for csum in csums)
+
+        assert checksum_blake2b({"a", "b", 1}) == checksum_blake2b({1, "b", "a"})
+        assert checksum_blake2b(math.nan) == checksum_blake2b(-math.nan)
+        assert checksum_blake2b([1], digest_size=8) < 2**64
+        with self.assertRaises(ValueError):
+            checksum_blake2b([1], digest_size=65)
+
+    def test_encode_canonical(self) -> None:
+        assert encode_canonical([1, "a", None]) == (
+            b"[i\x00\x00\x00\x01\x01s\x00\x00\x00\x00\x00\x00\x00\x01aN]"
+        )
+        assert encode_canonical(math.nan) == encode_canonical(-math.nan)
+        assert encode_canonical({"b", "a"}) == encode_canonical({"a", "b"})
+
+        x1 = {"b": 1, "a": {"d": 2, "c": 3}}
+        x2 = {"a": {"c": 3, "d": 2}, "b": 1}
+        assert encode_canonical(x1) != encode_canonical(x2)
+        assert encode_canonical(x1, sort_dicts=True) == encode_canonical(
+            x2, sort_dicts=True
+        )
+        assert checksum_blake2b(x1, sort_dicts=True) == checksum_blake2b(
+            x2, sort_dicts=True
+        )
+
+        # Sets and sorted dicts are encoded without recursion
+        deep_set: Any = frozenset()
+        deep_dict: Any = {}
+        for i in range(sys.getrecursionlimit() * 2):
+            deep_set = frozenset([i, deep_set])
+            deep_dict = {"k": deep_dict, "a": i}
+        assert isinstance(checksum_blake2b(deep_set), int)
+        assert isinstance(checksum_blake2b(deep_dict, sort_dicts=True), int)
+
+        # Items of multi-byte formats are encoded in little-endian order
+        encoded = encode_canonical(array.array("i", [1, 2]))
+        assert encoded.endswith(b"\x01\x00\x00\x00\x02\x00\x00\x00")
+
+    def test_checksum_cache(self) -> None:
+        cache = ChecksumCache(max_entries=2, min_size=2)
+        blob = b"a" * 100
+        x = (blob, ("a", "b", "c"), Path("a"))
+
+        csum = checksum_any(x, checksum_cache=cache)
+        assert csum == checksum_any(x)
+        assert checksum_any(x, checksum_cache=cache) == csum
+        assert cache.hits == 1
+        assert len(cache) == 2
+
+        mutable = ([1], [2])
+        assert checksum_any(mutable, checksum_cache=cache) == checksum_any(mutable)
+        mutable[0].append(3)
+        assert checksum_any(mutable, checksum_cache=cache) == checksum_any(mutable)
+
+    def test_checksum_parallel(self) -> None:
+        rng = random.Random(0)
+        blob = bytes(rng.getrandbits(8) for _ in range(10_000))
+        x = [blob, bytearray(blob[:777])] * 10 + list(range(100)) + ["a", [1.0]]
+
+        for chunk_size in (1, 100, 4096):
+            assert checksum_parallel(blob, chunk_size=chunk_size) == checksum_any(blob)
+        assert checksum_parallel(x, chunk_size=300, chunk_len=7) == checksum_any(x)
+
+    def test_buffers(self) -> None:
+        data = bytes(range(256)) * 4
+        x = [
+            data,
+            memoryview(data),
+            memoryview(data).cast("I"),
+            array.array("B", data),
+            array.array("I", data),
+        ]
+        assert all_ne([checksum_any(xi) for xi in x])
+        assert all_ne([checksum_blake2b(xi) for xi in x])
+
+        # Non-contiguous views are equal to their contiguous copies
+        view = memoryview(bytearray(data))[::3]
+        assert checksum_any(view) == checksum_any(memoryview(view.tobytes()))
+        assert checksum_blake2b(view) == checksum_blake2b(memoryview(view.tobytes()))
+
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            assert checksum_any(mapped) != checksum_any(data)
+            assert checksum_parallel(mapped, chunk_size=100) == checksum_any(mapped)
+            assert checksum_blake2b([mapped]) == checksum_blake2b([mapped])
+            mapped.close()
+
+    def test_path_content(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            fpath_1 = tmpdir.joinpath("a.txt")
+            fpath_2 = tmpdir.joinpath("b.txt")
+            fpath_1.write_text("abc")
+            fpath_2.write_text("abc")
+            kwargs: dict = dict(
+                path_mode="content",
+                path_index_fpath=tmpdir.joinpath("index.db"),
+            )
+
+            assert checksum_any(fpath_1) != checksum_any(fpath_2)
+            assert checksum_any(fpath_1, **kwargs) == checksum_any(fpath_2, **kwargs)
+            assert checksum_blake2b(fpath_1, **kwargs) == checksum_blake2b(
+                fpath_2, **kwargs
+            )
+
+            csum = checksum_any(fpath_1, **kwargs)
+            fpath_1.write_text("abcd")
+            mtime = time.time() - 10.0
+            os.utime(fpath_1, (mtime, mtime))
+            assert checksum_any(fpath_1, **kwargs) != csum
+
+            cache = ChecksumCache()
+            checksum_any((fpath_1,) * 20, checksum_cache=cache, **kwargs)
+            assert len(cache) == 0
+
+
+class TestChecksumStability(TestCase):
+    """Golden values of checksums, which must not change across versions since they are used as persistent disk cache keys."""
+
+    def test_golden_values(self) -> None:
+        cases = (
+            ("none", None),
+            ("true", True),
+            ("false", False),
+            ("zero", 0),
+            ("int", 123456789),
+            ("neg_int", -42),
+            ("big_int", 2**100 + 7),
+            ("float", 1.5),
+            ("neg_zero", -0.0),
+            ("inf", math.inf),
+            ("nan", math.nan),
+            ("complex", 1 + 2j),
+            ("str", "abc"),
+            ("unicode", "h\u00e9llo \u2713"),
+            ("empty_str", ""),
+            ("bytes", b"\x00\x01abc"),
+            ("bytearray", bytearray(b"abc")),
+            ("list", [1, 2, 3]),
+            ("tuple", (1, "a", None)),
+            ("dict", {"a": 1, "b": [2.0, 3]}),
+            ("set", {1, 2, 3}),
+            ("frozenset", frozenset({"a", "b"})),
+            ("nested", {"a": [1, (2, {3, 4})], "b": {"c": None}}),
+            ("range", range(0, 10, 2)),
+            ("slice", slice(1, None, 2)),
+            ("date", date(2024, 1, 2)),
+            ("datetime", datetime(2024, 1, 2, 3, 4, 5)),
+            ("dataclass", _GoldenPoint(1, 2.5)),
+            ("enum", _GoldenColor.GREEN),
+            ("namedtuple", _GoldenPair(1, "b")),
+            ("memoryview", memoryview(b"abcd")),
+            ("array", array.array("i", [1, 2, 3])),
+        )
+        # name: (checksum_any value, checksum_blake2b value)
+        expected_dict = {
+            "none": (6253874082, 153528893975394630399607640040899856740),
+            "true": (3369196331, 7328001028875468344760258435027870279),
+            "false": (3369196330, 72291498734999407053169949237890583876),
+            "zero": (2375027569, 38899281777449557377026226404059462925),
+            "int": (2498484358, 109618594225226196530145280465198008256),
+            "neg_int": (2375027527, 186720268815802835657035688072678113399),
+            "big_int": (
+                1267650600228229401499078232952,
+                181952684066507876919535020587274488722,
+            ),
+            "float": (4609434221318977912, 230474556987467158168865495734831665050),
+            "neg_zero": (-9223372034149500552, 300300794374967630382961983146500771293),
+            "inf": (9218868439932680568, 339246789561024268445694852805116690896),
+            "nan": (9221120239746365816, 124082169999894329070919084801919939195),
+            "complex": (13830554496513968645, 26897581504408256705326529754243604995),
+            "str": (5106102203, 84712478122459062044488657694609619851),
+            "unicode": (6413809893, 100143610575104765289383973738101255699),
+            "empty_str": (4214533625, 67260288200071301170433564661108850381),
+            "bytes": (5286113426, 36448692198533701682288900652734921520),
+            "bytearray": (6326961388, 135236038444127231978401292473663771370),
+            "list": (46553185548, 122001466200469021654729996236011058408),
+            "tuple": (70904669890, 74511061318746022234024788718731739276),
+            "dict": (18446744399098985103, 196833031614538995521897104404919177348),
+            "set": (12104071569, 289344980213059703942923486786249546193),
+            "frozenset": (21505468266, 169690756839724143522187590507195997994),
+            "nested": (990957035791, 159787693646656754793648532137716273171),
+            "range": (33428111108, 325907059720796146985069123649893743981),
+            "slice": (84870118621, 124141657994542674311864418083331760395),
+            "date": (35855601800, 144174813119666693716323930985837189941),
+            "datetime": (33145453135, 168719739216543038639580641650486848182),
+            "dataclass": (
+                18451247851992891323,
+                335880069912571264870789226265535671077,
+            ),
+            "enum": (27357793629, 329166789842163130832034187687631020096),
+            "namedtuple": (152285354756, 160455719937776132479683325223216686927),
+            "memoryview": (5061563659, 254901579624281437344580089671743053984),
+            "array": (9836479429, 206718328282509542453057978934712796682),
+        }
+        for name, x in cases:
+            assert checksum_any(x) == expected_dict[name][0], f"{name=}"
+            assert checksum_blake2b(x) == expected_dict[name][1], f"{name=}"
+
 
 if __name__ == "__main__":
     unittest.main()
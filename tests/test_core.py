@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from pythonwrench._core import _insert_in_dict
+from pythonwrench._core import _FunctionRegistry, _insert_in_dict
 
 
 def test_insert_in_dict_orders_by_priority() -> None:
@@ -28,3 +28,25 @@ def test_insert_in_dict_ignores_existing_key() -> None:
 
     assert result is original
     assert result["existing"] == ("original", 1)
+
+
+def test_function_registry_dispatch_cache() -> None:
+    registry = _FunctionRegistry[str]()
+    registry.register(lambda x: "int", int)
+    registry.register(lambda x: "even", custom_predicate=lambda x: x == 2)
+
+    assert registry.apply(1) == "int"
+    assert registry.apply(2) == "even"
+    assert registry.apply(True) == "int"
+
+    registry.register(lambda x: "bool", bool, priority=1)
+    assert registry.apply(True) == "bool"
+    assert registry.apply(1) == "int"
+
+    class FakeInt:
+        @property
+        def __class__(self):
+            return int
+
+    assert registry.apply(FakeInt()) == "int"
+    assert registry.apply("a", unk_mode="identity") == "a"
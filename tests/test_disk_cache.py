@@ -1,15 +1,40 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import io
 import random
+import shutil
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List
 from unittest import TestCase
 
 import pythonwrench as pw
+from pythonwrench.disk_cache import (
+    DiskCacheStats,
+    _SQLiteStorage,
+    dump_cache_stats,
+    prune_fn_cache,
+    remove_fn_cache,
+)
 
 
 class TestDiskCache(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        tmpdir = Path(tempfile.gettempdir()).joinpath("pythonwrench_tests")
+        tmpdir.mkdir(parents=True, exist_ok=True)
+        cls.cache_dpath = tmpdir.joinpath("test_disk_cache")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if cls.cache_dpath.is_dir():
+            shutil.rmtree(cls.cache_dpath)
+
     def test_disk_cache_example_1(self) -> None:
         def heavy_processing(x: float):
             return random.random() * x
@@ -57,6 +82,337 @@ class TestDiskCache(TestCase):
         assert disk_cache_example_3.fn(10) == outputs  # type: ignore
         assert (disk_cache_example_3.cache_fn_dpath / cache_fname).is_file()  # type: ignore
 
+    def test_memory_cache(self) -> None:
+        @pw.disk_cache_decorator(
+            cache_dpath=self.cache_dpath,
+            cache_memory_max_entries=1,
+        )
+        def memory_cache_fn(x: float) -> float:
+            return random.random() * x
+
+        remove_fn_cache(memory_cache_fn, cache_dpath=self.cache_dpath)
+
+        data1 = memory_cache_fn(1.0)
+        # Outputs are read from memory, even if cache files have been removed
+        shutil.rmtree(memory_cache_fn.cache_fn_dpath)  # type: ignore
+        assert memory_cache_fn(1.0) == data1
+        assert len(memory_cache_fn.cache_memory) == 1  # type: ignore
+
+        # LRU eviction
+        data2 = memory_cache_fn(2.0)
+        assert len(memory_cache_fn.cache_memory) == 1  # type: ignore
+        assert memory_cache_fn(2.0) == data2
+        assert memory_cache_fn(1.0) != data1
+
+        # Wrappers sharing the same directory keep the tightest limits
+        with self.assertWarns(UserWarning):
+            other_fn = pw.disk_cache_decorator(
+                cache_dpath=self.cache_dpath,
+                cache_memory_max_entries=10,
+                cache_memory_max_bytes=1000,
+            )(memory_cache_fn.fn)  # type: ignore
+        assert other_fn.cache_memory is memory_cache_fn.cache_memory  # type: ignore
+        assert other_fn.cache_memory.max_entries == 1  # type: ignore
+        assert other_fn.cache_memory.max_bytes == 1000  # type: ignore
+
+    def test_memory_cache_max_age(self) -> None:
+        num_calls = []
+
+        @pw.disk_cache_decorator(
+            cache_dpath=self.cache_dpath,
+            cache_memory_max_entries=1,
+            cache_max_age=0.2,
+        )
+        def expired_fn(x: float) -> float:
+            num_calls.append(x)
+            return random.random() * x
+
+        remove_fn_cache(expired_fn, cache_dpath=self.cache_dpath)
+
+        data1 = expired_fn(1.0)
+        assert expired_fn(1.0) == data1
+        assert len(num_calls) == 1
+
+        # Expired entries are not returned from memory
+        time.sleep(0.3)
+        assert expired_fn(1.0) != data1
+        assert len(num_calls) == 2
+
+    def test_lock(self) -> None:
+        num_calls = []
+
+        @pw.disk_cache_decorator(cache_dpath=self.cache_dpath, cache_lock=True)
+        def locked_fn(x: float) -> float:
+            num_calls.append(x)
+            time.sleep(0.1)
+            return random.random() * x
+
+        remove_fn_cache(locked_fn, cache_dpath=self.cache_dpath)
+
+        with ThreadPoolExecutor(4) as executor:
+            outputs = list(executor.map(locked_fn, [1.0] * 4))
+
+        assert len(num_calls) == 1
+        assert pw.all_eq(outputs)
+        # No temporary file left in cache directory
+        fnames = [
+            fpath.name
+            for fpath in locked_fn.cache_fn_dpath.iterdir()  # type: ignore
+            if not fpath.name.endswith(".lock")
+        ]
+        assert len(fnames) == 1 and not fnames[0].startswith("."), f"{fnames=}"
+
+        # Lock files are removed with their entries, and orphan ones are removed by pruning
+        orphan_lock_fpath = locked_fn.cache_fn_dpath.joinpath(".missing.pickle.lock")  # type: ignore
+        orphan_lock_fpath.touch()
+        removed = prune_fn_cache(locked_fn, cache_dpath=self.cache_dpath, max_age=0.0)
+        assert len(removed) == 1
+        lock_fnames = [
+            fpath.name
+            for fpath in locked_fn.cache_fn_dpath.iterdir()  # type: ignore
+            if fpath.name.endswith(".lock") and fpath.name[1] != "."
+        ]
+        assert lock_fnames == [], f"{lock_fnames=}"
+
+    def test_eviction(self) -> None:
+        @pw.disk_cache_decorator(cache_dpath=self.cache_dpath, cache_max_entries=2)
+        def evicted_fn(x: float) -> float:
+            return random.random() * x
+
+        remove_fn_cache(evicted_fn, cache_dpath=self.cache_dpath)
+        cache_fn_dpath: Path = evicted_fn.cache_fn_dpath  # type: ignore
+
+        data1 = evicted_fn(1.0)
+        data2 = evicted_fn(2.0)
+        # Access first entry to make the second one the least recently used
+        assert evicted_fn(1.0) == data1
+        data3 = evicted_fn(3.0)
+
+        # Budget is enforced automatically when storing a new entry
+        assert len([p for p in cache_fn_dpath.iterdir() if p.name[0] != "."]) == 2
+        assert evicted_fn(1.0) == data1
+        assert evicted_fn(3.0) == data3
+        assert evicted_fn(2.0) != data2
+
+        removed = prune_fn_cache(
+            evicted_fn, cache_dpath=self.cache_dpath, max_entries=1
+        )
+        assert len(removed) == 1
+        assert len([p for p in cache_fn_dpath.iterdir() if p.name[0] != "."]) == 1
+
+        removed = prune_fn_cache(evicted_fn, cache_dpath=self.cache_dpath, max_age=0.0)
+        assert len(removed) == 1
+
+    def test_sqlite_storage(self) -> None:
+        for backend in ("pickle", "json"):
+
+            @pw.disk_cache_decorator(
+                cache_dpath=self.cache_dpath,
+                cache_storage="sqlite",
+                cache_saving_backend=backend,
+                cache_lock=True,
+            )
+            def sqlite_fn(x: float) -> Dict[str, float]:
+                return {"value": random.random() * x}
+
+            remove_fn_cache(sqlite_fn, cache_dpath=self.cache_dpath)
+
+            data1 = sqlite_fn(1.0)
+            assert sqlite_fn(1.0) == data1
+            assert sqlite_fn(2.0) != data1
+
+            cache_fn_dpath: Path = sqlite_fn.cache_fn_dpath  # type: ignore
+            fnames = [p.name for p in cache_fn_dpath.iterdir() if p.name[0] != "."]
+            assert fnames == [], f"{fnames=}"
+            # Entries share a fixed set of lock files instead of one lock file per entry
+            lock_fnames = [p.name for p in cache_fn_dpath.glob(".*.lock")]
+            assert 1 <= len(lock_fnames) <= 2, f"{lock_fnames=}"
+            assert all(
+                fname.startswith("..disk_cache.sqlite.") for fname in lock_fnames
+            ), f"{lock_fnames=}"
+
+            removed = prune_fn_cache(
+                sqlite_fn, cache_dpath=self.cache_dpath, max_entries=1
+            )
+            assert len(removed) == 1
+
+            # Open connections are closed before removing database
+            db_fpath = cache_fn_dpath.joinpath(".disk_cache.sqlite")
+            remove_fn_cache(sqlite_fn, cache_dpath=self.cache_dpath)
+            assert str(db_fpath) not in _SQLiteStorage._open_connections
+            assert not db_fpath.exists()
+            assert sqlite_fn(1.0) != data1
+
+    def test_sqlite_lock_async(self) -> None:
+        @pw.disk_cache_decorator(
+            cache_dpath=self.cache_dpath,
+            cache_storage="sqlite",
+            cache_lock=True,
+        )
+        async def sqlite_async_fn(x: float) -> float:
+            await asyncio.sleep(0.05)
+            return random.random() * x
+
+        remove_fn_cache(sqlite_async_fn, cache_dpath=self.cache_dpath)
+
+        async def main() -> List[float]:
+            # Waiting for locks must not use executor threads needed by lock owners
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(2))
+            coros = [sqlite_async_fn(float(i)) for i in range(16)]
+            return await asyncio.wait_for(asyncio.gather(*coros), timeout=10.0)
+
+        outputs = asyncio.run(main())
+        assert len(set(outputs)) == 16
+
+    def test_async(self) -> None:
+        num_calls = []
+
+        @pw.disk_cache_decorator(cache_dpath=self.cache_dpath)
+        async def async_fn(x: float) -> float:
+            num_calls.append(x)
+            await asyncio.sleep(0.05)
+            return random.random() * x
+
+        remove_fn_cache(async_fn, cache_dpath=self.cache_dpath)
+
+        async def main() -> List[float]:
+            outputs = await asyncio.gather(*[async_fn(1.0) for _ in range(4)])
+            outputs.append(await async_fn(1.0))
+            return outputs
+
+        outputs = asyncio.run(main())
+        assert len(num_calls) == 1
+        assert isinstance(outputs[0], float)
+        assert pw.all_eq(outputs)
+
+    def test_async_cancel(self) -> None:
+        num_calls = []
+
+        @pw.disk_cache_decorator(cache_dpath=self.cache_dpath, cache_lock=True)
+        async def async_fn(x: float) -> float:
+            num_calls.append(x)
+            await asyncio.sleep(0.1)
+            return random.random() * x
+
+        remove_fn_cache(async_fn, cache_dpath=self.cache_dpath)
+
+        async def main() -> float:
+            owner = asyncio.ensure_future(async_fn(1.0))
+            await asyncio.sleep(0.02)
+            waiter = asyncio.ensure_future(async_fn(1.0))
+            await asyncio.sleep(0.02)
+            owner.cancel()
+            # Cancelling the first caller must not cancel other callers waiting for the same outputs
+            output = await waiter
+            assert await asyncio.wait_for(async_fn(1.0), timeout=5.0) == output
+            return output
+
+        output = asyncio.run(main())
+        assert isinstance(output, float)
+        assert num_calls == [1.0]
+
+    def test_compression(self) -> None:
+        for compression, suffix in (("gzip", ".gz"), ("lzma", ".xz")):
+
+            @pw.disk_cache_decorator(
+                cache_dpath=self.cache_dpath,
+                cache_compression=compression,
+            )
+            def compressed_fn(n: int) -> List[str]:
+                return [pw.randstr(4) for _ in range(n)] * 10
+
+            remove_fn_cache(compressed_fn, cache_dpath=self.cache_dpath)
+
+            data1 = compressed_fn(100)
+            assert compressed_fn(100) == data1
+
+            cache_fn_dpath: Path = compressed_fn.cache_fn_dpath  # type: ignore
+            fnames = [p.name for p in cache_fn_dpath.iterdir() if p.name[0] != "."]
+            assert len(fnames) == 1
+            assert fnames[0].endswith(".pickle" + suffix), f"{fnames=}"
+
+    def test_key_fns(self) -> None:
+        @pw.disk_cache_decorator(
+            cache_dpath=self.cache_dpath,
+            cache_ignore_args=["verbose"],
+            cache_key_fns={"values": "size"},
+        )
+        def key_fn(values: List[int], verbose: bool = False) -> float:
+            return random.random() * sum(values)
+
+        remove_fn_cache(key_fn, cache_dpath=self.cache_dpath)
+
+        data1 = key_fn(list(range(100)), False)
+        assert key_fn(list(range(100)), verbose=True) == data1
+        # Same type and length gives the same key with 'size' mode
+        assert key_fn(list(range(1, 101))) == data1
+        assert key_fn(list(range(101))) != data1
+
+    def test_key_fns_var_args(self) -> None:
+        @pw.disk_cache_decorator(
+            cache_dpath=self.cache_dpath,
+            cache_ignore_args=["verbose"],
+        )
+        def var_args_fn(a: int, *rest: int, verbose: bool = False) -> float:
+            return random.random() * (a + sum(rest))
+
+        remove_fn_cache(var_args_fn, cache_dpath=self.cache_dpath)
+
+        data1 = var_args_fn(1, 2, 3)
+        assert var_args_fn(1, 2, 3, verbose=True) == data1
+        assert var_args_fn(1, 9, 3) != data1
+        assert var_args_fn(1, 2) != data1
+
+        with self.assertRaises(ValueError):
+            pw.disk_cache_decorator(cache_ignore_args=["unknown"])(var_args_fn)
+
+    def test_stats(self) -> None:
+        @pw.disk_cache_decorator(cache_dpath=self.cache_dpath)
+        def stats_fn(x: float) -> float:
+            return random.random() * x
+
+        remove_fn_cache(stats_fn, cache_dpath=self.cache_dpath)
+        stats: DiskCacheStats = stats_fn.cache_stats  # type: ignore
+        stats.reset()
+        assert stats.hit_ratio is None
+        all_stats = pw.load_json(io.StringIO(dump_cache_stats()))
+        assert all_stats[str(stats_fn.cache_fn_dpath)]["hit_ratio"] is None  # type: ignore
+
+        stats_fn(1.0)
+        stats_fn(1.0)
+        stats_fn(1.0)
+        stats_fn(2.0)
+
+        assert stats.hits == 2
+        assert stats.misses == 2
+        assert stats.hit_ratio == 0.5
+        assert stats.bytes_written > 0 and stats.bytes_read > 0
+
+        all_stats = pw.load_json(io.StringIO(dump_cache_stats()))
+        assert all_stats[str(stats_fn.cache_fn_dpath)]["hits"] == 2  # type: ignore
+
+    def test_map(self) -> None:
+        ncalls = [0]
+
+        def map_fn(x: int) -> int:
+            ncalls[0] += 1
+            return x * 2
+
+        for storage in ("files", "sqlite"):
+            ncalls[0] = 0
+            cache_dpath = self.cache_dpath.joinpath(f"map_{storage}")
+            kwds = dict(cache_dpath=cache_dpath, cache_storage=storage)
+
+            assert pw.disk_cache_call(map_fn, 1, **kwds) == 2
+            outputs = pw.disk_cache_map(map_fn, [1, 2, 3, 2, 4], batch_size=2, **kwds)
+            assert outputs == [2, 4, 6, 4, 8]
+            assert ncalls[0] == 4
+
+            outputs = pw.disk_cache_map(map_fn, [4, 3, 5], executor="thread", **kwds)
+            assert outputs == [8, 6, 10]
+            assert ncalls[0] == 5
+
 
 if __name__ == "__main__":
     unittest.main()
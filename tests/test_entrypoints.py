@@ -7,6 +7,13 @@ import unittest
 from pathlib import Path
 from unittest import TestCase
 
+from pythonwrench.disk_cache import get_cache_infos, verify_cache
+from pythonwrench.entrypoints.cache import (
+    print_cache_list,
+    print_cache_prune,
+    print_cache_verify,
+    print_cache_warmup,
+)
 from pythonwrench.entrypoints.safe_rmdir import print_safe_rmdir
 from pythonwrench.entrypoints.tree import print_tree
 
@@ -37,6 +44,42 @@ class TestEntries(TestCase):
     def test_print_tree(self) -> None:
         print_tree(".", max_depth=0)
 
+    def test_print_cache(self) -> None:
+        cache_dpath = self.tmpdir.joinpath("test_print_cache")
+        if cache_dpath.is_dir():
+            shutil.rmtree(cache_dpath)
+
+        manifest = [
+            {"fn": "json:dumps", "args": [[1, 2]]},
+            {"fn": "json:dumps", "args": [[3]], "kwargs": {"indent": 2}},
+            {
+                "fn": "json:loads",
+                "args": ["[]"],
+                "cache_kwargs": {"cache_compression": "gzip"},
+            },
+        ]
+        print_cache_warmup(manifest, cache_dpath)
+
+        infos = {info["fn_name"]: info for info in get_cache_infos(cache_dpath)}
+        assert infos["dumps"]["num_entries"] == 2
+        assert infos["loads"]["num_entries"] == 1
+
+        print_cache_list(cache_dpath)
+        print_cache_verify(cache_dpath)
+        assert len(verify_cache(cache_dpath)) == 0
+
+        fpath = next(cache_dpath.joinpath("loads").glob("*.gz"))
+        fpath.write_bytes(b"invalid")
+        print_cache_verify(cache_dpath, remove_invalid=True)
+        assert not fpath.exists()
+
+        print_cache_prune(cache_dpath, fn_names=["dumps"], max_entries=1)
+        infos = {info["fn_name"]: info for info in get_cache_infos(cache_dpath)}
+        assert infos["dumps"]["num_entries"] == 1
+        assert infos["loads"]["num_entries"] == 0
+
+        shutil.rmtree(cache_dpath)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import gzip
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest import TestCase
 
-from pythonwrench.jsonl import dumps_jsonl, loads_jsonl
+from pythonwrench.jsonl import dump_jsonl, dumps_jsonl, load_jsonl, loads_jsonl
+from pythonwrench.serialization.jsonl import (
+    JsonlSequence,
+    JsonlWriter,
+    build_jsonl_index,
+    iter_jsonl,
+    iter_jsonl_parallel,
+    load_jsonl_parallel,
+)
 
 
 class TestJSONL(TestCase):
@@ -13,6 +25,139 @@ class TestJSONL(TestCase):
         content = dumps_jsonl(data)
         assert loads_jsonl(content) == data
 
+    def test_iter_jsonl(self) -> None:
+        data = [{"a": i} for i in range(10)]
+        content = dumps_jsonl(data)
+        lines = content.split("\n")
+        lines.insert(5, "{invalid")
+        content_with_error = "\n".join(lines)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath("data.jsonl.gz")
+            with gzip.open(fpath, "wt") as file:
+                file.write(content_with_error)
+
+            assert list(iter_jsonl(fpath, errors="skip")) == data
+            assert list(iter_jsonl(fpath, start=2, stop=5)) == data[2:5]
+            assert list(iter_jsonl(fpath, start=6, errors="skip")) == data[5:]
+
+            with self.assertRaises(ValueError):
+                list(iter_jsonl(fpath))
+            with self.assertWarns(UserWarning):
+                list(iter_jsonl(fpath, errors="warn"))
+
+            # Invalid arguments are reported when called, before iterating
+            with self.assertRaises(ValueError):
+                iter_jsonl(fpath, errors="ignore")  # type: ignore
+            with self.assertRaises(ValueError):
+                iter_jsonl(fpath, compression="zip")  # type: ignore
+            with self.assertRaises(ValueError):
+                iter_jsonl(fpath, start=5, stop=2)
+
+    def test_load_jsonl_parallel(self) -> None:
+        data = [{"a": i, "b": "x" * (i % 7)} for i in range(200)]
+        content = dumps_jsonl(data)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath("data.jsonl")
+            fpath.write_text(content)
+
+            for chunk_size in (1, 100, 10**6):
+                result = load_jsonl_parallel(
+                    fpath, executor="thread", max_workers=3, chunk_size=chunk_size
+                )
+                assert result == data
+
+            result = load_jsonl_parallel(fpath, max_workers=2, chunk_size=500)
+            assert result == data
+
+            records = iter_jsonl_parallel(
+                fpath, ordered=False, executor="thread", chunk_size=50
+            )
+            result = list(records)
+            assert sorted(result, key=lambda x: x["a"]) == data
+
+            # Invalid arguments are reported when called, before iterating
+            with self.assertRaises(ValueError):
+                iter_jsonl_parallel(fpath, executor="gpu")  # type: ignore
+            with self.assertRaises(ValueError):
+                iter_jsonl_parallel(fpath, chunk_size=0)
+
+            fpath.write_text(content + "{invalid\n" + content)
+            with self.assertRaises(ValueError):
+                load_jsonl_parallel(fpath, executor="thread", chunk_size=100)
+            result = load_jsonl_parallel(
+                fpath, executor="thread", chunk_size=100, errors="skip"
+            )
+            assert result == data + data
+
+    def test_jsonl_sequence(self) -> None:
+        data = [{"a": i, "b": "x" * (i % 7)} for i in range(100)]
+        content = dumps_jsonl(data)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath("data.jsonl")
+            fpath.write_text(content.replace("\n", "\n\n", 3))
+            offsets = build_jsonl_index(fpath)
+            assert len(offsets) == len(data) + 1
+            assert Path(tmpdir).joinpath("data.jsonl.idx").is_file()
+
+            # Index can be built concurrently, and no temporary file is left
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(build_jsonl_index, [fpath] * 16))
+            assert all(list(result) == list(offsets) for result in results)
+            assert sorted(p.name for p in Path(tmpdir).iterdir()) == [
+                "data.jsonl",
+                "data.jsonl.idx",
+            ]
+
+            for use_mmap in (False, True):
+                with JsonlSequence(fpath, use_mmap=use_mmap) as records:
+                    assert len(records) == len(data)
+                    assert records[0] == data[0]
+                    assert records[-1] == data[-1]
+                    assert records[10:20:3] == data[10:20:3]
+                    assert list(records) == data
+
+            fpath.write_text(content + content)
+            with JsonlSequence(fpath) as records:
+                assert len(records) == 2 * len(data)
+
+    def test_jsonl_writer(self) -> None:
+        data = [{"a": i, "b": "\u00e9" * (i % 5)} for i in range(100)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath("data.jsonl")
+            with JsonlWriter(fpath, buffer_size=100) as writer:
+                writer.write_many(data[:50])
+            with JsonlWriter(fpath) as writer:
+                writer.write_many(iter(data[50:]))
+                assert writer.num_records == 50
+            assert load_jsonl(fpath) == data
+
+            with JsonlWriter(fpath, overwrite=True, max_bytes=200) as writer:
+                writer.write_many(data)
+            fpaths = sorted(Path(tmpdir).glob("data.*.jsonl"))
+            assert len(fpaths) > 1
+            assert all(path.stat().st_size <= 200 for path in fpaths)
+            assert [x for path in fpaths for x in load_jsonl(path)] == data
+
+    def test_dump_jsonl(self) -> None:
+        data = [{"a": i, "b": [i, str(i)]} for i in range(3000)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath("data.jsonl")
+            # Content is still returned by default when a file is given
+            content = dump_jsonl(data, fpath)
+            assert content == dumps_jsonl(data)
+            assert content == dump_jsonl(data)
+            assert fpath.read_text() == content
+
+            result = dump_jsonl(iter(data), fpath, return_content=False)
+            assert result is None
+            assert fpath.read_text() == content
+            assert load_jsonl(fpath) == data
+
 
 if __name__ == "__main__":
     unittest.main()